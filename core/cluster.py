@@ -0,0 +1,60 @@
+import os
+
+from core.sharding import shard_for
+
+
+# =========================================================
+# CLUSTERED MODE (DETERMINISTIC ASSET PARTITIONING)
+# =========================================================
+#
+# N runner instances split the topology by shard_for(site, asset, N).
+# Each instance subscribes only to the raw topics of the assets it
+# owns, so every point of an asset — and therefore the asset
+# aggregation, ring buffers and engine state — lives on one instance.
+#
+# Environment overrides (one config file for all instances):
+#   VIBRALYZER_INSTANCE_COUNT
+#   VIBRALYZER_INSTANCE_INDEX
+
+ENV_INSTANCE_COUNT = "VIBRALYZER_INSTANCE_COUNT"
+ENV_INSTANCE_INDEX = "VIBRALYZER_INSTANCE_INDEX"
+
+
+def resolve_cluster(cluster_cfg: dict):
+    """
+    (instance_count, instance_index) from config + environment.
+    """
+    cluster_cfg = cluster_cfg or {}
+
+    count = int(os.environ.get(ENV_INSTANCE_COUNT, cluster_cfg.get("instance_count", 1)))
+    index = int(os.environ.get(ENV_INSTANCE_INDEX, cluster_cfg.get("instance_index", 0)))
+
+    if count < 1:
+        raise ValueError(f"instance_count must be >= 1: {count}")
+
+    if not 0 <= index < count:
+        raise ValueError(f"instance_index {index} outside [0, {count})")
+
+    return count, index
+
+
+def owned_assets(topology_cfg: dict, instance_count: int, instance_index: int):
+    """
+    [(site, asset), ...] owned by this instance, in topology order.
+    """
+    return [
+        (site, asset)
+        for site, site_cfg in topology_cfg.get("sites", {}).items()
+        for asset in site_cfg.get("assets", {})
+        if shard_for(site, asset, instance_count) == instance_index
+    ]
+
+
+def partition_topics(raw_topic: str, assets):
+    """
+    Per-asset subscriptions under the raw topic root:
+        vibration/raw/#  →  vibration/raw/{site}/{asset}/#
+    (the trailing # also covers the "/bin" frame topics).
+    """
+    root = raw_topic.rstrip("#").rstrip("/")
+    return [f"{root}/{site}/{asset}/#" for site, asset in assets]
@@ -0,0 +1,292 @@
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.sharding import shard_for
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedComputePool:
+    """
+    Multi-process L1 compute tier.
+
+    Features:
+    - One worker process per shard, points sharded by stable
+      site/asset hash (per-asset ordering + locality preserved)
+    - Windows handed over through multiprocessing.shared_memory
+      (fixed slots per worker, no pickling of sample arrays)
+    - Results collected on one thread → on_result(meta, features)
+    - Backpressure: window dropped when a shard has no free slot,
+      or submit(block=True) waits for one (replay / benchmarks)
+    - drain() waits for every in-flight window; stop() drains first
+    - Health metrics
+    """
+
+    def __init__(
+        self,
+        worker_count=4,
+        window_size=4096,
+        slots_per_worker=4,
+        dtype=np.float64,
+    ):
+        self.worker_count = worker_count
+        self.window_size = window_size
+        self.slots_per_worker = slots_per_worker
+        self.dtype = np.dtype(dtype)
+
+        self._ctx = mp.get_context("spawn")
+        self._result_q = self._ctx.Queue()
+
+        self._shms = []
+        self._slots = []       # per worker: np view (slots, window_size)
+        self._free = []        # per worker: queue.Queue of free slot idx
+        self._job_qs = []
+        self._procs = []
+
+        self._collector = None
+        self._running = False
+
+        # Windows submitted and not yet handed to on_result
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
+        # Metrics
+        self.metrics = {
+            "windows_submitted": 0,
+            "windows_processed": 0,
+            "windows_failed": 0,
+            "windows_dropped": 0,
+        }
+
+    # =========================================================
+    # START
+    # =========================================================
+    def start(self, on_result):
+        if self._procs:
+            return
+
+        self._running = True
+        slot_bytes = self.window_size * self.dtype.itemsize
+
+        for i in range(self.worker_count):
+            shm = shared_memory.SharedMemory(
+                create=True,
+                size=slot_bytes * self.slots_per_worker,
+            )
+            self._shms.append(shm)
+            self._slots.append(
+                np.ndarray(
+                    (self.slots_per_worker, self.window_size),
+                    dtype=self.dtype,
+                    buffer=shm.buf,
+                )
+            )
+
+            free = queue.Queue()
+            for slot in range(self.slots_per_worker):
+                free.put(slot)
+            self._free.append(free)
+
+            job_q = self._ctx.Queue()
+            self._job_qs.append(job_q)
+
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(
+                    i,
+                    shm.name,
+                    self.slots_per_worker,
+                    self.window_size,
+                    self.dtype.str,
+                    job_q,
+                    self._result_q,
+                ),
+                daemon=True,
+                name=f"L1Worker-{i+1}",
+            )
+            p.start()
+            self._procs.append(p)
+
+        self._collector = threading.Thread(
+            target=self._collect_loop,
+            args=(on_result,),
+            daemon=True,
+            name="L1Collector",
+        )
+        self._collector.start()
+
+        logger.info(f"L1 compute pool started with {self.worker_count} workers")
+
+    # =========================================================
+    # SUBMIT
+    # =========================================================
+    def submit(
+        self, site, asset, point, window, l1_params: dict, meta=None, block=False
+    ) -> bool:
+        """
+        Copy window into a free shared-memory slot of the owning shard.
+        l1_params: L1FeaturePipeline kwargs for this point
+        meta: extra context echoed back to on_result()
+        block: wait for a free slot instead of dropping the window
+               (gives up only if the shard's worker has died)
+        """
+        shard = shard_for(site, asset, self.worker_count)
+
+        try:
+            slot = self._free_slot(shard, block)
+        except queue.Empty:
+            self.metrics["windows_dropped"] += 1
+            logger.warning(f"L1 shard {shard} saturated — window dropped")
+            return False
+
+        n = min(len(window), self.window_size)
+        self._slots[shard][slot, :n] = window[-n:]
+
+        job_meta = dict(meta or {})
+        job_meta.update({"site": site, "asset": asset, "point": point})
+
+        with self._idle:
+            self._in_flight += 1
+
+        self._job_qs[shard].put((slot, n, job_meta, l1_params))
+        self.metrics["windows_submitted"] += 1
+        return True
+
+    def _free_slot(self, shard, block):
+        free = self._free[shard]
+
+        if not block:
+            return free.get_nowait()
+
+        while True:
+            try:
+                return free.get(timeout=1)
+            except queue.Empty:
+                if not self._procs[shard].is_alive():
+                    raise
+
+    # =========================================================
+    # RESULT COLLECTOR
+    # =========================================================
+    def _collect_loop(self, on_result):
+        while self._running:
+            try:
+                shard, slot, meta, features, error = self._result_q.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            self._free[shard].put(slot)
+
+            try:
+                if error is not None:
+                    self.metrics["windows_failed"] += 1
+                    logger.error(f"L1 worker failed:\n{error}")
+                    continue
+
+                self.metrics["windows_processed"] += 1
+
+                try:
+                    on_result(meta, features)
+                except Exception:
+                    logger.exception("L1 result handler failed")
+
+            finally:
+                with self._idle:
+                    self._in_flight -= 1
+                    self._idle.notify_all()
+
+    # =========================================================
+    # METRICS
+    # =========================================================
+    def get_status(self):
+        return {
+            "workers_alive": sum(p.is_alive() for p in self._procs),
+            "free_slots": [q.qsize() for q in self._free],
+            "metrics": dict(self.metrics),
+        }
+
+    # =========================================================
+    # DRAIN / STOP
+    # =========================================================
+    def drain(self, timeout=None) -> bool:
+        """
+        Wait until every submitted window has come back through
+        on_result. False on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def stop(self, timeout=10):
+        if not self.drain(timeout):
+            logger.warning(
+                f"L1 compute pool stopped with {self._in_flight} windows in flight"
+            )
+
+        self._running = False
+
+        for job_q in self._job_qs:
+            job_q.put(None)
+
+        for p in self._procs:
+            p.join(timeout=2)
+
+        if self._collector:
+            self._collector.join(timeout=2)
+
+        self._slots.clear()
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+
+        logger.info("L1 compute pool stopped cleanly")
+
+
+# =========================================================
+# WORKER PROCESS
+# =========================================================
+def _worker_main(shard, shm_name, slots, window_size, dtype_str, job_q, result_q):
+    from core.l1_feature_pipeline import L1FeaturePipeline
+
+    # Spawned children share the parent's resource tracker, so
+    # attaching here does not hand ownership of the segment over.
+    shm = shared_memory.SharedMemory(name=shm_name)
+
+    buf = np.ndarray((slots, window_size), dtype=np.dtype(dtype_str), buffer=shm.buf)
+    pipelines = {}
+
+    while True:
+        job = job_q.get()
+        if job is None:
+            break
+
+        slot, n, meta, l1_params = job
+
+        try:
+            key = (meta["site"], meta["asset"], meta["point"])
+            pipeline = pipelines.get(key)
+            if pipeline is None:
+                pipeline = L1FeaturePipeline(**l1_params)
+                pipelines[key] = pipeline
+
+            features = pipeline.compute(
+                buf[slot, :n],
+                rpm=meta.get("rpm"),
+                new_samples=meta.get("new_samples"),
+                restart=meta.get("restart", False),
+            )
+            result_q.put((shard, slot, meta, features, None))
+
+        except Exception:
+            result_q.put((shard, slot, meta, None, traceback.format_exc()))
+
+    del buf
+    shm.close()
+
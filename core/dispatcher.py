@@ -0,0 +1,179 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchDispatcher:
+    """
+    Micro-batching stage between the ring buffer and L1.
+
+    Features:
+    - Collects ready windows for up to `time_slice_ms` after the first
+      one arrives, or until `max_batch` windows are collected
+    - Hands the whole batch to process_batch(items) on one thread
+      (one vectorized L1 / PHI pass, then fan-out)
+    - Metrics: batch size histogram, added latency (submit → dispatch)
+    - submit(block=True) waits for queue space instead of dropping,
+      drain() waits until every submitted window is processed
+      (replay / benchmarks: deterministic, nothing dropped)
+    """
+
+    def __init__(
+        self,
+        process_batch,
+        time_slice_ms=20,
+        max_batch=64,
+        maxsize=1024,
+        report_every=500,
+    ):
+        self.process_batch = process_batch
+        self.time_slice = time_slice_ms / 1000.0
+        self.max_batch = max_batch
+        self.report_every = report_every
+
+        self.queue = queue.Queue(maxsize=maxsize)
+
+        self._thread = None
+        self._running = False
+
+        # Metrics
+        self.metrics = {
+            "batches": 0,
+            "windows": 0,
+            "windows_dropped": 0,
+            "batches_failed": 0,
+            "latency_sum_sec": 0.0,
+            "latency_max_sec": 0.0,
+        }
+        self.batch_size_hist = {}
+
+    # =========================================================
+    # START
+    # =========================================================
+    def start(self):
+        if self._thread:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._dispatch_loop,
+            daemon=True,
+            name="L1MicroBatch",
+        )
+        self._thread.start()
+
+        logger.info(
+            f"Micro-batch dispatcher started "
+            f"(slice={self.time_slice * 1000:.0f} ms, max_batch={self.max_batch})"
+        )
+
+    # =========================================================
+    # PUBLIC API
+    # =========================================================
+    def submit(self, item, block=False) -> bool:
+        try:
+            self.queue.put((time.monotonic(), item), block=block)
+            return True
+        except queue.Full:
+            self.metrics["windows_dropped"] += 1
+            logger.warning("Micro-batch queue full — window dropped")
+            return False
+
+    # =========================================================
+    # DISPATCH LOOP
+    # =========================================================
+    def _dispatch_loop(self):
+        while self._running:
+            try:
+                first = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = first[0] + self.time_slice
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Drain whatever is already waiting (no extra delay)
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._record(batch)
+
+            try:
+                self.process_batch([item for _, item in batch])
+            except Exception:
+                self.metrics["batches_failed"] += 1
+                logger.exception("Micro-batch processing failed")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _record(self, batch):
+        now = time.monotonic()
+        size = len(batch)
+
+        self.metrics["batches"] += 1
+        self.metrics["windows"] += size
+        self.batch_size_hist[size] = self.batch_size_hist.get(size, 0) + 1
+
+        for submitted, _ in batch:
+            latency = now - submitted
+            self.metrics["latency_sum_sec"] += latency
+            if latency > self.metrics["latency_max_sec"]:
+                self.metrics["latency_max_sec"] = latency
+
+        if self.report_every and self.metrics["batches"] % self.report_every == 0:
+            status = self.get_status()
+            logger.info(
+                f"Micro-batch: avg size {status['avg_batch_size']:.1f}, "
+                f"avg added latency {status['avg_latency_ms']:.1f} ms, "
+                f"max {status['max_latency_ms']:.1f} ms"
+            )
+
+    # =========================================================
+    # METRICS
+    # =========================================================
+    def get_status(self):
+        batches = self.metrics["batches"]
+        windows = self.metrics["windows"]
+
+        return {
+            "queue_size": self.queue.qsize(),
+            "metrics": dict(self.metrics),
+            "avg_batch_size": windows / batches if batches else 0.0,
+            "avg_latency_ms": (
+                1000.0 * self.metrics["latency_sum_sec"] / windows
+                if windows else 0.0
+            ),
+            "max_latency_ms": 1000.0 * self.metrics["latency_max_sec"],
+            "batch_size_hist": dict(sorted(self.batch_size_hist.items())),
+        }
+
+    # =========================================================
+    # DRAIN / STOP
+    # =========================================================
+    def drain(self):
+        """
+        Block until every submitted window has been processed.
+        """
+        self.queue.join()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+        logger.info("Micro-batch dispatcher stopped cleanly")
@@ -1,13 +1,254 @@
 import time
-import numpy as np 
-from scipy.signal import hilbert, detrend 
+from collections import namedtuple
+from functools import cached_property
+
+import numpy as np
+from scipy.signal import hilbert, detrend
+from core.multirate import MultiRateStage
+from health.point_health_index import PHI_INPUTS
 from core.signal_utils import (
     rms,
     peak_to_peak,
     bandpass_energy,
+    rfft_spectrum,
+    band_energy_from_spectrum,
+    envelope_from_spectrum,
+    velocity_from_spectrum,
+    rms_batch,
+    peak_to_peak_batch,
+    rfft_spectrum_batch,
+    band_energy_batch,
+    envelope_batch,
+    order_bins,
 )
 
 
+# Band definitions (Hz)
+HF_BAND = (3000, 10000)
+LOW_BAND = (10, 100)
+HIGH_BAND = (1000, 5000)
+
+# Velocity band of the decimated path (ISO 10816 10–1000 Hz)
+VELOCITY_BAND = (10, 1000)
+
+# Running-speed orders (1×, 2×, 3×) and gear-mesh sidebands (± m·fr)
+ORDERS = (1, 2, 3)
+GEAR_SIDEBANDS = (-3, -2, -1, 1, 2, 3)
+
+
+# =========================================================
+# ORDER PLAN (BIN INDEXES PER RPM / FS / N)
+# =========================================================
+class _OrderPlan:
+    """
+    Precomputed bin indexes for order-based features.
+    Rebuilt only when n / fs change or rpm drifts beyond tolerance.
+    """
+
+    def __init__(self, n, fs, rpm, gear_teeth=None):
+        self.n = n
+        self.fs = fs
+        self.rpm = rpm
+
+        fr = rpm / 60.0
+
+        self.harmonic_idx = order_bins(n, fs, fr * np.asarray(ORDERS))
+
+        if gear_teeth:
+            mesh_hz = gear_teeth * fr
+            self.mesh_idx = order_bins(n, fs, [mesh_hz]).ravel()
+            self.sideband_idx = order_bins(
+                n, fs, mesh_hz + fr * np.asarray(GEAR_SIDEBANDS)
+            ).ravel()
+        else:
+            self.mesh_idx = None
+            self.sideband_idx = None
+
+
+# =========================================================
+# PER-WINDOW LAZY INTERMEDIATES
+# =========================================================
+class _WindowContext:
+    """
+    Shared intermediates of one window.
+    Each is computed on first access only, at most once.
+    """
+
+    def __init__(
+        self,
+        acc,
+        fs,
+        shared_spectrum,
+        order_plan=None,
+        low_rate=None,
+        velocity_band=None,
+    ):
+        self.acc = acc
+        self.fs = fs
+        self.shared_spectrum = shared_spectrum
+        self._order_plan = order_plan
+        self._low_rate = low_rate
+        self._velocity_band = velocity_band
+
+    @cached_property
+    def low(self):
+        """
+        Context for low-band / velocity features: the decimated window
+        when the multi-rate stage is ready, else this window.
+        """
+        low_rate = self._low_rate() if self._low_rate else None
+        if low_rate is None:
+            return self
+
+        window, fs_low = low_rate
+        return _WindowContext(
+            window, fs_low, shared_spectrum=True, velocity_band=VELOCITY_BAND
+        )
+
+    @cached_property
+    def orders(self):
+        return self._order_plan()
+
+    @cached_property
+    def order_amplitudes(self):
+        # Single-sided peak amplitude (g), max over the ±1 bin neighbourhood
+        mag = np.abs(self.spectrum[self.orders.harmonic_idx])
+        return mag.max(axis=-1) * 2.0 / self.acc.size
+
+    @cached_property
+    def spectrum(self):
+        spectrum, _ = rfft_spectrum(self.acc, self.fs)
+        return spectrum
+
+    def band_energy(self, band):
+        low, high = band
+
+        if self.shared_spectrum:
+            return band_energy_from_spectrum(
+                self.spectrum, self.acc.size, self.fs, low, high
+            )
+
+        return bandpass_energy(self.acc, self.fs, low, high)
+
+    @cached_property
+    def envelope(self):
+        if self.shared_spectrum:
+            return envelope_from_spectrum(self.acc, self.spectrum)
+
+        return np.abs(hilbert(self.acc))
+
+    @cached_property
+    def velocity_m_s(self):
+        if self._velocity_band:
+            # Long decimated window: band-limit, else offsets ramp up
+            return velocity_from_spectrum(
+                self.spectrum, self.acc.size, self.fs, *self._velocity_band
+            )
+
+        # acc[g] → m/s² → integrate (float64 accumulator) → detrend
+        acc_ms2 = self.acc * 9.80665
+        vel_m_s = np.cumsum(acc_ms2, dtype=np.float64) / self.fs
+        return detrend(vel_m_s, type="constant")
+
+
+# =========================================================
+# FEATURE REGISTRY
+# =========================================================
+# fn(ctx, values) → float; `values` holds the declared deps.
+L1Feature = namedtuple("L1Feature", ["deps", "fn"])
+
+
+def _acc_hf_rms(ctx, values):
+    # Convert energy → RMS-like magnitude
+    hf_energy = ctx.band_energy(HF_BAND)
+    return np.sqrt(hf_energy / ctx.acc.size) if hf_energy > 0 else 0.0
+
+
+def _crest_factor(ctx, values):
+    acc_rms = values["acc_rms_g"]
+    return values["acc_peak_g"] / acc_rms if acc_rms > 0 else 0.0
+
+
+def _order_amplitude(i):
+    return lambda ctx, values: ctx.order_amplitudes[i]
+
+
+def _gear_energy(idx_name):
+    def fn(ctx, values):
+        # Not a gearbox point → no mesh, no spectrum needed
+        if ctx.orders.mesh_idx is None:
+            return 0.0
+        idx = getattr(ctx.orders, idx_name)
+        return np.sum(np.abs(ctx.spectrum[idx]) ** 2, dtype=np.float64)
+    return fn
+
+
+L1_FEATURES = {
+    # --- SCADA / FSM ---
+    "acc_rms_g": L1Feature((), lambda ctx, v: rms(ctx.acc)),
+    "acc_peak_g": L1Feature((), lambda ctx, v: peak_to_peak(ctx.acc) / 2.0),
+    "acc_hf_rms_g": L1Feature((), _acc_hf_rms),
+    "crest_factor": L1Feature(("acc_rms_g", "acc_peak_g"), _crest_factor),
+    "envelope_rms": L1Feature((), lambda ctx, v: rms(ctx.envelope)),
+    "overall_vel_rms_mm_s": L1Feature(
+        (), lambda ctx, v: rms(ctx.low.velocity_m_s) * 1000.0
+    ),
+
+    # --- ENGINEERING SUPPORT ---
+    "energy_low": L1Feature((), lambda ctx, v: ctx.low.band_energy(LOW_BAND)),
+    "energy_high": L1Feature((), lambda ctx, v: ctx.band_energy(HIGH_BAND)),
+
+    # --- ORDER-BASED (RPM) ---
+    "order_1x_g": L1Feature((), _order_amplitude(0)),
+    "order_2x_g": L1Feature((), _order_amplitude(1)),
+    "order_3x_g": L1Feature((), _order_amplitude(2)),
+    "gear_mesh_energy": L1Feature((), _gear_energy("mesh_idx")),
+    "gear_sideband_energy": L1Feature((), _gear_energy("sideband_idx")),
+}
+
+
+def resolve_features(names=None):
+    """
+    Evaluation order for the requested features (deps first).
+    names=None → every registered feature.
+    compute_phi()'s inputs are always added: a profile that skipped
+    them would cap PHI and never reach WARNING / ALARM.
+    """
+    if names is None:
+        return list(L1_FEATURES)
+
+    order = []
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in L1_FEATURES:
+            raise KeyError(f"Unknown L1 feature: {name}")
+        for dep in L1_FEATURES[name].deps:
+            visit(dep)
+        order.append(name)
+
+    for name in (*names, *PHI_INPUTS):
+        visit(name)
+
+    return order
+
+
+def resolve_feature_profile(profiles: dict, name: str | None):
+    """
+    Feature list of a config.yaml feature profile.
+    "all" (or no profile) → None (every feature).
+    """
+    if not name:
+        return None
+
+    if name not in profiles:
+        raise KeyError(f"Unknown L1 feature profile: {name}")
+
+    features = profiles[name]
+    return None if features == "all" else list(features)
+
+
 class L1FeaturePipeline:
     """
     L1 Feature Pipeline (FINAL – LOCKED)
@@ -19,18 +260,124 @@ class L1FeaturePipeline:
     - Physically meaningful units
     - ISO / SCADA / FSM safe
     - Deterministic & auditable
+
+    shared_spectrum:
+        True  → one rFFT per window, reused for every band energy
+                and for the envelope (default, edge CPU budget)
+        False → legacy path (one FFT per band + scipy hilbert)
+
+    features:
+        None  → every feature in L1_FEATURES
+        list  → only these (+ their deps + compute_phi inputs);
+                intermediates such as the spectrum, envelope or
+                velocity signal are only computed when a selected
+                feature needs them. Features not computed are
+                reported as 0.0 (never NULL).
+
+    gear_teeth:
+        Gear-mesh order of gearbox points (mesh = teeth × running speed);
+        None → gear features stay 0.0.
+    rpm_tolerance:
+        Relative rpm change that triggers a rebuild of the order bins.
+
+    dtype:
+        float64 (default) or float32 → window, FFT and intermediates in
+        single precision; energies, RMS and the velocity integration
+        still accumulate in float64.
+
+    multirate_factor:
+        None → single rate. D → new samples are also low-pass filtered
+        and decimated by D into a per-point ring of multirate_window
+        samples; energy_low and overall_vel_rms_mm_s are computed on
+        that longer, D× finer-resolution window once it is full.
+        compute_batch() stays single rate.
+        The decimated velocity is band-limited to VELOCITY_BAND; the
+        single-rate one is broadband (cumsum + mean removal). Values
+        match across modes only for content inside that band — DC
+        offsets and sub-10 Hz motion raise the single-rate value only.
     """
 
-    def __init__(self, fs: float, rpm: float):
+    def __init__(
+        self,
+        fs: float,
+        rpm: float,
+        shared_spectrum: bool = True,
+        features=None,
+        gear_teeth=None,
+        rpm_tolerance: float = 0.005,
+        dtype="float64",
+        multirate_factor=None,
+        multirate_window=4096,
+    ):
         self.fs = fs
         self.rpm = rpm
+        self.shared_spectrum = shared_spectrum
+        self.features = resolve_features(features)
+        self.gear_teeth = gear_teeth
+        self.rpm_tolerance = rpm_tolerance
+        self.dtype = np.dtype(dtype)
+
+        self._order_plan = None
+
+        self.multirate = None
+        if multirate_factor:
+            self.multirate = MultiRateStage(
+                fs,
+                multirate_factor,
+                window_size=multirate_window,
+                dtype=self.dtype,
+            )
+
+    def _orders_for(self, n):
+        plan = self._order_plan
+
+        if (
+            plan is None
+            or plan.n != n
+            or plan.fs != self.fs
+            or abs(self.rpm - plan.rpm) > self.rpm_tolerance * plan.rpm
+        ):
+            plan = _OrderPlan(n, self.fs, self.rpm, self.gear_teeth)
+            self._order_plan = plan
+
+        return plan
 
-    def compute(self, window):
+    def _feed_multirate(self, acc, new_samples, restart=False):
+        """
+        Push only the samples not seen before into the decimator.
+        restart (stream reset upstream) or new_samples > window
+        (samples were skipped) → restart the stage on this window.
+        """
+        if new_samples is None:
+            new_samples = acc.size
+
+        if restart or new_samples > acc.size:
+            self.multirate.reset()
+            new_samples = acc.size
+
+        if new_samples > 0:
+            self.multirate.feed(acc[acc.size - new_samples:])
+
+    def _low_rate_window(self):
+        if self.multirate is None or not self.multirate.is_ready():
+            return None
+
+        return self.multirate.window(), self.multirate.fs_low
+
+    def compute(self, window, rpm=None, new_samples=None, restart=False):
         """
         window: np.ndarray
         Acceleration signal in g
+        rpm: measured running speed of this window (optional)
+        new_samples: samples not present in the previous window
+                     (hop); None → whole window is new
+        restart: history before this window was dropped (gap reset /
+                 stream restart) → multi-rate stage starts over
         """
-        acc = np.asarray(window, dtype=float)
+        if rpm:
+            self.rpm = rpm
+
+        acc = np.asarray(window, dtype=self.dtype)
 
         # -----------------------------
         # BASIC SIGNAL GUARD
@@ -38,76 +385,152 @@ class L1FeaturePipeline:
         if acc.size == 0:
             return self._zero_features()
 
-        # -----------------------------
-        # CORE ACC FEATURES
-        # -----------------------------
-        acc_rms = rms(acc)
-        acc_peak = peak_to_peak(acc) / 2.0
+        if self.multirate is not None:
+            self._feed_multirate(acc, new_samples, restart)
 
         # -----------------------------
-        # HIGH-FREQUENCY RMS (BEARING)
+        # DEMAND-DRIVEN EVALUATION
         # -----------------------------
-        hf_energy = bandpass_energy(
+        ctx = _WindowContext(
             acc,
             self.fs,
-            low=3000,
-            high=10000,
+            self.shared_spectrum,
+            order_plan=lambda: self._orders_for(acc.size),
+            low_rate=self._low_rate_window,
+        )
+        values = {}
+
+        for name in self.features:
+            values[name] = L1_FEATURES[name].fn(ctx, values)
+
+        result = self._zero_features()
+        result.update({name: float(v) for name, v in values.items()})
+        result["timestamp"] = time.time()
+
+        return result
+
+    # =============================
+    # BATCH (FLEET) COMPUTATION
+    # =============================
+    def compute_batch(self, windows, fs=None, rpm=None, gear_teeth=None):
+        """
+        windows: (n_windows, window_size) acceleration in g
+        fs, rpm, gear_teeth: scalar or per-row arrays
+                             (default: this pipeline's; teeth 0 → no gear)
+
+        Same features as compute(), returned column-wise:
+            {feature_name: np.ndarray (n_windows,)}
+        One axis-wise FFT / cumsum / detrend / RMS pass for all rows.
+        Always computes the full feature set (no per-point profile).
+        """
+        acc = np.atleast_2d(np.asarray(windows, dtype=self.dtype))
+        n_windows, n = acc.shape
+
+        fs = np.broadcast_to(
+            np.asarray(self.fs if fs is None else fs, dtype=float),
+            (n_windows,),
+        )
+        rpm = np.broadcast_to(
+            np.asarray(self.rpm if rpm is None else rpm, dtype=float),
+            (n_windows,),
+        )
+        gear_teeth = np.broadcast_to(
+            np.nan_to_num(
+                np.asarray(
+                    self.gear_teeth if gear_teeth is None else gear_teeth,
+                    dtype=float,
+                )
+            ),
+            (n_windows,),
         )
 
-        # Convert energy → RMS-like magnitude
-        acc_hf_rms = np.sqrt(hf_energy / acc.size) if hf_energy > 0 else 0.0
+        if n_windows == 0 or n == 0:
+            return self._zero_features_batch(n_windows)
 
         # -----------------------------
-        # CREST FACTOR
+        # CORE ACC FEATURES
         # -----------------------------
-        crest_factor = acc_peak / acc_rms if acc_rms > 0 else 0.0
+        acc_rms = rms_batch(acc)
+        acc_peak = peak_to_peak_batch(acc) / 2.0
 
         # -----------------------------
-        # ENVELOPE RMS (BEARING DEFECT)
+        # SPECTRAL FEATURES (ONE rFFT)
         # -----------------------------
-        envelope = np.abs(hilbert(acc))
-        envelope_rms = rms(envelope)
+        spectrum = rfft_spectrum_batch(acc)
+
+        hf_energy = band_energy_batch(spectrum, n, fs, *HF_BAND)
+        energy_low = band_energy_batch(spectrum, n, fs, *LOW_BAND)
+        energy_high = band_energy_batch(spectrum, n, fs, *HIGH_BAND)
+
+        acc_hf_rms = np.sqrt(np.maximum(hf_energy, 0.0) / n)
+
+        crest_factor = np.divide(
+            acc_peak,
+            acc_rms,
+            out=np.zeros(n_windows),
+            where=acc_rms > 0,
+        )
+
+        envelope_rms = rms_batch(envelope_batch(acc, spectrum))
 
         # -----------------------------
         # VELOCITY RMS (ISO 10816 / 20816)
-        # acc[g] → m/s² → integrate → detrend → mm/s
         # -----------------------------
-        acc_ms2 = acc * 9.80665
-        vel_m_s = np.cumsum(acc_ms2) / self.fs
-        vel_m_s = detrend(vel_m_s, type="constant")
+        vel_m_s = np.cumsum(acc * 9.80665, axis=1, dtype=np.float64)
+        vel_m_s /= fs[:, None]
+        vel_m_s = detrend(vel_m_s, axis=1, type="constant")
 
-        overall_vel_rms_mm_s = rms(vel_m_s) * 1000.0
+        overall_vel_rms_mm_s = rms_batch(vel_m_s) * 1000.0
 
         # -----------------------------
-        # SUPPORTING ENERGY FEATURES
+        # ORDER-BASED (PER-ROW RPM)
         # -----------------------------
-        energy_low = bandpass_energy(
-            acc,
-            self.fs,
-            low=10,
-            high=100,
+        power = np.abs(spectrum)
+        fr = rpm[:, None] / 60.0
+
+        harmonic_idx = order_bins(n, fs[:, None], fr * np.asarray(ORDERS))
+        order_amp = _gather_rows(power, harmonic_idx).max(axis=-1) * 2.0 / n
+
+        power **= 2
+        mesh_hz = gear_teeth[:, None] * fr
+        mesh_idx = order_bins(n, fs[:, None], mesh_hz)
+        sideband_idx = order_bins(
+            n, fs[:, None], mesh_hz + fr * np.asarray(GEAR_SIDEBANDS)
         )
 
-        energy_high = bandpass_energy(
-            acc,
-            self.fs,
-            low=1000,
-            high=5000,
+        has_gear = gear_teeth > 0
+        gear_mesh_energy = np.where(
+            has_gear,
+            _gather_rows(power, mesh_idx).sum(axis=(1, 2), dtype=np.float64),
+            0.0,
         )
+        gear_sideband_energy = np.where(
+            has_gear,
+            _gather_rows(power, sideband_idx).sum(axis=(1, 2), dtype=np.float64),
+            0.0,
+        )
+
+        columns = {
+            "acc_rms_g": acc_rms,
+            "acc_peak_g": acc_peak,
+            "acc_hf_rms_g": acc_hf_rms,
+            "crest_factor": crest_factor,
+            "envelope_rms": envelope_rms,
+            "overall_vel_rms_mm_s": overall_vel_rms_mm_s,
+            "energy_low": energy_low,
+            "energy_high": energy_high,
+            "order_1x_g": order_amp[:, 0],
+            "order_2x_g": order_amp[:, 1],
+            "order_3x_g": order_amp[:, 2],
+            "gear_mesh_energy": gear_mesh_energy,
+            "gear_sideband_energy": gear_sideband_energy,
+            "timestamp": np.full(n_windows, time.time()),
+        }
 
+        # Output columns are float64 regardless of compute dtype
         return {
-            # --- SCADA / FSM ---
-            "acc_rms_g": float(acc_rms),
-            "acc_peak_g": float(acc_peak),
-            "acc_hf_rms_g": float(acc_hf_rms),
-            "crest_factor": float(crest_factor),
-            "envelope_rms": float(envelope_rms),
-            "overall_vel_rms_mm_s": float(overall_vel_rms_mm_s),
-
-            # --- ENGINEERING SUPPORT ---
-            "energy_low": float(energy_low),
-            "energy_high": float(energy_high),
-            "timestamp": time.time(),
+            name: np.asarray(col, dtype=np.float64)
+            for name, col in columns.items()
         }
 
     # =============================
@@ -123,6 +546,26 @@ class L1FeaturePipeline:
             "overall_vel_rms_mm_s": 0.0,
             "energy_low": 0.0,
             "energy_high": 0.0,
+            "order_1x_g": 0.0,
+            "order_2x_g": 0.0,
+            "order_3x_g": 0.0,
+            "gear_mesh_energy": 0.0,
+            "gear_sideband_energy": 0.0,
         }
 
+    def _zero_features_batch(self, n_windows: int):
+        columns = {
+            name: np.zeros(n_windows)
+            for name in self._zero_features()
+        }
+        columns["timestamp"] = np.full(n_windows, time.time())
+        return columns
 
+
+def _gather_rows(values, idx):
+    """
+    values (rows, bins), idx (rows, ...) → values[row, idx[row, ...]]
+    """
+    rows = values.shape[0]
+    flat = np.take_along_axis(values, idx.reshape(rows, -1), axis=1)
+    return flat.reshape(idx.shape)
@@ -0,0 +1,74 @@
+import numpy as np
+from scipy.signal import cheby1, sosfilt, sosfilt_zi
+
+from core.ring_buffer import PointRing
+
+
+class MultiRateStage:
+    """
+    Streaming decimator for low-frequency L1 features.
+
+    - Anti-alias: Chebyshev-I, order 8, 0.05 dB ripple, cutoff at
+      0.8 × new Nyquist (same design as scipy.signal.decimate)
+    - Filter state carried across chunks (no edge transients per window)
+    - Decimated samples kept in their own ring per point
+
+    With factor D the decimated window covers D× more time for the same
+    number of samples → D× finer frequency resolution at the low end
+    and the same FFT size.
+    """
+
+    def __init__(self, fs: float, factor: int, window_size=4096, dtype=np.float64):
+        if factor < 2:
+            raise ValueError(f"Decimation factor must be >= 2: {factor}")
+
+        self.fs = fs
+        self.factor = int(factor)
+        self.fs_low = fs / self.factor
+        self.dtype = np.dtype(dtype)
+
+        self._sos = cheby1(8, 0.05, 0.8 / self.factor, output="sos")
+        self._zi = None
+        self._phase = 0   # samples to skip before the next kept sample
+
+        self.ring = PointRing(window_size, self.dtype)
+
+    # =========================================================
+    # STREAM
+    # =========================================================
+    def feed(self, samples):
+        """
+        Filter + decimate new full-rate samples into the decimated ring.
+        """
+        samples = np.asarray(samples, dtype=np.float64).ravel()
+
+        if samples.size == 0:
+            return
+
+        if self._zi is None:
+            # Start settled on the first sample (no step transient)
+            self._zi = sosfilt_zi(self._sos) * samples[0]
+
+        filtered, self._zi = sosfilt(self._sos, samples, zi=self._zi)
+
+        kept = filtered[self._phase::self.factor]
+        self._phase = (self._phase - samples.size) % self.factor
+
+        self.ring.write(kept.astype(self.dtype, copy=False))
+
+    def reset(self):
+        """
+        Drop filter state and history (e.g. after a gap in the stream).
+        """
+        self._zi = None
+        self._phase = 0
+        self.ring.reset()
+
+    # =========================================================
+    # WINDOW
+    # =========================================================
+    def is_ready(self) -> bool:
+        return self.ring.count >= self.ring.size
+
+    def window(self):
+        return self.ring.window()
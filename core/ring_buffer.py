@@ -1,5 +1,92 @@
-from collections import deque
-import copy
+import numpy as np
+
+
+class PointRing:
+    """
+    Preallocated circular float array for one asset + point.
+    """
+
+    __slots__ = (
+        "size", "data", "pos", "count", "pending",
+        "next_index", "next_seq", "t_end", "since_gap", "restarted",
+    )
+
+    def __init__(self, size: int, dtype=np.float64):
+        self.size = size
+        self.data = np.zeros(size, dtype=dtype)
+        self.pos = 0      # next write index
+        self.count = 0    # valid samples (<= size)
+        self.pending = 0  # samples since last evaluated window
+
+        # Stream continuity (RingBufferManager sequence tracking)
+        self.next_index = None  # expected sample_index of the next chunk
+        self.next_seq = None    # expected seq of the next chunk
+        self.t_end = None       # event time just after the newest sample
+        self.since_gap = None   # samples written since the last gap
+        self.restarted = True   # no history before the next window
+
+    def write(self, samples):
+        size = self.size
+        n = samples.size
+
+        if n == 0:
+            return
+
+        self.pending += n
+
+        if self.since_gap is not None:
+            self.since_gap += n
+            if self.since_gap >= size:
+                self.since_gap = None   # gap has left the window
+
+        if n >= size:
+            # Chunk covers the whole window → keep the newest samples
+            self.data[:] = samples[-size:]
+            self.pos = 0
+            self.count = size
+            return
+
+        first = min(size - self.pos, n)
+        self.data[self.pos:self.pos + first] = samples[:first]
+
+        rest = n - first
+        if rest:
+            self.data[:rest] = samples[first:]
+
+        self.pos = (self.pos + n) % size
+        self.count = min(self.count + n, size)
+
+    def window(self):
+        """
+        Oldest → newest samples; read-only view or one copy on wrap.
+        """
+        if self.count < self.size:
+            window = self.data[:self.count]
+        elif self.pos == 0:
+            window = self.data
+        else:
+            # Wrapped → one memcpy into a fresh contiguous array
+            return np.concatenate((self.data[self.pos:], self.data[:self.pos]))
+
+        window = window.view()
+        window.flags.writeable = False
+        return window
+
+    def reset(self):
+        self.pos = 0
+        self.count = 0
+        self.pending = 0
+        self.since_gap = None
+        self.restarted = True
+
+
+# Sequence check results (RingBufferManager.append)
+SEQ_OK = "ok"
+SEQ_GAP = "gap"
+SEQ_DUPLICATE = "duplicate"
+SEQ_RESTART = "restart"
+
+GAP_POLICIES = ("reset", "flag")
 
 
 class RingBufferManager:
@@ -10,18 +97,158 @@ class RingBufferManager:
     - Fixed window size
     - Safe against malformed payload
     - Backward compatible (add() alias)
+
+    Storage:
+    - One contiguous NumPy array per (asset, point), allocated once
+      (window_size × 8 B for float64, × 4 B for float32)
+    - append() is a vectorized slice write (at most two)
+    - get_window() returns a read-only view when the window is
+      contiguous, or a single copy when it wraps around
+
+    Hop scheduling:
+    - hop_size = new samples required between two evaluations
+      (window_size // 2 → 50 % overlap, window_size → no overlap)
+    - None → legacy behaviour, every append makes a full window ready
+    - get_window() consumes the pending hop (requeue() hands it back
+      when the window could not be evaluated)
+
+    Sequence / gap tracking (per point, first match wins):
+    - "sample_index": index of the chunk's first sample (exact; partly
+      overlapping chunks are trimmed to their new samples)
+    - "seq": chunk counter, +1 per chunk
+    - "timestamp" (only with timestamp_gaps): event time of the chunk's
+      first sample vs the end of the previous chunk, ± tolerance
+    Duplicate / late chunks are dropped. A gap either resets the point
+    (gap_policy="reset", the window refills from the new chunk) or is
+    kept and reported by window_has_gap() (gap_policy="flag").
+    A counter going back is a stream restart (sensor / simulator
+    reboot) instead of a duplicate when the chunk's timestamp is not
+    older than the end of the previous chunk, or (no timestamps) when
+    it goes back by more than restart_jump chunks: the point is reset
+    and the expected counters restart from the new chunk.
+    window_restarted() tells downstream stream state (multi-rate
+    decimator) that the history before the current window was dropped.
+    event_time() = payload timestamp + chunk duration of the newest chunk.
     """
 
-    def __init__(self, window_size=4096):
+    def __init__(
+        self,
+        window_size=4096,
+        dtype=np.float64,
+        hop_size=None,
+        fs=None,
+        gap_policy="reset",
+        timestamp_gaps=False,
+        timestamp_tolerance=0.005,
+        restart_jump=8,
+    ):
+        if gap_policy not in GAP_POLICIES:
+            raise ValueError(f"Unknown gap policy: {gap_policy}")
+
         self.window_size = window_size
+        self.dtype = np.dtype(dtype)
+        self.hop_size = max(1, int(hop_size)) if hop_size else 1
+        self.fs = fs
+        self.gap_policy = gap_policy
+        self.timestamp_gaps = timestamp_gaps
+        self.timestamp_tolerance = timestamp_tolerance
+        self.restart_jump = restart_jump
         self.buffers = {}
 
+        # Metrics
+        self.metrics = {
+            "chunks_gap": 0,
+            "chunks_duplicate": 0,
+            "chunks_restart": 0,
+            "windows_skipped": 0,
+            "samples_trimmed": 0,
+        }
+
+    @staticmethod
+    def resolve_hop(window_size, hop_size=None, overlap=None):
+        """
+        Hop size from config (raw.hop_size wins over raw.overlap).
+        overlap: fraction of the window shared by consecutive evaluations.
+        """
+        if hop_size:
+            return int(hop_size)
+
+        if overlap is not None:
+            if not 0.0 <= overlap < 1.0:
+                raise ValueError(f"raw.overlap must be in [0, 1): {overlap}")
+            return max(1, int(round(window_size * (1.0 - overlap))))
+
+        return None
+
     # =========================================================
     # INTERNAL
     # =========================================================
     def _key(self, asset, point):
         return f"{asset}:{point}"
 
+    def _check_sequence(self, ring, raw, n):
+        """
+        (status, skip): skip = leading samples already in the buffer.
+        Updates the ring's expected index / seq / end time.
+        """
+        status, skip = SEQ_OK, 0
+
+        index = raw.get("sample_index")
+        seq = raw.get("seq")
+        ts = raw.get("timestamp")
+        fs = raw.get("fs") or self.fs
+
+        # Counter went back but time moved on → the sender restarted
+        fresh = (
+            ts is not None and ring.t_end is not None
+            and ts >= ring.t_end - self.timestamp_tolerance
+        )
+
+        if index is not None:
+            index = int(index)
+            expected = ring.next_index
+
+            if expected is not None and index != expected:
+                if index > expected:
+                    status = SEQ_GAP
+                elif (fresh and index + n <= expected) or (
+                    expected - index > self.restart_jump * max(n, 1)
+                ):
+                    status = SEQ_RESTART
+                elif index + n <= expected:
+                    return SEQ_DUPLICATE, n
+                else:
+                    skip = expected - index
+
+            ring.next_index = index + n
+
+        elif seq is not None:
+            seq = int(seq)
+            expected = ring.next_seq
+
+            if expected is not None and seq != expected:
+                if seq < expected and (fresh or expected - seq > self.restart_jump):
+                    status = SEQ_RESTART
+                elif seq < expected:
+                    return SEQ_DUPLICATE, n
+                else:
+                    status = SEQ_GAP
+
+            ring.next_seq = seq + 1
+
+        elif self.timestamp_gaps and ts is not None and ring.t_end is not None:
+            drift = ts - ring.t_end
+
+            if drift < -self.timestamp_tolerance:
+                return SEQ_DUPLICATE, n
+            if drift > self.timestamp_tolerance:
+                status = SEQ_GAP
+
+        if ts is not None and fs:
+            ring.t_end = ts + n / fs
+
+        return status, skip
+
     # =========================================================
     # PUBLIC API
     # =========================================================
@@ -30,40 +257,158 @@ class RingBufferManager:
         Append raw acceleration data into ring buffer.
         Expected format:
         raw = {
-            "acceleration": [...]
+            "acceleration": [...],  # list or np.ndarray
+            "sample_index": int,    # optional, see class docstring
+            "seq": int,             # optional
+            "timestamp": float,     # optional, first sample (epoch s)
         }
+
+        Returns SEQ_OK / SEQ_GAP / SEQ_RESTART / SEQ_DUPLICATE (chunk
+        dropped), or None for an invalid payload.
         """
 
         if not raw or "acceleration" not in raw:
-            return  # ignore invalid payload safely
+            return None  # ignore invalid payload safely
+
+        try:
+            samples = np.asarray(raw["acceleration"], dtype=self.dtype).ravel()
+        except (TypeError, ValueError):
+            return None  # non-numeric payload
 
         key = self._key(asset, point)
 
         if key not in self.buffers:
-            self.buffers[key] = deque(maxlen=self.window_size)
+            self.buffers[key] = PointRing(self.window_size, self.dtype)
+
+        ring = self.buffers[key]
+        status, skip = self._check_sequence(ring, raw, samples.size)
+
+        if status == SEQ_DUPLICATE:
+            self.metrics["chunks_duplicate"] += 1
+            return status
+
+        if skip:
+            self.metrics["samples_trimmed"] += skip
+            samples = samples[skip:]
 
-        self.buffers[key].extend(raw["acceleration"])
+        if status == SEQ_RESTART:
+            self.metrics["chunks_restart"] += 1
+            ring.reset()
+
+        elif status == SEQ_GAP:
+            self.metrics["chunks_gap"] += 1
+
+            if self.gap_policy == "reset":
+                ring.reset()
+            else:
+                ring.since_gap = 0
+
+        ring.write(samples)
+        return status
 
     # 🔥 BACKWARD COMPATIBILITY
     def add(self, asset, point, raw):
         """Alias for append() to prevent breaking old code."""
-        self.append(asset, point, raw)
+        return self.append(asset, point, raw)
 
     def is_window_ready(self, asset, point):
+        """
+        Full window AND at least one hop of new samples since the
+        last get_window().
+        """
         key = self._key(asset, point)
-        return key in self.buffers and len(self.buffers[key]) >= self.window_size
+
+        if key not in self.buffers:
+            return False
+
+        ring = self.buffers[key]
+        return ring.count >= self.window_size and ring.pending >= self.hop_size
+
+    def pending_samples(self, asset, point):
+        """
+        New samples since the last evaluated window.
+        """
+        ring = self.buffers.get(self._key(asset, point))
+        return ring.pending if ring else 0
+
+    def event_time(self, asset, point):
+        """
+        Event time just after the newest buffered sample (None when
+        payloads carry no timestamp).
+        """
+        ring = self.buffers.get(self._key(asset, point))
+        return ring.t_end if ring else None
+
+    def window_has_gap(self, asset, point):
+        """
+        True when the current window spans a detected gap
+        (gap_policy="flag" only; "reset" never keeps one).
+        """
+        ring = self.buffers.get(self._key(asset, point))
+        return bool(ring and ring.since_gap is not None and ring.since_gap < ring.count)
+
+    def window_restarted(self, asset, point):
+        """
+        True when the point was reset (gap / stream restart / clear())
+        since the last get_window() → downstream stream state restarts.
+        """
+        ring = self.buffers.get(self._key(asset, point))
+        return bool(ring and ring.restarted)
 
     def get_window(self, asset, point):
+        """
+        Oldest → newest samples of the buffer.
+        Resets the hop counter and the restart flag
+        (window counts as evaluated).
+
+        NOTE:
+        - The result may be a read-only view on the ring storage;
+          it is only valid until the next append() for this point.
+          Callers that keep it must copy it.
+        """
         key = self._key(asset, point)
 
         if key not in self.buffers:
             return None
 
-        return copy.deepcopy(list(self.buffers[key]))
+        ring = self.buffers[key]
+
+        # Hops that became ready without their own evaluation
+        # (after a reset the first one is ready once the window is full)
+        if self.hop_size > 1:
+            ready = ring.pending - (self.window_size if ring.restarted else 0)
+            if ready >= self.hop_size:
+                self.metrics["windows_skipped"] += ready // self.hop_size - (
+                    0 if ring.restarted else 1
+                )
+
+        ring.pending = 0
+        ring.restarted = False
+
+        return ring.window()
+
+    def requeue(self, asset, point, new_samples, restarted=False):
+        """
+        Undo get_window() for a window that was never evaluated
+        (compute queue full): its new samples count as pending again,
+        so the next window's new_samples covers them (more than a
+        window → downstream stream state restarts).
+        """
+        ring = self.buffers.get(self._key(asset, point))
+        if ring is None:
+            return
+
+        ring.pending += new_samples
+        ring.restarted = ring.restarted or restarted
 
     def clear(self, asset, point):
         key = self._key(asset, point)
         if key in self.buffers:
-            self.buffers[key].clear()
-
+            self.buffers[key].reset()
 
+    def get_status(self):
+        return {
+            "points": len(self.buffers),
+            "gap_policy": self.gap_policy,
+            "metrics": dict(self.metrics),
+        }
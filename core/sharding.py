@@ -0,0 +1,14 @@
+import zlib
+
+
+def shard_for(site: str, asset: str, n_shards: int) -> int:
+    """
+    Stable shard index for a site/asset.
+
+    crc32 (not hash()) so every process / restart agrees; all points
+    of one asset land on the same shard, keeping asset aggregation local.
+    """
+    if n_shards <= 1:
+        return 0
+
+    return zlib.crc32(f"{site}/{asset}".encode("utf-8")) % n_shards
@@ -1,19 +1,39 @@
+from functools import lru_cache
+
 import numpy as np
+from scipy import fft as sp_fft
+
+
+# Bounded: one entry per (n, fs[, band]) seen; points with their own
+# sampling rate add entries, least recently used ones are evicted.
+FFT_PLAN_CACHE_SIZE = 256
+
+
+def as_float_array(signal):
+    """
+    float32 / float64 input is kept as-is (float32 compute mode);
+    anything else (lists, ints) becomes float64.
+    """
+    signal = np.asarray(signal)
+    if signal.dtype in (np.float32, np.float64):
+        return signal
+    return signal.astype(np.float64)
 
 
 def rms(signal):
     """
     Root Mean Square
     """
-    signal = np.asarray(signal, dtype=float)
-    return float(np.sqrt(np.mean(signal ** 2)))
+    signal = as_float_array(signal)
+    # float64 accumulator, also for float32 input
+    return float(np.sqrt(np.mean(np.square(signal), dtype=np.float64)))
 
 
 def peak_to_peak(signal):
     """
     Peak-to-Peak amplitude
     """
-    signal = np.asarray(signal, dtype=float)
+    signal = as_float_array(signal)
     return float(np.max(signal) - np.min(signal))
 
 
@@ -24,17 +44,43 @@ def bandpass_energy(signal, fs, low, high):
     - Used for trend & relative comparison
     - NOT absolute vibration severity
     """
-    signal = np.asarray(signal, dtype=float)
+    signal = as_float_array(signal)
 
-    fft_vals = np.fft.rfft(signal)
-    freqs = np.fft.rfftfreq(len(signal), 1 / fs)
+    fft_vals = sp_fft.rfft(signal)
+    bins = band_bins(len(signal), fs, low, high)
 
-    mask = (freqs >= low) & (freqs <= high)
-    energy = np.sum(np.abs(fft_vals[mask]) ** 2)
+    energy = np.sum(np.abs(fft_vals[bins]) ** 2, dtype=np.float64)
 
     return float(energy)
 
 
+# =========================================================
+# FFT PLAN CACHE (FREQUENCY GRID + BAND BIN SLICES)
+# =========================================================
+@lru_cache(maxsize=FFT_PLAN_CACHE_SIZE)
+def rfft_freqs(n, fs):
+    """
+    Cached np.fft.rfftfreq grid (read-only, shared).
+    """
+    freqs = np.fft.rfftfreq(n, 1 / fs)
+    freqs.flags.writeable = False
+    return freqs
+
+
+@lru_cache(maxsize=FFT_PLAN_CACHE_SIZE)
+def band_bins(n, fs, low, high):
+    """
+    Contiguous rFFT bin slice for low <= f <= high.
+    Same bins as the boolean mask on rfftfreq (grid is ascending).
+    """
+    freqs = rfft_freqs(n, fs)
+
+    start = int(np.searchsorted(freqs, low, side="left"))
+    stop = int(np.searchsorted(freqs, high, side="right"))
+
+    return slice(start, stop)
+
+
 def velocity_rms_mm_s(acc_signal_g, fs):
     """
     Overall Velocity RMS (mm/s)
@@ -64,3 +110,153 @@ def velocity_rms_mm_s(acc_signal_g, fs):
 
     return float(np.sqrt(np.mean(vel_mm_s ** 2)))
 
+
+
+# =========================================================
+# SHARED-SPECTRUM HELPERS (ONE rFFT PER WINDOW)
+# =========================================================
+def rfft_spectrum(signal, fs):
+    """
+    One-sided spectrum + frequency grid of a window.
+    Computed once and shared by every band / envelope helper below.
+    """
+    signal = as_float_array(signal)
+
+    spectrum = sp_fft.rfft(signal)
+    freqs = rfft_freqs(len(signal), fs)
+
+    return spectrum, freqs
+
+
+def band_energy_from_spectrum(spectrum, n, fs, low, high):
+    """
+    Band energy from a precomputed rFFT of an n-sample window.
+    Same result as bandpass_energy() without a new FFT.
+    Accumulated in float64 (float32 spectra included).
+    """
+    bins = band_bins(n, fs, low, high)
+    energy = np.sum(np.abs(spectrum[bins]) ** 2, dtype=np.float64)
+
+    return float(energy)
+
+
+def envelope_from_spectrum(signal, spectrum):
+    """
+    Analytic-signal envelope |x + j·H{x}| from a precomputed rFFT.
+
+    The Hilbert transform is the inverse of (-j · X) over the positive
+    bins with DC and Nyquist removed, so only one real inverse FFT is
+    needed (scipy.signal.hilbert runs a full complex FFT + IFFT).
+    """
+    signal = as_float_array(signal)
+    n = signal.size
+
+    h_spec = -1j * spectrum
+    h_spec[0] = 0.0
+    if n % 2 == 0:
+        h_spec[-1] = 0.0
+
+    hilbert_x = sp_fft.irfft(h_spec, n=n)
+
+    return np.sqrt(signal ** 2 + hilbert_x ** 2)
+
+
+def velocity_from_spectrum(spectrum, n, fs, low, high):
+    """
+    Band-limited velocity (m/s) from a precomputed rFFT of acceleration (g).
+
+    Integrated in the frequency domain, V(f) = A(f) / (j·2πf), over
+    low <= f <= high only (low > 0): DC offsets and sub-band content
+    never turn into a velocity ramp, whatever the window length.
+    """
+    bins = band_bins(n, fs, low, high)
+    freqs = rfft_freqs(n, fs)[bins]
+
+    vel_spec = np.zeros(spectrum.shape[-1], dtype=np.complex128)
+    vel_spec[bins] = spectrum[bins] * 9.80665 / (2j * np.pi * freqs)
+
+    return sp_fft.irfft(vel_spec, n=n)
+
+
+# =========================================================
+# BATCH HELPERS (ROW = ONE WINDOW, AXIS-WISE)
+# =========================================================
+def rms_batch(signals):
+    """
+    Row-wise RMS of a (n_windows, n) array
+    """
+    signals = as_float_array(signals)
+    return np.sqrt(np.mean(np.square(signals), axis=-1, dtype=np.float64))
+
+
+def peak_to_peak_batch(signals):
+    """
+    Row-wise Peak-to-Peak amplitude
+    """
+    signals = as_float_array(signals)
+    return np.max(signals, axis=-1) - np.min(signals, axis=-1)
+
+
+def rfft_spectrum_batch(signals):
+    """
+    Row-wise rFFT → (n_windows, n//2+1)
+    """
+    signals = as_float_array(signals)
+    return sp_fft.rfft(signals, axis=-1)
+
+
+def band_energy_batch(spectrum, n, fs, low, high):
+    """
+    Row-wise band energy from a batch spectrum.
+
+    fs: (n_windows,) sampling rates; rows sharing a rate share one
+    cached bin slice (usually a single group for the whole fleet).
+    """
+    fs = np.asarray(fs, dtype=float)
+    energy = np.empty(spectrum.shape[0])
+
+    for rate in np.unique(fs):
+        rows = fs == rate
+        bins = band_bins(n, float(rate), low, high)
+        energy[rows] = np.sum(
+            np.abs(spectrum[rows, bins]) ** 2, axis=-1, dtype=np.float64
+        )
+
+    return energy
+
+
+def envelope_batch(signals, spectrum):
+    """
+    Row-wise analytic-signal envelope (see envelope_from_spectrum)
+    """
+    signals = as_float_array(signals)
+    n = signals.shape[-1]
+
+    h_spec = -1j * spectrum
+    h_spec[..., 0] = 0.0
+    if n % 2 == 0:
+        h_spec[..., -1] = 0.0
+
+    hilbert_x = sp_fft.irfft(h_spec, n=n, axis=-1)
+
+    return np.sqrt(signals ** 2 + hilbert_x ** 2)
+
+
+# =========================================================
+# ORDER (RPM-SYNCHRONOUS) BIN INDEXES
+# =========================================================
+def order_bins(n, fs, freqs_hz, spread=1):
+    """
+    Nearest rFFT bin (± spread neighbours) of each target frequency.
+
+    freqs_hz: (..., k) target frequencies, fs broadcastable to it
+    Returns int indexes (..., k, 2*spread+1), clipped to the grid.
+    Computed once per (rpm, fs, n), then used as a plain gather.
+    """
+    freqs_hz = np.asarray(freqs_hz, dtype=float)
+    fs = np.asarray(fs, dtype=float)
+
+    centre = np.rint(freqs_hz * n / fs).astype(np.intp)
+    idx = centre[..., None] + np.arange(-spread, spread + 1)
+
+    return np.clip(idx, 0, n // 2)
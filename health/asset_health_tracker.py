@@ -0,0 +1,111 @@
+import heapq
+import itertools
+
+
+class _AssetEntry:
+    """
+    Point health of one asset + max-heap on phi (lazy deletion).
+    """
+
+    __slots__ = ("points", "heap")
+
+    def __init__(self):
+        self.points = {}    # point → (order, version, health dict)
+        self.heap = []      # (-phi, order, version, point)
+
+
+class AssetHealthTracker:
+    """
+    Incremental worst-point asset health, keyed by (site, asset).
+
+    - update() is O(log points of the asset), independent of fleet size
+    - Max-heap on phi with lazy deletion: superseded entries are skipped
+      when they reach the top, the heap is rebuilt when stale entries
+      outnumber live ones
+    - Ties resolve to the point seen first, so results are identical to
+      compute_asset_health() over the points in insertion order
+    """
+
+    def __init__(self):
+        self._assets = {}
+        self._order = itertools.count()
+        self._version = itertools.count()
+
+    # =========================================================
+    # UPDATE
+    # =========================================================
+    def update(self, site: str, asset: str, point: str, health: dict) -> dict:
+        """
+        Store a point's health ({phi, state, point_id}) and return the
+        asset health (compute_asset_health() format).
+        """
+        entry = self._assets.get((site, asset))
+        if entry is None:
+            entry = _AssetEntry()
+            self._assets[(site, asset)] = entry
+
+        previous = entry.points.get(point)
+        order = previous[0] if previous is not None else next(self._order)
+        version = next(self._version)
+
+        entry.points[point] = (order, version, health)
+        heapq.heappush(entry.heap, (-health["phi"], order, version, point))
+
+        if len(entry.heap) > 2 * len(entry.points) + 8:
+            self._rebuild(entry)
+
+        return self._worst(entry)
+
+    def remove(self, site: str, asset: str, point: str):
+        entry = self._assets.get((site, asset))
+        if entry is None or entry.points.pop(point, None) is None:
+            return
+
+        # Heap entries of the point become stale
+        if not entry.points:
+            del self._assets[(site, asset)]
+
+    # =========================================================
+    # QUERY
+    # =========================================================
+    def get(self, site: str, asset: str) -> dict:
+        entry = self._assets.get((site, asset))
+        if entry is None:
+            return {"phi": 0.0, "state": "UNKNOWN"}
+        return self._worst(entry)
+
+    def get_status(self):
+        return {
+            "assets": len(self._assets),
+            "points": sum(len(e.points) for e in self._assets.values()),
+            "heap_entries": sum(len(e.heap) for e in self._assets.values()),
+        }
+
+    # =========================================================
+    # INTERNAL
+    # =========================================================
+    def _worst(self, entry) -> dict:
+        heap = entry.heap
+
+        while True:
+            _, _, version, point = heap[0]
+            current = entry.points.get(point)
+            if current is not None and current[1] == version:
+                break
+            heapq.heappop(heap)
+
+        worst = current[2]
+
+        return {
+            "phi": worst["phi"],
+            "state": worst["state"],
+            "source_point": worst.get("point_id"),
+        }
+
+    @staticmethod
+    def _rebuild(entry):
+        entry.heap = [
+            (-health["phi"], order, version, point)
+            for point, (order, version, health) in entry.points.items()
+        ]
+        heapq.heapify(entry.heap)
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+import time
+
+STATES = ("NORMAL", "WATCH", "WARNING", "ALARM", "UNKNOWN")
+
+
+class _Rollup:
+    """
+    Counts per state, PHI histogram and worst member of one scope
+    (a site, or the whole fleet).
+    """
+
+    __slots__ = ("states", "hist", "heap", "keys")
+
+    def __init__(self, n_bins):
+        self.states = dict.fromkeys(STATES, 0)
+        self.hist = [0] * n_bins
+        self.heap = []      # (-phi, order, version, key), lazy deletion
+        self.keys = set()   # (site, asset) members
+
+
+class FleetRollup:
+    """
+    Incremental site / fleet health rollups over asset health.
+
+    - update() per asset health change: state counts and PHI histogram
+      adjusted in O(1) (remove previous contribution, add new one)
+    - Worst asset per site and fleet: max-heap with lazy deletion
+      (amortized O(log assets)); ties go to the first-seen asset
+    - snapshot(): compact fleet picture for one retained topic,
+      throttled by snapshot_due()
+
+    partition: (instance_index, instance_count) in clustered mode →
+    the rollup only covers this instance's assets and the snapshot
+    says so ("partition"); see merge_snapshots() for the fleet view.
+    """
+
+    def __init__(
+        self,
+        bin_width=10,
+        snapshot_interval_sec=10.0,
+        include_assets=True,
+        partition=None,
+    ):
+        self.bin_width = bin_width
+        self.n_bins = int(-(-100 // bin_width))
+        self.snapshot_interval_sec = snapshot_interval_sec
+        self.include_assets = include_assets
+        self.partition = partition
+
+        self._assets = {}   # (site, asset) → (order, version, phi, state)
+        self._sites = {}
+        self._fleet = _Rollup(self.n_bins)
+
+        self._order = itertools.count()
+        self._version = itertools.count()
+        self._last_snapshot = None
+
+    # =========================================================
+    # UPDATE
+    # =========================================================
+    def update(self, site: str, asset: str, health: dict):
+        """
+        Fold one asset health ({phi, state, ...}) into the rollups.
+        """
+        key = (site, asset)
+        phi = health["phi"]
+        state = health["state"]
+
+        rollup = self._sites.get(site)
+        if rollup is None:
+            rollup = _Rollup(self.n_bins)
+            self._sites[site] = rollup
+
+        previous = self._assets.get(key)
+        if previous is not None:
+            order, _, old_phi, old_state = previous
+            if old_phi == phi and old_state == state:
+                return
+            self._count(rollup, old_phi, old_state, -1)
+            self._count(self._fleet, old_phi, old_state, -1)
+        else:
+            order = next(self._order)
+            rollup.keys.add(key)
+            self._fleet.keys.add(key)
+
+        version = next(self._version)
+        self._assets[key] = (order, version, phi, state)
+
+        self._count(rollup, phi, state, 1)
+        self._count(self._fleet, phi, state, 1)
+
+        entry = (-phi, order, version, key)
+        self._push(rollup, entry)
+        self._push(self._fleet, entry)
+
+    def _bin(self, phi):
+        return min(max(int(phi // self.bin_width), 0), self.n_bins - 1)
+
+    def _count(self, rollup, phi, state, delta):
+        rollup.states[state] = rollup.states.get(state, 0) + delta
+        rollup.hist[self._bin(phi)] += delta
+
+    def _push(self, rollup, entry):
+        heapq.heappush(rollup.heap, entry)
+
+        # Stale entries outnumber live ones → rebuild
+        if len(rollup.heap) > 2 * len(rollup.keys) + 8:
+            rollup.heap = []
+            for key in rollup.keys:
+                order, version, phi, _ = self._assets[key]
+                rollup.heap.append((-phi, order, version, key))
+            heapq.heapify(rollup.heap)
+
+    def _worst(self, rollup):
+        heap = rollup.heap
+
+        while heap:
+            _, _, version, key = heap[0]
+            current = self._assets.get(key)
+            if current is not None and current[1] == version:
+                return key, current
+            heapq.heappop(heap)
+
+        return None, None
+
+    # =========================================================
+    # SNAPSHOT
+    # =========================================================
+    def snapshot_due(self, now=None) -> bool:
+        now = time.time() if now is None else now
+
+        if (
+            self._last_snapshot is not None
+            and now - self._last_snapshot < self.snapshot_interval_sec
+        ):
+            return False
+
+        self._last_snapshot = now
+        return True
+
+    def snapshot(self, timestamp=None) -> dict:
+        """
+        Whole fleet state (O(assets), once per snapshot interval).
+        """
+        sites = {}
+        for site, rollup in self._sites.items():
+            key, worst = self._worst(rollup)
+            sites[site] = self._summary(rollup, worst, asset=key and key[1])
+
+        if self.include_assets:
+            for (site, asset), (_, _, phi, state) in self._assets.items():
+                sites[site].setdefault("asset_health", {})[asset] = [phi, state]
+
+        key, worst = self._worst(self._fleet)
+        fleet = self._summary(self._fleet, worst, asset=key and key[1])
+        if key is not None:
+            fleet["worst"]["site"] = key[0]
+
+        snapshot = {
+            "timestamp": time.time() if timestamp is None else timestamp,
+            "bin_width": self.bin_width,
+            "fleet": fleet,
+            "sites": sites,
+        }
+
+        if self.partition is not None:
+            index, count = self.partition
+            snapshot["partition"] = {"index": index, "count": count}
+
+        return snapshot
+
+    @staticmethod
+    def _summary(rollup, worst, asset):
+        summary = {
+            "assets": len(rollup.keys),
+            "states": {s: n for s, n in rollup.states.items() if n},
+            "phi_hist": list(rollup.hist),
+        }
+        if worst is not None:
+            summary["worst"] = {"asset": asset, "phi": worst[2], "state": worst[3]}
+        return summary
+
+    def get_status(self):
+        return {
+            "partition": self.partition,
+            "sites": len(self._sites),
+            "assets": len(self._assets),
+            "states": {s: n for s, n in self._fleet.states.items() if n},
+        }
+
+
+# =========================================================
+# CLUSTERED MODE: MERGE PARTITION SNAPSHOTS
+# =========================================================
+def merge_snapshots(snapshots) -> dict:
+    """
+    Fleet view from the per-instance snapshots of clustered mode
+    (vibration/fleet/snapshot/{index}, one per instance).
+
+    Assets are owned by exactly one instance, so per site and for the
+    fleet: asset / state counts and PHI histograms add up, the worst
+    asset is the highest PHI of the partitions, asset_health maps are
+    disjoint. A site may appear in several partitions.
+    Complete once every index of partition["count"] is present.
+    """
+    snapshots = list(snapshots)
+    merged = {
+        "timestamp": max(s["timestamp"] for s in snapshots),
+        "bin_width": snapshots[0]["bin_width"],
+        "fleet": {},
+        "sites": {},
+    }
+
+    for snapshot in snapshots:
+        _merge_summary(merged["fleet"], snapshot["fleet"])
+
+        for site, summary in snapshot["sites"].items():
+            target = merged["sites"].setdefault(site, {})
+            _merge_summary(target, summary)
+            if "asset_health" in summary:
+                target.setdefault("asset_health", {}).update(summary["asset_health"])
+
+    return merged
+
+
+def _merge_summary(target, summary):
+    target["assets"] = target.get("assets", 0) + summary["assets"]
+
+    states = target.setdefault("states", {})
+    for state, n in summary["states"].items():
+        states[state] = states.get(state, 0) + n
+
+    hist = target.setdefault("phi_hist", [0] * len(summary["phi_hist"]))
+    for i, n in enumerate(summary["phi_hist"]):
+        hist[i] += n
+
+    worst = summary.get("worst")
+    if worst is not None and worst["phi"] > target.get("worst", {}).get("phi", -1):
+        target["worst"] = dict(worst)
@@ -1,5 +1,12 @@
 # health/point_health_index.py
 
+import numpy as np
+
+
+# L1 features read by compute_phi() (always computed, whatever the profile)
+PHI_INPUTS = ("overall_vel_rms_mm_s", "envelope_rms", "crest_factor")
+
+
 def compute_phi(l1_features: dict) -> float:
     """
     Point Health Index (0–100)
@@ -19,3 +26,24 @@ def compute_phi(l1_features: dict) -> float:
 
     phi = 100.0 * severity  #(1.0 - severity)
     return round(max(min(phi, 100.0), 0.0), 1)
+
+
+def compute_phi_batch(l1_columns: dict):
+    """
+    Vectorized compute_phi over columnar L1 features
+    (L1FeaturePipeline.compute_batch output). Same values per row.
+    """
+    vel = np.minimum(np.asarray(l1_columns["overall_vel_rms_mm_s"]) / 7.1, 1.0)
+    env = np.minimum(np.asarray(l1_columns["envelope_rms"]) / 0.35, 1.0)
+    crest = np.minimum(np.asarray(l1_columns["crest_factor"]) / 6.0, 1.0)
+
+    severity = (
+        0.5 * vel +
+        0.3 * env +
+        0.2 * crest
+    )
+
+    phi = np.clip(100.0 * severity, 0.0, 100.0)
+
+    # Python round() per row → bit-identical to compute_phi()
+    return np.array([round(v, 1) for v in phi.tolist()])
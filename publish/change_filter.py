@@ -0,0 +1,99 @@
+import threading
+import time
+
+
+class ChangeFilter:
+    """
+    Change-only gate for retained topics.
+
+    - Keeps the last *published* payload per topic (deadbands are
+      measured against it, so slow drift still gets through); recorded
+      when accepted, so callers forget() a payload that was then not
+      sent (outbox drop, failed publish)
+    - "timestamp" is ignored; numeric fields listed in `deadbands`
+      (matched by key name, nested dicts included) count as unchanged
+      while within ± deadband; everything else must be equal
+    - max_silence_sec forces a keepalive republish of an unchanged topic
+    """
+
+    def __init__(self, deadbands=None, max_silence_sec=300):
+        self.deadbands = dict(deadbands or {})
+        self.max_silence_sec = max_silence_sec
+
+        self._last = {}     # topic → (publish time, payload)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.metrics = {
+            "published": 0,
+            "suppressed": 0,
+            "keepalive": 0,
+        }
+
+    # =========================================================
+    # PUBLIC API
+    # =========================================================
+    def should_publish(self, topic: str, payload: dict) -> bool:
+        now = time.time()
+
+        with self._lock:
+            last = self._last.get(topic)
+
+            if last is not None:
+                last_ts, last_payload = last
+
+                if self._same(last_payload, payload):
+                    if now - last_ts < self.max_silence_sec:
+                        self.metrics["suppressed"] += 1
+                        return False
+                    self.metrics["keepalive"] += 1
+
+            self._last[topic] = (now, payload)
+            self.metrics["published"] += 1
+            return True
+
+    def forget(self, topic: str):
+        """
+        Drop the cached payload (next publish always goes out).
+        """
+        with self._lock:
+            self._last.pop(topic, None)
+
+    def get_status(self):
+        return {
+            "topics": len(self._last),
+            "metrics": dict(self.metrics),
+        }
+
+    # =========================================================
+    # COMPARISON
+    # =========================================================
+    def _same(self, old: dict, new: dict) -> bool:
+        keys = (old.keys() | new.keys()) - {"timestamp"}
+
+        for key in keys:
+            if key not in old or key not in new:
+                return False
+
+            a = old[key]
+            b = new[key]
+
+            if isinstance(a, dict) and isinstance(b, dict):
+                if not self._same(a, b):
+                    return False
+                continue
+
+            band = self.deadbands.get(key)
+            if (
+                band is not None
+                and isinstance(a, (int, float))
+                and isinstance(b, (int, float))
+            ):
+                if abs(b - a) > band:
+                    return False
+                continue
+
+            if a != b:
+                return False
+
+        return True
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import numpy as np
+
+
+class _PointAggregate:
+    """
+    Running min / max / sum / last of one point's features in one interval.
+    """
+
+    __slots__ = (
+        "bucket", "names", "count", "min", "max", "sum", "last", "last_seen",
+    )
+
+    def __init__(self, bucket, names, values):
+        self.last_seen = time.monotonic()
+        self.bucket = bucket
+        self.names = names
+        self.count = 1
+        self.min = values.copy()
+        self.max = values.copy()
+        self.sum = values.copy()
+        self.last = values
+
+    def add(self, values):
+        self.last_seen = time.monotonic()
+        self.count += 1
+        np.minimum(self.min, values, out=self.min)
+        np.maximum(self.max, values, out=self.max)
+        self.sum += values
+        self.last = values
+
+
+class L1Aggregator:
+    """
+    Per-point temporal aggregation of the L1 stream.
+
+    - Intervals aligned to event time: floor(timestamp / interval_sec)
+    - O(1) memory per point: min / max / sum / count / last per feature
+    - add() returns the finished aggregate of the previous interval when
+      a window opens a new one (None otherwise)
+    - flush_idle() finishes intervals of points without a new window for
+      interval_sec (stopped reporting), flush_all() every open interval
+      (shutdown); thread-safe against add()
+    """
+
+    def __init__(self, interval_sec=60):
+        self.interval_sec = interval_sec
+        self._points = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, features: dict):
+        ts = features["timestamp"]
+        bucket = int(ts // self.interval_sec)
+
+        names = tuple(
+            name for name, value in features.items()
+            if name != "timestamp" and isinstance(value, float)
+        )
+        values = np.fromiter((features[name] for name in names), dtype=np.float64)
+
+        with self._lock:
+            agg = self._points.get(key)
+
+            if agg is not None and agg.bucket == bucket and agg.names == names:
+                agg.add(values)
+                return None
+
+            self._points[key] = _PointAggregate(bucket, names, values)
+
+        return self._payload(agg) if agg is not None else None
+
+    def flush(self, key):
+        """
+        Finish the current interval of a point now (e.g. on shutdown).
+        """
+        with self._lock:
+            agg = self._points.pop(key, None)
+        return self._payload(agg) if agg is not None else None
+
+    def flush_idle(self, now=None):
+        """
+        [(key, payload)] of points with no window for interval_sec.
+        """
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            idle = [
+                (key, self._points.pop(key))
+                for key, agg in list(self._points.items())
+                if now - agg.last_seen >= self.interval_sec
+            ]
+
+        return [(key, self._payload(agg)) for key, agg in idle]
+
+    def flush_all(self):
+        """
+        [(key, payload)] of every open interval.
+        """
+        with self._lock:
+            points, self._points = self._points, {}
+
+        return [(key, self._payload(agg)) for key, agg in points.items()]
+
+    def _payload(self, agg):
+        start = agg.bucket * self.interval_sec
+        mean = agg.sum / agg.count
+
+        return {
+            "interval_start": start,
+            "interval_sec": self.interval_sec,
+            "count": agg.count,
+            "min": dict(zip(agg.names, agg.min.tolist())),
+            "max": dict(zip(agg.names, agg.max.tolist())),
+            "mean": dict(zip(agg.names, mean.tolist())),
+            "last": dict(zip(agg.names, agg.last.tolist())),
+            "timestamp": start + self.interval_sec,
+        }
@@ -0,0 +1,99 @@
+import struct
+
+
+# =========================================================
+# BINARY L1 RECORD (schema-versioned)
+# =========================================================
+#
+#   offset  size  field
+#   0       4     magic        b"VBL1"
+#   4       2     schema id    uint16 (field order, see L1_SCHEMAS)
+#   6       2     flags        bit 0 = window_gap
+#   8       8     timestamp    float64 (epoch seconds, window event time)
+#   16      4×n   features     float32, schema order
+#
+# Topic: vibration/l1/{site}/{asset}/{point}/bin
+# Consumers only need this module (struct, no numpy) to decode.
+# Schemas are append-only: a new feature set gets a new id, old ids
+# keep decoding.
+
+L1_MAGIC = b"VBL1"
+L1_BINARY_SUFFIX = "bin"
+
+L1_SCHEMAS = {
+    1: (
+        "acc_rms_g",
+        "acc_peak_g",
+        "acc_hf_rms_g",
+        "crest_factor",
+        "envelope_rms",
+        "overall_vel_rms_mm_s",
+        "energy_low",
+        "energy_high",
+        "order_1x_g",
+        "order_2x_g",
+        "order_3x_g",
+        "gear_mesh_energy",
+        "gear_sideband_energy",
+    ),
+}
+L1_SCHEMA_ID = 1
+
+FLAG_WINDOW_GAP = 0x1
+
+_HEADER = struct.Struct("<4sHHd")
+_BODIES = {
+    schema_id: struct.Struct(f"<{len(fields)}f")
+    for schema_id, fields in L1_SCHEMAS.items()
+}
+
+
+def is_l1_binary(payload) -> bool:
+    return len(payload) >= _HEADER.size and payload[:4] == L1_MAGIC
+
+
+def encode_l1(features: dict, schema_id: int = L1_SCHEMA_ID) -> bytes:
+    """
+    Pack one L1 feature dict (fields outside the schema are dropped,
+    missing ones sent as 0.0).
+    """
+    fields = L1_SCHEMAS[schema_id]
+    flags = FLAG_WINDOW_GAP if features.get("window_gap") else 0
+
+    header = _HEADER.pack(
+        L1_MAGIC,
+        schema_id,
+        flags,
+        float(features.get("timestamp", 0.0)),
+    )
+    body = _BODIES[schema_id].pack(*(features.get(name, 0.0) for name in fields))
+
+    return header + body
+
+
+def decode_l1(payload) -> dict:
+    """
+    Binary record → L1 feature dict (same keys as the JSON stream;
+    values carry float32 precision).
+    """
+    if not is_l1_binary(payload):
+        raise ValueError("Not a binary L1 record")
+
+    _, schema_id, flags, timestamp = _HEADER.unpack_from(payload)
+
+    if schema_id not in L1_SCHEMAS:
+        raise ValueError(f"Unknown L1 schema id: {schema_id}")
+
+    body = _BODIES[schema_id]
+    if len(payload) < _HEADER.size + body.size:
+        raise ValueError(
+            f"Truncated L1 record: {len(payload)} < {_HEADER.size + body.size} bytes"
+        )
+
+    features = dict(zip(L1_SCHEMAS[schema_id], body.unpack_from(payload, _HEADER.size)))
+    features["timestamp"] = timestamp
+
+    if flags & FLAG_WINDOW_GAP:
+        features["window_gap"] = True
+
+    return features
@@ -1,8 +1,15 @@
 import json
+import threading
 import time
 import copy
 import paho.mqtt.client as mqtt
 
+from publish.change_filter import ChangeFilter
+from publish.outbox import PublishOutbox
+from publish.spool import PublishSpool
+from publish.l1_codec import L1_BINARY_SUFFIX, encode_l1
+from publish.l1_aggregator import L1Aggregator
+
 
 class MQTTPublisher:
     """
@@ -15,21 +22,137 @@ class MQTTPublisher:
         vibration/health/{site}/{asset}/{point}
         vibration/recommendation/{site}/{asset}/{point}
         vibration/diagnostic/{site}/{asset}/{point}
+        vibration/ingest/quarantine/{site}/{asset}/{point}
+        vibration/l1agg/{site}/{asset}/{point}     (l1_aggregator)
 
     Asset:
         vibration/asset/health/{site}/{asset}
         vibration/asset/recommendation/{site}/{asset}
+
+    Fleet:
+        vibration/fleet/snapshot                    site / fleet rollups,
+                                                    every snapshot_interval_sec
+        vibration/fleet/snapshot/{index}            clustered mode (fleet_partition):
+                                                    this instance's assets only,
+                                                    merge with health.fleet_rollup
+                                                    .merge_snapshots()
+
+    Engine (status_interval_sec):
+        vibration/engine/status                     get_status() of the outbox,
+        vibration/engine/status/{index}             spool and add_status_source()
+                                                    components (not retained,
+                                                    skipped while disconnected)
+
+    Bundled (output_mode "bundled" / "both"):
+        vibration/bundle/{site}/{asset}/{point}     L1 + health + recommendation
+        vibration/asset/bundle/{site}/{asset}       health + recommendation,
+                                                    throttled to asset_interval_sec
+                                                    (immediate on state change)
+
+    Change-only (change_filter): retained topics are only republished
+    when their payload changed beyond the deadbands, or as a keepalive
+    after max_silence_sec. A payload the outbox drops or that fails to
+    publish is forgotten, so the next one is not suppressed.
+
+    Outbox (outbox): publishes are queued and sent by the outbox's
+    sender thread (encode + QoS policy + drop policy off the compute path).
+
+    Encoding (encodings): per topic class, "json" (default) or "binary".
+    Binary is supported for "l1": packed float32 record
+    (publish.l1_codec) on vibration/l1/{site}/{asset}/{point}/bin.
+
+    L1 aggregation (l1_aggregator): the legacy L1 topic only carries
+    windows of points in full_rate_states; every window feeds per-interval
+    min / max / mean / last on vibration/l1agg/... (bundles unaffected).
+    A background thread publishes intervals of points that stopped
+    reporting; close() publishes the rest on shutdown.
+
+    close(): flush L1 aggregates, drain the outbox, stop the spool,
+    wait for outstanding QoS 1 acks, then stop the network loop and
+    disconnect (end of replay / shutdown).
+
+    Spool (spool): while the broker is unreachable (or a publish fails),
+    messages go to an on-disk journal and are replayed after reconnect.
     """
 
+    OUTPUT_MODES = ("legacy", "bundled", "both")
+    BINARY_CLASSES = ("l1",)
+
     # =========================================================
     # INIT
     # =========================================================
-    def __init__(self, broker: str, port: int, client_id: str = "vibralyzer_v4"):
+    def __init__(
+        self,
+        broker: str,
+        port: int,
+        client_id: str = "vibralyzer_v4",
+        output_mode: str = "legacy",
+        asset_interval_sec: float = 5.0,
+        change_filter: ChangeFilter | None = None,
+        outbox: PublishOutbox | None = None,
+        spool: PublishSpool | None = None,
+        encodings: dict | None = None,
+        l1_aggregator: L1Aggregator | None = None,
+        full_rate_states=("WATCH", "WARNING", "ALARM"),
+        fleet_partition: int | None = None,
+        status_interval_sec: float | None = None,
+    ):
+        if output_mode not in self.OUTPUT_MODES:
+            raise ValueError(f"Unknown publish output_mode: {output_mode}")
+
+        self.encodings = dict(encodings or {})
+        for cls, encoding in self.encodings.items():
+            if encoding == "binary" and cls not in self.BINARY_CLASSES:
+                raise ValueError(f"Binary encoding not supported for: {cls}")
+            if encoding not in ("json", "binary"):
+                raise ValueError(f"Unknown encoding for {cls}: {encoding}")
+
+        self.output_mode = output_mode
+        self.asset_interval_sec = asset_interval_sec
+        self._asset_last = {}   # (site, asset) → (publish time, state)
+        self.change_filter = change_filter
+        self.l1_aggregator = l1_aggregator
+        self.full_rate_states = set(full_rate_states)
+        self.fleet_partition = fleet_partition
+        self.outbox = outbox
+        self.spool = spool
+        self._last_result = None    # newest direct publish (close() waits on it)
+        self._closed = threading.Event()
+
+        self._status_sources = {}
+        if self.outbox is not None:
+            self.add_status_source("outbox", self.outbox.get_status)
+        if self.spool is not None:
+            self.add_status_source("spool", self.spool.get_status)
 
         self.client = mqtt.Client(client_id=client_id)
-        self.client.connect(broker, port)
+
+        if self.spool is not None:
+            # Broker may be down at startup → spool until it is reachable
+            self.client.connect_async(broker, port)
+            self.spool.start(self.client)
+        else:
+            self.client.connect(broker, port)
         self.client.loop_start()
 
+        if self.outbox is not None:
+            self.outbox.start(self.client, spool=self.spool, on_drop=self._not_sent)
+
+        if self.l1_aggregator is not None:
+            threading.Thread(
+                target=self._l1_aggregate_loop,
+                daemon=True,
+                name="L1AggregateFlush",
+            ).start()
+
+        if status_interval_sec:
+            threading.Thread(
+                target=self._status_loop,
+                args=(status_interval_sec,),
+                daemon=True,
+                name="EngineStatus",
+            ).start()
+
     # =========================================================
     # INTERNAL SAFE PUBLISH
     # =========================================================
@@ -41,16 +164,49 @@ class MQTTPublisher:
         retain: bool = False,
     ):
 
+        # Retained + unchanged → skip (before copy / encode)
+        if retain and not self._changed(topic, payload):
+            return
+
         # Copy to avoid mutating original payload
-        data = copy.deepcopy(payload)
+        # (outbox: payloads are built per window → shallow copy,
+        #  encoded later on the sender thread)
+        if self.outbox is not None:
+            data = dict(payload)
+        else:
+            data = copy.deepcopy(payload)
 
         # Only add timestamp if not provided
         if "timestamp" not in data:
             data["timestamp"] = time.time()
 
+        self._send(topic, data, qos=qos, retain=retain)
+
+    def _changed(self, topic: str, payload: dict) -> bool:
+        if self.change_filter is None:
+            return True
+        return self.change_filter.should_publish(topic, payload)
+
+    def _send(
+        self,
+        topic: str,
+        data: dict,
+        qos: int = 1,
+        retain: bool = False,
+        encode=json.dumps,
+    ):
+
+        if self.outbox is not None:
+            self.outbox.put(topic, data, qos=qos, retain=retain, encode=encode)
+            return
+
+        if self.spool is not None:
+            self.spool.publish(self.client, topic, encode(data), qos=qos, retain=retain)
+            return
+
         result = self.client.publish(
             topic,
-            json.dumps(data),
+            encode(data),
             qos=qos,
             retain=retain,
         )
@@ -58,6 +214,15 @@ class MQTTPublisher:
         # Optional delivery check
         if result.rc != mqtt.MQTT_ERR_SUCCESS:
             print(f"[MQTT] Publish failed: {topic} (rc={result.rc})")
+            self._not_sent(topic)
+            return
+
+        self._last_result = result
+
+    def _not_sent(self, topic: str):
+        # Change filter recorded it as published → forget it
+        if self.change_filter is not None:
+            self.change_filter.forget(topic)
 
     # =========================================================
     # ---------------- POINT LEVEL ----------------
@@ -65,6 +230,12 @@ class MQTTPublisher:
 
     def publish_l1(self, site: str, asset: str, point: str, payload: dict):
         topic = f"vibration/l1/{site}/{asset}/{point}"
+
+        if self.encodings.get("l1") == "binary":
+            # Packed straight from the feature dict (no copy / JSON)
+            self._send(f"{topic}/{L1_BINARY_SUFFIX}", payload, retain=False, encode=encode_l1)
+            return
+
         self._publish(topic, payload, retain=False)
 
     def publish_health(self, site: str, asset: str, point: str, payload: dict):
@@ -79,6 +250,10 @@ class MQTTPublisher:
         topic = f"vibration/diagnostic/{site}/{asset}/{point}"
         self._publish(topic, payload, retain=False)
 
+    def publish_quarantine(self, site: str, asset: str, point: str, payload: dict):
+        topic = f"vibration/ingest/quarantine/{site}/{asset}/{point}"
+        self._publish(topic, payload, retain=True)
+
     # =========================================================
     # ---------------- ASSET LEVEL ----------------
     # =========================================================
@@ -90,7 +265,216 @@ class MQTTPublisher:
     def publish_asset_recommendation(self, site: str, asset: str, payload: dict):
         topic = f"vibration/asset/recommendation/{site}/{asset}"
         self._publish(topic, payload, retain=True)
-# =========================================================  
 
+    # =========================================================
+    # ---------------- WINDOW LEVEL (output_mode) ----------------
+    # =========================================================
+
+    def publish_point_window(
+        self,
+        site: str,
+        asset: str,
+        point: str,
+        l1: dict,
+        health: dict,
+        recommendation: dict,
+    ):
+        """
+        All point outputs of one evaluated window.
+        legacy → 3 per-topic messages, bundled → 1 compact message.
+        """
+        if self.output_mode != "bundled":
+            self._publish_l1_stream(site, asset, point, l1, health["state"])
+            self.publish_health(site, asset, point, health)
+            self.publish_recommendation(site, asset, point, recommendation)
+
+        if self.output_mode != "legacy":
+            self.publish_bundle(site, asset, point, {
+                "timestamp": health.get("timestamp", time.time()),
+                "l1": _without_timestamp(l1),
+                "health": _without_timestamp(health),
+                "recommendation": _without_timestamp(recommendation),
+            })
+
+    def publish_asset_window(
+        self,
+        site: str,
+        asset: str,
+        health: dict,
+        recommendation: dict,
+    ):
+        """
+        Asset outputs after a point update.
+        Bundled asset messages are throttled per asset, except on
+        a state change.
+        """
+        if self.output_mode != "bundled":
+            self.publish_asset_health(site, asset, health)
+            self.publish_asset_recommendation(site, asset, recommendation)
+
+        if self.output_mode != "legacy" and self._asset_due(site, asset, health["state"]):
+            self.publish_asset_bundle(site, asset, {
+                "timestamp": health.get("timestamp", time.time()),
+                "health": _without_timestamp(health),
+                "recommendation": _without_timestamp(recommendation),
+            })
+
+    def _publish_l1_stream(self, site, asset, point, l1, state):
+        if self.l1_aggregator is None:
+            self.publish_l1(site, asset, point, l1)
+            return
+
+        aggregate = self.l1_aggregator.add((site, asset, point), l1)
+        if aggregate is not None:
+            self.publish_l1_aggregate(site, asset, point, aggregate)
+
+        # Excursions keep full window resolution
+        if state in self.full_rate_states:
+            self.publish_l1(site, asset, point, l1)
+
+    def publish_l1_aggregate(self, site: str, asset: str, point: str, payload: dict):
+        topic = f"vibration/l1agg/{site}/{asset}/{point}"
+        self._send(topic, payload, retain=False)
+
+    def flush_l1_aggregates(self, idle_only=False):
+        """
+        Publish open L1 intervals: all of them (shutdown / end of
+        replay), or only those of points idle for interval_sec.
+        """
+        if self.l1_aggregator is None:
+            return
+
+        if idle_only:
+            finished = self.l1_aggregator.flush_idle()
+        else:
+            finished = self.l1_aggregator.flush_all()
+
+        for (site, asset, point), payload in finished:
+            self.publish_l1_aggregate(site, asset, point, payload)
+
+    def _l1_aggregate_loop(self):
+        period = min(1.0, self.l1_aggregator.interval_sec / 4)
+
+        while not self._closed.wait(period):
+            try:
+                self.flush_l1_aggregates(idle_only=True)
+            except Exception as e:
+                print(f"[MQTT] L1 aggregate flush failed: {e}")
+
+    def publish_bundle(self, site: str, asset: str, point: str, bundle: dict):
+        topic = f"vibration/bundle/{site}/{asset}/{point}"
+        self._send(topic, bundle, retain=False, encode=_compact_json)
+
+    def publish_asset_bundle(self, site: str, asset: str, bundle: dict):
+        topic = f"vibration/asset/bundle/{site}/{asset}"
+        if self._changed(topic, bundle):
+            self._send(topic, bundle, retain=True, encode=_compact_json)
+
+    # =========================================================
+    # ---------------- FLEET LEVEL ----------------
+    # =========================================================
+
+    def publish_fleet_snapshot(self, snapshot: dict):
+        topic = "vibration/fleet/snapshot"
+        if self.fleet_partition is not None:
+            topic = f"{topic}/{self.fleet_partition}"
+        if self._changed(topic, snapshot):
+            self._send(topic, snapshot, retain=True, encode=_compact_json)
+
+    def _asset_due(self, site: str, asset: str, state: str) -> bool:
+        now = time.time()
+        last = self._asset_last.get((site, asset))
+
+        if last is not None:
+            last_ts, last_state = last
+            if state == last_state and now - last_ts < self.asset_interval_sec:
+                return False
+
+        self._asset_last[(site, asset)] = (now, state)
+        return True
+
+
+# =========================================================
+# BUNDLE HELPERS
+# =========================================================
+    # =========================================================
+    # ---------------- ENGINE STATUS ----------------
+    # =========================================================
+
+    def add_status_source(self, name: str, get_status):
+        """
+        get_status() → JSON-serializable dict, reported under `name`.
+        """
+        self._status_sources[name] = get_status
+
+    def publish_status(self):
+        # Point-in-time metrics: stale ones are worth nothing → no spool
+        if not self.client.is_connected():
+            return
+
+        topic = "vibration/engine/status"
+        if self.fleet_partition is not None:
+            topic = f"{topic}/{self.fleet_partition}"
+
+        status = {"timestamp": time.time()}
+        for name, get_status in list(self._status_sources.items()):
+            status[name] = get_status()
+
+        self.client.publish(topic, _compact_json(status), qos=0, retain=False)
+
+    def _status_loop(self, interval_sec: float):
+        while not self._closed.wait(interval_sec):
+            try:
+                self.publish_status()
+            except Exception as e:
+                print(f"[MQTT] Engine status publish failed: {e}")
+
+    # =========================================================
+    # SHUTDOWN
+    # =========================================================
+    def close(self, timeout: float = 5.0):
+        """
+        Deliver everything handed to the publisher, then disconnect.
+        Safe to call more than once.
+        """
+        if self._closed.is_set():
+            return
+
+        if self.l1_aggregator is not None:
+            self.flush_l1_aggregates()
+
+        self._closed.set()
+
+        if self.outbox is not None:
+            self.outbox.stop(timeout=timeout)
+
+        if self.spool is not None:
+            self.spool.stop()
+
+        self._wait_published(timeout)
+
+        self.client.loop_stop()
+        self.client.disconnect()
+
+    def _wait_published(self, timeout: float):
+        if self.outbox is not None:
+            if not self.outbox.wait_acked(timeout=timeout):
+                print("[MQTT] Close: outbox publishes still unacknowledged")
+
+        result = self._last_result
+        if result is None or result.is_published():
+            return
+
+        try:
+            result.wait_for_publish(timeout=timeout)
+        except (RuntimeError, ValueError) as e:
+            print(f"[MQTT] Close: last publish not delivered ({e})")
+
+
+def _without_timestamp(payload: dict) -> dict:
+    # Bundles carry one top-level timestamp
+    return {k: v for k, v in payload.items() if k != "timestamp"}
 
 
+def _compact_json(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"))
@@ -0,0 +1,321 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+# Enqueue → broker ack latency buckets (upper bounds, ms)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Ack bookkeeping bounds (sent messages awaiting PUBACK / unclaimed acks)
+MAX_TRACKED_ACKS = 10000
+
+
+def topic_class(topic: str) -> str:
+    """
+    vibration/<class>/... → <class>
+    (l1, bundle, health, recommendation, diagnostic, asset, ingest)
+    """
+    parts = topic.split("/")
+    return parts[1] if len(parts) > 1 else topic
+
+
+class PublishOutbox:
+    """
+    Bounded publish queue drained by a dedicated sender thread.
+
+    Features:
+    - Compute threads only enqueue; JSON encode + client.publish()
+      run on the sender thread
+    - QoS per topic class (e.g. 0 for the L1 stream, 1 for health)
+    - Two lanes: bulk classes (L1 / bundles) and everything else;
+      the sender drains the main lane first, overflow evicts the oldest
+      bulk message before touching the main lane
+    - Main-lane overflow policy: drop_oldest / drop_new
+    - Metrics per class + enqueue → ack latency histogram
+      (ack = PUBACK for QoS 1, socket write for QoS 0)
+    - on_drop(topic) for every dropped or failed message
+      (e.g. ChangeFilter.forget, so the next payload is not suppressed)
+    - Messages still unacked after ack_timeout_sec (or beyond
+      MAX_TRACKED_ACKS outstanding) stop being tracked ("ack_expired")
+    """
+
+    def __init__(
+        self,
+        maxsize=10000,
+        qos_policy=None,
+        bulk_classes=("l1", "bundle"),
+        drop_policy="drop_oldest",  # drop_new / drop_oldest
+        ack_timeout_sec=60,
+    ):
+        if drop_policy not in ("drop_oldest", "drop_new"):
+            raise ValueError(f"Unknown outbox drop_policy: {drop_policy}")
+
+        self.maxsize = maxsize
+        self.qos_policy = dict(qos_policy or {})
+        self.bulk_classes = set(bulk_classes)
+        self.drop_policy = drop_policy
+        self.ack_timeout_sec = ack_timeout_sec
+
+        self._main = deque()
+        self._bulk = deque()
+        self._cond = threading.Condition()
+
+        self._client = None
+        self._spool = None
+        self._on_drop = None
+        self._thread = None
+        self._running = False
+
+        # mid → (enqueue time, class); acks may beat publish() returning
+        self._inflight = {}
+        self._early_acks = {}
+        self._ack_lock = threading.Lock()
+        self._acked = threading.Condition(self._ack_lock)
+
+        # Metrics
+        self.metrics = {
+            "enqueued": 0,
+            "sent": 0,
+            "acked": 0,
+            "dropped": 0,
+            "publish_failed": 0,
+            "spooled": 0,
+            "ack_expired": 0,
+            "max_depth": 0,
+        }
+        self.dropped_per_class = {}
+        self.latency_hist = {}      # class → [count per bucket] (+ overflow)
+
+    # =========================================================
+    # START
+    # =========================================================
+    def start(self, client, spool=None, on_drop=None):
+        if self._thread:
+            return
+
+        self._client = client
+        self._spool = spool
+        self._on_drop = on_drop
+        client.on_publish = self._on_publish
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._sender_loop,
+            daemon=True,
+            name="MQTTOutbox",
+        )
+        self._thread.start()
+
+        logger.info(
+            f"Publish outbox started (maxsize={self.maxsize}, "
+            f"policy={self.drop_policy})"
+        )
+
+    # =========================================================
+    # PUBLIC API (compute threads, never blocks on the broker)
+    # =========================================================
+    def put(self, topic, payload, qos=1, retain=False, encode=json.dumps) -> bool:
+        cls = topic_class(topic)
+        qos = self.qos_policy.get(cls, qos)
+        item = (time.monotonic(), cls, topic, payload, qos, retain, encode)
+        lane = self._bulk if cls in self.bulk_classes else self._main
+
+        with self._cond:
+            if len(self._main) + len(self._bulk) >= self.maxsize:
+                if not self._evict(lane):
+                    self._count_drop(cls, topic)
+                    return False
+
+            lane.append(item)
+            self.metrics["enqueued"] += 1
+
+            depth = len(self._main) + len(self._bulk)
+            if depth > self.metrics["max_depth"]:
+                self.metrics["max_depth"] = depth
+
+            self._cond.notify()
+
+        return True
+
+    def _evict(self, lane) -> bool:
+        """
+        Make room for one message. False → drop the incoming one.
+        """
+        if self._bulk:
+            victim = self._bulk.popleft()
+        elif lane is self._main and self.drop_policy == "drop_oldest":
+            victim = self._main.popleft()
+        else:
+            return False
+
+        self._count_drop(victim[1], victim[2])
+        return True
+
+    def _count_drop(self, cls, topic):
+        self.metrics["dropped"] += 1
+        self.dropped_per_class[cls] = self.dropped_per_class.get(cls, 0) + 1
+        self._dropped(topic)
+
+    def _dropped(self, topic):
+        if self._on_drop is not None:
+            self._on_drop(topic)
+
+    # =========================================================
+    # SENDER LOOP
+    # =========================================================
+    def _sender_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not (self._main or self._bulk):
+                    self._cond.wait(timeout=1)
+
+                if not (self._main or self._bulk):
+                    return   # stopped and drained
+
+                lane = self._main if self._main else self._bulk
+                item = lane.popleft()
+
+            self._send(item)
+
+    def _send(self, item):
+        enqueued_at, cls, topic, payload, qos, retain, encode = item
+
+        try:
+            message = payload if isinstance(payload, (str, bytes)) else encode(payload)
+
+            if self._spool is not None:
+                result = self._spool.publish(
+                    self._client, topic, message, qos=qos, retain=retain
+                )
+                if result is None:
+                    self.metrics["spooled"] += 1
+                    return
+            else:
+                result = self._client.publish(topic, message, qos=qos, retain=retain)
+
+        except Exception:
+            self.metrics["publish_failed"] += 1
+            logger.exception(f"Outbox publish failed: {topic}")
+            self._dropped(topic)
+            return
+
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            self.metrics["publish_failed"] += 1
+            logger.warning(f"[MQTT] Publish failed: {topic} (rc={result.rc})")
+            self._dropped(topic)
+            return
+
+        self.metrics["sent"] += 1
+
+        with self._ack_lock:
+            acked_at = self._early_acks.pop(result.mid, None)
+            if acked_at is None:
+                self._expire_inflight()
+                self._inflight[result.mid] = (enqueued_at, cls)
+                return
+
+        self._record_ack(cls, acked_at - enqueued_at)
+
+    # =========================================================
+    # ACKS (paho network thread)
+    # =========================================================
+    def _on_publish(self, client, userdata, mid, *args):
+        now = time.monotonic()
+
+        with self._ack_lock:
+            entry = self._inflight.pop(mid, None)
+            if entry is None:
+                # Acks of messages not sent by the outbox (spool replay)
+                # are never claimed → keep the map bounded
+                if len(self._early_acks) >= MAX_TRACKED_ACKS:
+                    self._early_acks.clear()
+                self._early_acks[mid] = now
+                return
+
+            if not self._inflight:
+                self._acked.notify_all()
+
+        enqueued_at, cls = entry
+        self._record_ack(cls, now - enqueued_at)
+
+    def _expire_inflight(self):
+        """
+        Stop tracking the oldest unacked messages (lost acks, QoS 1
+        messages dropped with the session). _inflight is in send order.
+        Ack lock held.
+        """
+        deadline = time.monotonic() - self.ack_timeout_sec
+
+        while self._inflight:
+            mid, (enqueued_at, _) = next(iter(self._inflight.items()))
+            if enqueued_at > deadline and len(self._inflight) < MAX_TRACKED_ACKS:
+                break
+            del self._inflight[mid]
+            self.metrics["ack_expired"] += 1
+
+    def _record_ack(self, cls, latency_sec):
+        self.metrics["acked"] += 1
+
+        hist = self.latency_hist.get(cls)
+        if hist is None:
+            hist = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            self.latency_hist[cls] = hist
+
+        latency_ms = latency_sec * 1000.0
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                hist[i] += 1
+                break
+        else:
+            hist[-1] += 1
+
+    # =========================================================
+    # METRICS
+    # =========================================================
+    def get_status(self):
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+
+        return {
+            "queue_size": len(self._main) + len(self._bulk),
+            "inflight": len(self._inflight),
+            "metrics": dict(self.metrics),
+            "dropped_per_class": dict(self.dropped_per_class),
+            "ack_latency_hist": {
+                cls: dict(zip(labels, counts))
+                for cls, counts in self.latency_hist.items()
+            },
+        }
+
+    def wait_acked(self, timeout=5) -> bool:
+        """
+        Wait until every sent QoS 1 message is acknowledged.
+        False → some were still outstanding after timeout.
+        """
+        deadline = time.monotonic() + timeout
+
+        with self._acked:
+            while self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._acked.wait(remaining)
+
+        return True
+
+    # =========================================================
+    # STOP (drains what is queued)
+    # =========================================================
+    def stop(self, timeout=5):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+        logger.info("Publish outbox stopped cleanly")
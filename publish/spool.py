@@ -0,0 +1,496 @@
+import json
+import logging
+import mmap
+import struct
+import threading
+import time
+from pathlib import Path
+
+import paho.mqtt.client as mqtt
+
+from publish.outbox import topic_class
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+# STORE-AND-FORWARD SPOOL (MEMORY-MAPPED JOURNAL)
+# =========================================================
+#
+#   <spool>/<class>/seg_000000.bin   fixed-size mmap'd segments
+#   <spool>/<class>/cursor.json      replay position {segment, offset}
+#
+#   record = <RECORD header> + topic (utf-8) + message bytes
+#   a zero length field marks the end of written data in a segment
+#
+# One journal per topic class (vibration/<class>/...). Fully replayed
+# segments are deleted; the cursor survives restarts (at-least-once).
+# Segment numbers only grow while a journal has segments; an emptied
+# journal (all segments evicted) also drops its cursor file.
+
+_RECORD = struct.Struct("<IHBBd")   # record length, topic length, qos, retain, spooled at
+
+
+def _seg_name(seq: int) -> str:
+    return f"seg_{seq:06d}.bin"
+
+
+class _ClassJournal:
+    """
+    Append-only segment list of one topic class (caller holds the lock).
+    """
+
+    def __init__(self, path: Path, segment_bytes: int):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+
+        self.segments = sorted(
+            int(p.stem.split("_")[1]) for p in self.path.glob("seg_*.bin")
+        )
+
+        self._write_map = None
+        self._write_file = None
+        self.write_pos = 0
+
+        self._read_seq = None
+        self._read_map = None
+        self._read_file = None
+
+        self.read_seg, self.read_pos = self._load_cursor()
+        self._next_seq = self.segments[-1] + 1 if self.segments else 0
+
+        if self.segments:
+            self._open_write(self.segments[-1])
+            self.write_pos = self._scan_end(self._write_map)
+
+    # ---------------- write side ----------------
+    def append(self, record: bytes) -> bool:
+        """
+        False → the current segment is full (caller rolls).
+        """
+        # Keep room for a zero header after the last record (end marker)
+        if (
+            self._write_map is None
+            or self.write_pos + len(record) + _RECORD.size > self.segment_bytes
+        ):
+            return False
+
+        self._write_map[self.write_pos:self.write_pos + len(record)] = record
+        self.write_pos += len(record)
+        return True
+
+    def roll(self):
+        seq = self._next_seq
+        self._next_seq += 1
+
+        with open(self.path / _seg_name(seq), "w+b") as f:
+            f.truncate(self.segment_bytes)
+
+        self.segments.append(seq)
+        self._open_write(seq)
+        self.write_pos = 0
+
+        if self.read_seg is None:
+            self.read_seg, self.read_pos = seq, 0
+
+    def evict_oldest(self):
+        """
+        Delete the oldest segment (replay cursor moves past it).
+        """
+        seq = self.segments.pop(0)
+
+        if self._read_seq == seq:
+            self._close_read()
+
+        if not self.segments:
+            self._close_write()
+
+        (self.path / _seg_name(seq)).unlink(missing_ok=True)
+
+        if self.read_seg == seq:
+            self.read_seg = self.segments[0] if self.segments else None
+            self.read_pos = 0
+            self.save_cursor()
+
+    # ---------------- read side ----------------
+    def has_backlog(self) -> bool:
+        if self.read_seg is None:
+            return False
+        if self.read_seg != self.segments[-1]:
+            return True
+        return self.read_pos < self.write_pos
+
+    def peek(self):
+        """
+        (topic, message, qos, retain, spooled_at, position) at the
+        cursor, or None. position = (segment, offset, length) for advance().
+        """
+        while self.has_backlog():
+            buf = self._map_for(self.read_seg)
+            length, topic_len, qos, retain, spooled_at = _RECORD.unpack_from(
+                buf, self.read_pos
+            )
+
+            if length == 0:
+                # End of a finished segment → delete it, go to the next one
+                self._finish_read_segment()
+                continue
+
+            start = self.read_pos + _RECORD.size
+            topic = bytes(buf[start:start + topic_len]).decode("utf-8")
+            message = bytes(buf[start + topic_len:self.read_pos + length])
+            return (
+                topic, message, qos, bool(retain), spooled_at,
+                (self.read_seg, self.read_pos, length),
+            )
+
+        return None
+
+    def advance(self, position):
+        """
+        Move past a replayed record (no-op if eviction moved the cursor).
+        """
+        seg, pos, length = position
+        if seg == self.read_seg and pos == self.read_pos:
+            self.read_pos += length
+
+    def _finish_read_segment(self):
+        seq = self.read_seg
+        self.segments.remove(seq)
+        self._close_read()
+        (self.path / _seg_name(seq)).unlink(missing_ok=True)
+
+        self.read_seg = self.segments[0]
+        self.read_pos = 0
+        self.save_cursor()
+
+    # ---------------- files / cursor ----------------
+    def _open_write(self, seq):
+        self._close_write()
+        self._write_file = open(self.path / _seg_name(seq), "r+b")
+        self._write_map = mmap.mmap(self._write_file.fileno(), self.segment_bytes)
+
+    def _close_write(self):
+        if self._write_map is not None:
+            self._write_map.flush()
+            self._write_map.close()
+            self._write_file.close()
+        self._write_map = None
+        self._write_file = None
+
+    def _map_for(self, seq):
+        if self.segments and seq == self.segments[-1] and self._write_map is not None:
+            return self._write_map
+
+        if self._read_seq != seq:
+            self._close_read()
+            self._read_file = open(self.path / _seg_name(seq), "rb")
+            self._read_map = mmap.mmap(self._read_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._read_seq = seq
+
+        return self._read_map
+
+    def _close_read(self):
+        if self._read_map is not None:
+            self._read_map.close()
+            self._read_file.close()
+        self._read_map = None
+        self._read_file = None
+        self._read_seq = None
+
+    @staticmethod
+    def _scan_end(buf) -> int:
+        pos = 0
+        while pos + _RECORD.size <= len(buf):
+            length = _RECORD.unpack_from(buf, pos)[0]
+            if length == 0:
+                break
+            pos += length
+        return pos
+
+    def _load_cursor(self):
+        if not self.segments:
+            return None, 0
+
+        try:
+            with open(self.path / "cursor.json", "r", encoding="utf-8") as f:
+                cursor = json.load(f)
+            if cursor["segment"] in self.segments:
+                return cursor["segment"], cursor["offset"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        return self.segments[0], 0
+
+    def save_cursor(self):
+        if self.read_seg is None:
+            # Nothing left: a stale cursor must not point into a new segment
+            (self.path / "cursor.json").unlink(missing_ok=True)
+            return
+        with open(self.path / "cursor.json", "w", encoding="utf-8") as f:
+            json.dump({"segment": self.read_seg, "offset": self.read_pos}, f)
+
+    def close(self):
+        self.save_cursor()
+        self._close_read()
+        self._close_write()
+
+
+class PublishSpool:
+    """
+    Store-and-forward journal for publisher output.
+
+    Features:
+    - Messages are spooled only while the client is disconnected or
+      when a publish fails; once connected, live messages always
+      publish directly (a backlog never delays live alarms, whatever
+      its size or catchup_rate)
+    - The backlog replays as history: a spooled retained message keeps
+      retain only if its topic was not published live after it was
+      spooled, so replay never overwrites newer retained state
+    - Bounded disk use: max_bytes; at the cap the oldest segment of the
+      first class in eviction_order is dropped (L1 first); classes not
+      listed (health, diagnostic, ingest) are never evicted (incoming
+      message refused)
+    - Forwarder thread replays after reconnect at catchup_rate msg/s;
+      the class is re-picked after every record (protected classes
+      first, then last-evicted-first)
+    """
+
+    def __init__(
+        self,
+        path,
+        max_bytes=512 * 2**20,
+        segment_bytes=4 * 2**20,
+        catchup_rate=200,
+        eviction_order=("l1", "bundle", "recommendation", "asset"),
+    ):
+        self.path = Path(path)
+        self.segment_bytes = int(segment_bytes)
+        self.max_segments = max(1, int(max_bytes) // self.segment_bytes)
+        self.catchup_rate = catchup_rate
+        self.eviction_order = list(eviction_order)
+
+        self._lock = threading.Lock()
+        self._journals = {}
+        for d in sorted(p for p in self.path.glob("*") if p.is_dir()):
+            self._journals[d.name] = _ClassJournal(d, self.segment_bytes)
+
+        self._client = None
+        self._thread = None
+        self._running = False
+
+        # Retained topic → time of its last live publish (cleared once
+        # the backlog is drained)
+        self._live_at = {}
+
+        # Metrics
+        self.metrics = {
+            "spooled": 0,
+            "replayed": 0,
+            "replayed_unretained": 0,
+            "refused": 0,
+            "segments_evicted": 0,
+        }
+        self.evicted_per_class = {}
+
+    # =========================================================
+    # START
+    # =========================================================
+    def start(self, client):
+        if self._thread:
+            return
+
+        self._client = client
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._forward_loop,
+            daemon=True,
+            name="MQTTSpool",
+        )
+        self._thread.start()
+
+        backlog = self.has_backlog()
+        logger.info(
+            f"Publish spool started at {self.path} "
+            f"({'backlog pending' if backlog else 'empty'})"
+        )
+
+    # =========================================================
+    # PUBLISH PATH
+    # =========================================================
+    def publish(self, client, topic, message, qos=1, retain=False):
+        """
+        Publish directly, or spool when disconnected / failing.
+        Returns the paho result, or None when the message was spooled.
+        """
+        if not client.is_connected():
+            self.append(topic, message, qos, retain)
+            return None
+
+        result = client.publish(topic, message, qos=qos, retain=retain)
+
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            self.append(topic, message, qos, retain)
+            return None
+
+        if retain:
+            self._live_at[topic] = time.time()
+
+        return result
+
+    def append(self, topic, message, qos=1, retain=False) -> bool:
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+
+        topic_bytes = topic.encode("utf-8")
+        length = _RECORD.size + len(topic_bytes) + len(message)
+        record = (
+            _RECORD.pack(length, len(topic_bytes), qos, int(retain), time.time())
+            + topic_bytes
+            + message
+        )
+
+        cls = topic_class(topic)
+
+        with self._lock:
+            journal = self._journals.get(cls)
+            if journal is None:
+                journal = _ClassJournal(self.path / cls, self.segment_bytes)
+                self._journals[cls] = journal
+
+            if not journal.append(record):
+                if length + _RECORD.size > self.segment_bytes or not self._make_room():
+                    self.metrics["refused"] += 1
+                    return False
+                journal.roll()
+                journal.append(record)
+
+            self.metrics["spooled"] += 1
+            return True
+
+    def _make_room(self) -> bool:
+        """
+        Ensure one more segment fits under the cap (lock held).
+        """
+        while sum(len(j.segments) for j in self._journals.values()) >= self.max_segments:
+            victim = next(
+                (
+                    cls for cls in self.eviction_order
+                    if cls in self._journals and self._journals[cls].segments
+                ),
+                None,
+            )
+            if victim is None:
+                logger.error("Publish spool full (protected classes only)")
+                return False
+
+            self._journals[victim].evict_oldest()
+            self.metrics["segments_evicted"] += 1
+            self.evicted_per_class[victim] = self.evicted_per_class.get(victim, 0) + 1
+            logger.warning(f"Publish spool full — oldest {victim} segment evicted")
+
+        return True
+
+    def has_backlog(self, cls=None) -> bool:
+        """
+        Any class (cls=None) or one topic class has unreplayed records.
+        """
+        with self._lock:
+            if cls is not None:
+                journal = self._journals.get(cls)
+                return journal is not None and journal.has_backlog()
+            return any(j.has_backlog() for j in self._journals.values())
+
+    # =========================================================
+    # FORWARDER (CATCH-UP REPLAY)
+    # =========================================================
+    def _replay_order(self):
+        # Protected classes first, then the evictable ones last-evicted-first
+        # (lock held: append() may add journals)
+        evictable = [c for c in reversed(self.eviction_order) if c in self._journals]
+        protected = [c for c in self._journals if c not in self.eviction_order]
+        return protected + evictable
+
+    def _next_entry(self):
+        """
+        (journal, entry) of the first class in replay order with a
+        backlog, or (None, None). Lock held.
+        """
+        for cls in self._replay_order():
+            journal = self._journals[cls]
+            entry = journal.peek()
+            if entry is not None:
+                return journal, entry
+
+        return None, None
+
+    def _forward_loop(self):
+        interval = 1.0 / self.catchup_rate if self.catchup_rate else 0.0
+
+        while self._running:
+            if not self._client.is_connected():
+                time.sleep(0.5)
+                continue
+
+            with self._lock:
+                journal, entry = self._next_entry()
+                if entry is None:
+                    self._live_at.clear()
+
+            if entry is None:
+                time.sleep(0.5)
+                continue
+
+            topic, message, qos, retain, spooled_at, position = entry
+
+            # Topic published live since → replay as history only
+            if retain and self._live_at.get(topic, 0.0) >= spooled_at:
+                retain = False
+                self.metrics["replayed_unretained"] += 1
+
+            result = self._client.publish(topic, message, qos=qos, retain=retain)
+
+            if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                time.sleep(1.0)
+                continue
+
+            self.metrics["replayed"] += 1
+
+            with self._lock:
+                journal.advance(position)
+                if self.metrics["replayed"] % 100 == 0:
+                    journal.save_cursor()
+
+            if interval:
+                time.sleep(interval)
+
+    # =========================================================
+    # METRICS
+    # =========================================================
+    def get_status(self):
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "segments": {
+                    cls: len(j.segments) for cls, j in self._journals.items()
+                },
+                "backlog": any(j.has_backlog() for j in self._journals.values()),
+                "metrics": dict(self.metrics),
+                "evicted_per_class": dict(self.evicted_per_class),
+            }
+
+    # =========================================================
+    # STOP
+    # =========================================================
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+
+        with self._lock:
+            for journal in self._journals.values():
+                journal.close()
+
+        logger.info("Publish spool stopped cleanly")
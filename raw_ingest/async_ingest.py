@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import paho.mqtt.client as mqtt
+
+from raw_ingest.mqtt_listener import (
+    _parse_topic,
+    _rejected,
+    _subscribe,
+    decode_raw_payload,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncIngestScheduler:
+    """
+    asyncio ingest layer between MQTT receive and compute.
+
+    Features:
+    - Bounded per-point frame queues (receive never blocks on compute);
+      a full queue drops its oldest frame (counted per point) and the
+      point's next turn starts with on_gap(site, asset, point), so the
+      ring buffer restarts instead of joining non-adjacent chunks
+    - Every queued frame reaches the callback, in order
+    - Latest-wins coalescing of the window evaluation: a turn drains
+      the point's whole queue, evaluate=False for all but the newest
+      frame (one window computed per turn), counted per point
+    - At most one turn in flight per point (per-point ordering,
+      ring buffer / engine state touched by one worker at a time)
+    - Worker tasks run the blocking pipeline callback in an executor
+    - Backpressure metrics (queue depth, coalescing, ingest → start latency)
+
+    callback(site, asset, point, payload, evaluate=True)
+    on_gap(site, asset, point)  (executor thread, before the callback)
+    """
+
+    def __init__(self, callback, worker_count=2, queue_size=256, on_gap=None):
+        self.callback = callback
+        self.worker_count = worker_count
+        self.queue_size = queue_size
+        self.on_gap = on_gap
+
+        self._queues = {}          # point key → deque of frames
+        self._busy = set()         # point keys queued or in flight
+        self._gapped = set()       # point keys that lost frames to overflow
+        self._ready = None         # asyncio.Queue of point keys
+        self._executor = None
+        self._workers = []
+
+        # Metrics
+        self.metrics = {
+            "frames_received": 0,
+            "frames_processed": 0,
+            "frames_failed": 0,
+            "frames_dropped": 0,
+            "evaluations_coalesced": 0,
+            "max_queue_latency_sec": 0.0,
+        }
+        self.coalesced_per_point = {}
+        self.dropped_per_point = {}
+
+    # =========================================================
+    # START / STOP (inside the running loop)
+    # =========================================================
+    async def start(self):
+        self._ready = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.worker_count,
+            thread_name_prefix="IngestWorker",
+        )
+
+        for i in range(self.worker_count):
+            self._workers.append(
+                asyncio.create_task(self._worker_loop(), name=f"IngestWorker-{i+1}")
+            )
+
+        logger.info(f"Async ingest started with {self.worker_count} workers")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+        logger.info("Async ingest stopped cleanly")
+
+    # =========================================================
+    # RECEIVE SIDE (loop thread, never blocks)
+    # =========================================================
+    def submit(self, site, asset, point, payload):
+        key = (site, asset, point)
+        q = self._queues.get(key)
+
+        if q is None:
+            q = deque(maxlen=self.queue_size)
+            self._queues[key] = q
+
+        self.metrics["frames_received"] += 1
+
+        if len(q) == q.maxlen:
+            # append() evicts the oldest frame → stream has a hole
+            self.metrics["frames_dropped"] += 1
+            self.dropped_per_point[key] = self.dropped_per_point.get(key, 0) + 1
+            self._gapped.add(key)
+
+        q.append((time.monotonic(), payload))
+
+        if key not in self._busy:
+            self._busy.add(key)
+            self._ready.put_nowait(key)
+
+    # =========================================================
+    # SCHEDULER / WORKERS
+    # =========================================================
+    async def _worker_loop(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            key = await self._ready.get()
+            q = self._queues[key]
+
+            if not q:
+                self._busy.discard(key)
+                continue
+
+            frames = list(q)
+            q.clear()
+
+            gap = key in self._gapped
+            self._gapped.discard(key)
+
+            latency = time.monotonic() - frames[0][0]
+            if latency > self.metrics["max_queue_latency_sec"]:
+                self.metrics["max_queue_latency_sec"] = latency
+
+            coalesced = len(frames) - 1
+            if coalesced:
+                self.metrics["evaluations_coalesced"] += coalesced
+                self.coalesced_per_point[key] = (
+                    self.coalesced_per_point.get(key, 0) + coalesced
+                )
+
+            await loop.run_in_executor(
+                self._executor,
+                self._run_frames,
+                key,
+                [payload for _, payload in frames],
+                gap,
+            )
+
+            # Requeue the point behind the others (round robin)
+            if q:
+                self._ready.put_nowait(key)
+            else:
+                self._busy.discard(key)
+
+    def _run_frames(self, key, payloads, gap=False):
+        """
+        Executor side: every frame in order, only the newest evaluated
+        (after on_gap when older frames were dropped).
+        """
+        site, asset, point = key
+        last = len(payloads) - 1
+
+        if gap and self.on_gap:
+            try:
+                self.on_gap(site, asset, point)
+            except Exception:
+                logger.exception(f"Ingest gap handler failed for {site}/{asset}/{point}")
+
+        for i, payload in enumerate(payloads):
+            try:
+                self.callback(site, asset, point, payload, evaluate=i == last)
+                self.metrics["frames_processed"] += 1
+
+            except Exception:
+                self.metrics["frames_failed"] += 1
+                logger.exception(f"Ingest callback failed for {site}/{asset}/{point}")
+
+    # =========================================================
+    # METRICS
+    # =========================================================
+    def get_status(self):
+        # Called from other threads (engine status): snapshot the dicts
+        return {
+            "points": len(self._queues),
+            "queue_size": self.queue_size,
+            "queued_frames": sum(len(q) for q in list(self._queues.values())),
+            "ready_points": self._ready.qsize() if self._ready else 0,
+            "metrics": dict(self.metrics),
+            "coalesced_per_point": {
+                "/".join(k): v for k, v in list(self.coalesced_per_point.items())
+            },
+            "dropped_per_point": {
+                "/".join(k): v for k, v in list(self.dropped_per_point.items())
+            },
+        }
+
+
+# =========================================================
+# ASYNC MQTT LISTENER
+# =========================================================
+def start_async_mqtt_listener(
+    scheduler: AsyncIngestScheduler,
+    broker: str,
+    port: int,
+    topic: str,
+    validator=None,
+    on_reject=None,
+    on_frame=None,
+    stop_event=None,
+):
+    """
+    Alternative to start_mqtt_listener. The caller builds the
+    scheduler (pipeline callback with evaluate=, queue bound, on_gap)
+    and keeps it for get_status().
+
+    paho network thread: decode + parse topic + on_frame + validate →
+    hand over to the loop (rejected frames never reach the queues).
+    asyncio loop: per-point queues, coalescing, worker scheduling.
+    Blocks until stop_event (threading.Event) is set, forever without.
+    """
+    asyncio.run(
+        _run_async_listener(
+            scheduler, broker, port, topic,
+            validator, on_reject, on_frame, stop_event,
+        )
+    )
+
+
+async def _run_async_listener(
+    scheduler, broker, port, topic,
+    validator=None, on_reject=None, on_frame=None, stop_event=None,
+):
+    loop = asyncio.get_running_loop()
+
+    await scheduler.start()
+
+    # =========================================================
+    # ON CONNECT
+    # =========================================================
+    def on_connect(client, userdata, flags, rc):
+        if rc == 0:
+            print(f"[MQTT] Connected to {broker}:{port} (async ingest)")
+            _subscribe(client, topic)
+        else:
+            print(f"[MQTT] Connection failed with code {rc}")
+
+    # =========================================================
+    # ON MESSAGE (paho thread)
+    # =========================================================
+    def on_message(client, userdata, msg):
+        try:
+            payload = decode_raw_payload(msg.payload)
+            site, asset, point = _parse_topic(msg.topic)
+
+            if on_frame:
+                on_frame(site, asset, point, payload)
+
+            if _rejected(validator, on_reject, site, asset, point, payload):
+                return
+
+            loop.call_soon_threadsafe(
+                scheduler.submit, site, asset, point, payload
+            )
+
+        except Exception:
+            print("[MQTT] Message processing error:")
+            traceback.print_exc()
+
+    client = mqtt.Client()
+    client.on_connect = on_connect
+    client.on_message = on_message
+
+    client.connect(broker, port, keepalive=60)
+    client.loop_start()
+
+    try:
+        if stop_event is None:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.to_thread(stop_event.wait)
+    finally:
+        client.loop_stop()
+        client.disconnect()
+        await scheduler.stop()
@@ -0,0 +1,171 @@
+import json
+import struct
+import time
+
+import numpy as np
+
+
+# =========================================================
+# BINARY RAW FRAME (v2)
+# =========================================================
+#
+#   offset  size  field
+#   0       4     magic        b"VBRF"
+#   4       1     version      2 (1: no seq field, samples at 28)
+#   5       1     dtype code   1 = int16, 2 = float32, 3 = float64
+#   6       2     reserved     0
+#   8       4     fs           float32 (Hz)
+#   12      4     scale        float32 (g per count, 1.0 for floats)
+#   16      4     n_samples    uint32
+#   20      8     timestamp    float64 (epoch seconds)
+#   28      8     seq          int64, frame counter (-1: none)
+#   36      ...   samples      little-endian, n_samples × dtype
+#
+# seq feeds the ring buffer's gap / duplicate / restart detection,
+# like the "seq" field of JSON payloads.
+#
+# Topic: vibration/raw/{site}/{asset}/{point}[/bin]
+# The listener detects frames by magic bytes; the "/bin" suffix
+# is optional and only helps broker-side routing / ACLs.
+
+FRAME_MAGIC = b"VBRF"
+FRAME_VERSION = 2
+BINARY_TOPIC_SUFFIX = "bin"
+
+_HEADER_V1 = struct.Struct("<4sBBHffId")
+_HEADER = struct.Struct("<4sBBHffIdq")
+_HEADERS = {1: _HEADER_V1, 2: _HEADER}
+HEADER_SIZE = _HEADER.size
+
+_DTYPES = {
+    1: np.dtype("<i2"),
+    2: np.dtype("<f4"),
+    3: np.dtype("<f8"),
+}
+_DTYPE_CODES = {
+    "int16": 1,
+    "float32": 2,
+    "float64": 3,
+}
+
+
+def is_binary_frame(payload) -> bool:
+    return len(payload) >= _HEADER_V1.size and payload[:4] == FRAME_MAGIC
+
+
+def encode_frame(
+    acc, fs, timestamp=None, dtype="float32", scale=None, seq=None
+) -> bytes:
+    """
+    Encode an acceleration window (g) into a binary raw frame.
+
+    dtype="int16": samples quantized with `scale` g/count
+                   (default: full scale = max |acc|)
+    dtype="float64": lossless for JSON-sourced samples (recorder)
+    seq: frame counter for gap / duplicate detection (None → -1)
+    """
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported frame dtype: {dtype}")
+
+    acc = np.asarray(acc, dtype=np.float64).ravel()
+    code = _DTYPE_CODES[dtype]
+
+    if dtype == "int16":
+        if scale is None:
+            peak = float(np.max(np.abs(acc))) if acc.size else 0.0
+            scale = peak / 32767.0 if peak > 0 else 1.0
+        samples = np.clip(np.round(acc / scale), -32768, 32767).astype("<i2")
+    else:
+        scale = 1.0 if scale is None else scale
+        samples = (acc / scale).astype(_DTYPES[code])
+
+    header = _HEADER.pack(
+        FRAME_MAGIC,
+        FRAME_VERSION,
+        code,
+        0,
+        float(fs),
+        float(scale),
+        samples.size,
+        time.time() if timestamp is None else float(timestamp),
+        -1 if seq is None else int(seq),
+    )
+
+    return header + samples.tobytes()
+
+
+def encode_raw_message(topic, payload, acc, fs, payload_format="json", dtype="float32"):
+    """
+    Publisher-side helper for generators and simulators.
+
+    payload_format="json"   → (topic, JSON payload)
+    payload_format="binary" → (topic + "/bin", binary frame of acc)
+    """
+    if payload_format == "binary":
+        frame = encode_frame(
+            acc,
+            fs,
+            timestamp=payload.get("timestamp"),
+            dtype=dtype,
+            seq=payload.get("seq"),
+        )
+        return f"{topic}/{BINARY_TOPIC_SUFFIX}", frame
+
+    return topic, json.dumps(payload)
+
+
+def decode_frame(payload) -> dict:
+    """
+    Decode a binary raw frame into the listener's raw_payload dict.
+
+    float32 / float64 frames with scale 1.0 are returned as a read-only
+    view on the MQTT payload buffer (no copy); int16 frames are scaled
+    to float32 in one vectorized pass.
+    """
+    if len(payload) < _HEADER_V1.size:
+        raise ValueError("Binary frame shorter than header")
+
+    magic, version = struct.unpack_from("<4sB", payload)
+
+    if magic != FRAME_MAGIC:
+        raise ValueError("Not a binary raw frame")
+
+    header = _HEADERS.get(version)
+    if header is None:
+        raise ValueError(f"Unsupported binary frame version: {version}")
+
+    if len(payload) < header.size:
+        raise ValueError("Binary frame shorter than header")
+
+    _, _, code, _, fs, scale, n, ts, *seq = header.unpack_from(payload)
+
+    if code not in _DTYPES:
+        raise ValueError(f"Unsupported binary frame dtype code: {code}")
+
+    dtype = _DTYPES[code]
+    expected = header.size + n * dtype.itemsize
+
+    if len(payload) < expected:
+        raise ValueError(
+            f"Truncated binary frame: {len(payload)} < {expected} bytes"
+        )
+
+    samples = np.frombuffer(payload, dtype=dtype, count=n, offset=header.size)
+
+    if code == 1:
+        samples = samples.astype(np.float32) * np.float32(scale)
+    elif scale != 1.0:
+        samples = samples * samples.dtype.type(scale)
+
+    frame = {
+        "acceleration": samples,
+        "fs": fs,
+        "n_samples": n,
+        "timestamp": ts,
+        "format": "binary",
+    }
+
+    if seq and seq[0] >= 0:
+        frame["seq"] = seq[0]
+
+    return frame
@@ -2,18 +2,35 @@ import json
 import traceback
 import paho.mqtt.client as mqtt
 
+from raw_ingest.frame_codec import (
+    BINARY_TOPIC_SUFFIX,
+    decode_frame,
+    is_binary_frame,
+)
+
 
 def start_mqtt_listener(
     callback,
     broker: str,
     port: int,
     topic: str,
+    validator=None,
+    on_reject=None,
+    on_frame=None,
+    stop_event=None,
 ):
     """
     Multi-Site MQTT Listener
     -------------------------
     Expected RAW Topic:
-        vibration/raw/{site}/{asset}/{point}
+        vibration/raw/{site}/{asset}/{point}[/bin]
+
+    topic: one subscription filter or a list of them
+    (clustered mode subscribes per owned asset)
+
+    Payload:
+        - binary raw frame (raw_ingest.frame_codec, magic b"VBRF")
+        - JSON object with "acceleration" list (fallback)
 
     Callback signature:
         callback(
@@ -22,6 +39,16 @@ def start_mqtt_listener(
             point: str,
             raw_payload: dict
         )
+
+    Validation (optional, before the callback / ring buffer):
+        validator.check(payload) → rejection reason or None
+        on_reject(site_id, asset_id, point, reason)
+
+    on_frame(site_id, asset_id, point, payload): every decoded frame,
+    before validation (e.g. RawRecorder.record)
+
+    Blocks until stop_event (threading.Event) is set, then disconnects;
+    forever without one (client.loop_forever()).
     """
 
     # =========================================================
@@ -30,8 +57,7 @@ def start_mqtt_listener(
     def on_connect(client, userdata, flags, rc):
         if rc == 0:
             print(f"[MQTT] Connected to {broker}:{port}")
-            client.subscribe(topic)
-            print(f"[MQTT] Subscribed to: {topic}")
+            _subscribe(client, topic)
         else:
             print(f"[MQTT] Connection failed with code {rc}")
 
@@ -40,10 +66,16 @@ def start_mqtt_listener(
     # =========================================================
     def on_message(client, userdata, msg):
         try:
-            payload = json.loads(msg.payload.decode())
+            payload = decode_raw_payload(msg.payload)
 
             site, asset, point = _parse_topic(msg.topic)
 
+            if on_frame:
+                on_frame(site, asset, point, payload)
+
+            if _rejected(validator, on_reject, site, asset, point, payload):
+                return
+
             callback(
                 site_id=site,
                 asset_id=asset,
@@ -63,7 +95,69 @@ def start_mqtt_listener(
     client.on_message = on_message
 
     client.connect(broker, port, keepalive=60)
-    client.loop_forever()
+
+    if stop_event is None:
+        client.loop_forever()
+        return
+
+    client.loop_start()
+    try:
+        stop_event.wait()
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+# =========================================================
+# SUBSCRIBE
+# =========================================================
+def _subscribe(client, topic):
+    """
+    Subscribe to one filter or a list of filters (single SUBSCRIBE).
+    """
+    topics = [topic] if isinstance(topic, str) else list(topic)
+
+    if not topics:
+        print("[MQTT] No raw topics to subscribe to")
+        return
+
+    client.subscribe([(t, 0) for t in topics])
+
+    for t in topics:
+        print(f"[MQTT] Subscribed to: {t}")
+
+
+# =========================================================
+# VALIDATION GATE
+# =========================================================
+def _rejected(validator, on_reject, site, asset, point, payload) -> bool:
+    """
+    True when the frame failed validation (reported via on_reject).
+    """
+    if validator is None:
+        return False
+
+    reason = validator.check(payload)
+    if reason is None:
+        return False
+
+    if on_reject:
+        on_reject(site, asset, point, reason)
+
+    return True
+
+
+# =========================================================
+# PAYLOAD DECODER
+# =========================================================
+def decode_raw_payload(data: bytes) -> dict:
+    """
+    Binary frame (np.frombuffer, no copy) or legacy JSON.
+    """
+    if is_binary_frame(data):
+        return decode_frame(data)
+
+    return json.loads(data.decode())
 
 
 # =========================================================
@@ -78,10 +172,15 @@ def _parse_topic(topic: str):
 
     Single-site (legacy):
         vibration/raw/<ASSET>/<POINT>
+
+    Both accept a trailing "/bin" (binary frame topics).
     """
 
     parts = topic.split("/")
 
+    if parts[-1] == BINARY_TOPIC_SUFFIX:
+        parts = parts[:-1]
+
     if len(parts) == 5:
         # Multi-site
         _, _, site, asset, point = parts
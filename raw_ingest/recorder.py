@@ -0,0 +1,366 @@
+import json
+import logging
+import mmap
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from raw_ingest.frame_codec import decode_frame, encode_frame
+from raw_ingest.mqtt_listener import _rejected
+
+logger = logging.getLogger(__name__)
+
+
+# =========================================================
+# RAW STREAM ARCHIVE (MEMORY-MAPPED, CHUNKED)
+# =========================================================
+#
+#   <archive>/
+#     archive.json        {"version": 2}   (missing → version 1)
+#     points.json         ["site/asset/point", ...]   (point id = position)
+#     index.bin           one INDEX_DTYPE record per frame, append-only
+#     chunk_00000.bin     records, fixed-size mmap'd chunks
+#     chunk_00001.bin     (last chunk truncated to its used size on close)
+#
+#   record = <RECORD header> + binary raw frame (frame_codec; float32
+#            for binary-sourced frames, float64 for JSON-sourced ones)
+#
+# Records never straddle chunks; index rows point at (chunk, offset),
+# so one point's frames can be read without scanning the others.
+
+# v1: frame length, point id, rpm (NaN: none)
+# v2: + seq, sample_index (-1: none) → gap detection replays as recorded
+_RECORD_V1 = struct.Struct("<IHxxf")
+_RECORD = struct.Struct("<IHxxfqq")
+_RECORDS = {1: _RECORD_V1, 2: _RECORD}
+
+ARCHIVE_VERSION = 2
+
+INDEX_DTYPE = np.dtype([
+    ("point", "<u2"),
+    ("chunk", "<u4"),
+    ("offset", "<u8"),
+    ("t_recv", "<f8"),      # receive time (replay pacing)
+    ("n_samples", "<u4"),
+])
+
+ARCHIVE_FILE = "archive.json"
+POINTS_FILE = "points.json"
+INDEX_FILE = "index.bin"
+
+
+def _chunk_name(chunk: int) -> str:
+    return f"chunk_{chunk:05d}.bin"
+
+
+# =========================================================
+# RECORDER
+# =========================================================
+class RawRecorder:
+    """
+    Append incoming raw frames to an archive directory.
+
+    Features:
+    - Records frames before validation (rejects replay as rejects)
+    - Samples stored as binary frames (same codec as the wire) in the
+      received precision: float32 arrays (decoded binary frames) as
+      float32, JSON lists as float64 → replay is lossless
+    - Fixed-size mmap'd chunks, rolled over when full
+    - Per-frame index row (point id, chunk, offset, receive time)
+    - rpm, seq and sample_index kept in the record header
+    - Thread-safe record() (sync listener or async ingest workers)
+    """
+
+    def __init__(self, path, chunk_size=64 * 2**20, default_fs=None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        if (self.path / INDEX_FILE).exists():
+            raise FileExistsError(f"Archive already exists: {self.path}")
+
+        self.chunk_size = int(chunk_size)
+        self.default_fs = default_fs
+
+        with open(self.path / ARCHIVE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"version": ARCHIVE_VERSION}, f)
+
+        self._lock = threading.Lock()
+        self._points = {}
+        self._index = open(self.path / INDEX_FILE, "ab")
+
+        self._chunk = -1
+        self._file = None
+        self._map = None
+        self._pos = 0
+
+        self.metrics = {
+            "frames_recorded": 0,
+            "frames_unrecordable": 0,
+            "bytes_recorded": 0,
+            "chunks": 0,
+        }
+
+    # =========================================================
+    # PUBLIC API
+    # =========================================================
+    def record(self, site, asset, point, payload, t_recv=None) -> bool:
+        """
+        Archive one frame as received. False when it carries no numeric
+        samples (nothing to replay). Leaves payload["acceleration"] as
+        the converted array, so validation does not parse it again.
+        """
+        try:
+            acc = np.asarray(payload["acceleration"])
+            if acc.dtype != np.float32:
+                acc = acc.astype(np.float64)
+        except (KeyError, TypeError, ValueError):
+            self.metrics["frames_unrecordable"] += 1
+            return False
+
+        acc = acc.ravel()
+        payload["acceleration"] = acc
+
+        fs = payload.get("fs") or self.default_fs
+        rpm = payload.get("rpm")
+
+        frame = encode_frame(
+            acc,
+            fs,
+            timestamp=payload.get("timestamp"),
+            dtype="float32" if acc.dtype == np.float32 else "float64",
+        )
+        rpm = float("nan") if rpm is None else float(rpm)
+        seq = _counter(payload.get("seq"))
+        sample_index = _counter(payload.get("sample_index"))
+        size = _RECORD.size + len(frame)
+
+        with self._lock:
+            point_id = self._point_id(f"{site}/{asset}/{point}")
+            header = _RECORD.pack(len(frame), point_id, rpm, seq, sample_index)
+
+            if self._map is None or self._pos + size > self.chunk_size:
+                self._roll(max(size, self.chunk_size))
+
+            offset = self._pos
+            self._map[offset:offset + len(header)] = header
+            self._map[offset + len(header):offset + size] = frame
+            self._pos += size
+
+            row = np.zeros(1, dtype=INDEX_DTYPE)
+            row["point"] = point_id
+            row["chunk"] = self._chunk
+            row["offset"] = offset
+            row["t_recv"] = time.time() if t_recv is None else t_recv
+            row["n_samples"] = len(acc)
+            self._index.write(row.tobytes())
+
+            self.metrics["frames_recorded"] += 1
+            self.metrics["bytes_recorded"] += size
+
+        return True
+
+    def close(self):
+        with self._lock:
+            self._close_chunk()
+            self._index.close()
+
+        logger.info(
+            f"Recorder closed: {self.metrics['frames_recorded']} frames, "
+            f"{self.metrics['bytes_recorded'] / 2**20:.1f} MiB "
+            f"in {self.metrics['chunks']} chunks"
+        )
+
+    def get_status(self):
+        return {
+            "path": str(self.path),
+            "points": len(self._points),
+            "metrics": dict(self.metrics),
+        }
+
+    # =========================================================
+    # INTERNAL
+    # =========================================================
+    def _point_id(self, key):
+        point_id = self._points.get(key)
+
+        if point_id is None:
+            point_id = len(self._points)
+            self._points[key] = point_id
+
+            with open(self.path / POINTS_FILE, "w", encoding="utf-8") as f:
+                json.dump(list(self._points), f)
+
+        return point_id
+
+    def _roll(self, size):
+        self._close_chunk()
+
+        self._chunk += 1
+        self._file = open(self.path / _chunk_name(self._chunk), "w+b")
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._pos = 0
+
+        self.metrics["chunks"] += 1
+
+    def _close_chunk(self):
+        if self._map is None:
+            return
+
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._pos)
+        self._file.close()
+
+        self._map = None
+        self._file = None
+        self._index.flush()
+
+
+def _counter(value):
+    return -1 if value is None else int(value)
+
+
+# =========================================================
+# READER
+# =========================================================
+class RawArchive:
+    """
+    Read-only view of a recorded archive (chunks mmap'd, index in memory).
+    read() copies one frame out of the map, so payloads stay valid
+    after close().
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+        version = 1
+        if (self.path / ARCHIVE_FILE).exists():
+            with open(self.path / ARCHIVE_FILE, "r", encoding="utf-8") as f:
+                version = json.load(f)["version"]
+
+        if version not in _RECORDS:
+            raise ValueError(f"Unsupported archive version: {version}")
+
+        self.version = version
+        self._record = _RECORDS[version]
+
+        with open(self.path / POINTS_FILE, "r", encoding="utf-8") as f:
+            self.points = [tuple(key.split("/")) for key in json.load(f)]
+
+        self.index = np.fromfile(self.path / INDEX_FILE, dtype=INDEX_DTYPE)
+
+        self._files = []
+        self._maps = []
+        for chunk in range(int(self.index["chunk"].max()) + 1 if len(self.index) else 0):
+            f = open(self.path / _chunk_name(chunk), "rb")
+            self._files.append(f)
+            self._maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return len(self.index)
+
+    def point_index(self, site, asset, point):
+        """
+        Index rows of one point, in recording order.
+        """
+        point_id = self.points.index((site, asset, point))
+        return self.index[self.index["point"] == point_id]
+
+    def read(self, row):
+        """
+        (site, asset, point, raw_payload) for one index row.
+        """
+        buf = self._maps[int(row["chunk"])]
+        offset = int(row["offset"])
+
+        length, point_id, rpm, *counters = self._record.unpack_from(buf, offset)
+        start = offset + self._record.size
+
+        payload = decode_frame(buf[start:start + length])
+        if not np.isnan(rpm):
+            payload["rpm"] = rpm
+
+        for name, value in zip(("seq", "sample_index"), counters):
+            if value >= 0:
+                payload[name] = value
+
+        site, asset, point = self.points[point_id]
+        return site, asset, point, payload
+
+    def frames(self, rows=None):
+        for row in self.index if rows is None else rows:
+            yield (row["t_recv"],) + self.read(row)
+
+    def close(self):
+        for m in self._maps:
+            m.close()
+        for f in self._files:
+            f.close()
+
+
+# =========================================================
+# REPLAY
+# =========================================================
+def replay_archive(
+    path,
+    callback,
+    speed=1.0,
+    validator=None,
+    on_reject=None,
+):
+    """
+    Feed an archive into the pipeline with the listener's callback
+    signature, in recording order.
+
+    speed: 1.0 → real time, N → N× faster, 0 / None → as fast as possible
+    Returns replay stats (frames, elapsed, frames/s, pacing lag).
+    """
+    archive = RawArchive(path)
+
+    stats = {
+        "frames": 0,
+        "frames_rejected": 0,
+        "elapsed_sec": 0.0,
+        "max_lag_sec": 0.0,
+    }
+
+    t_start = time.monotonic()
+    t_first = float(archive.index["t_recv"][0]) if len(archive) else 0.0
+
+    try:
+        for t_recv, site, asset, point, payload in archive.frames():
+
+            if speed:
+                due = t_start + (t_recv - t_first) / speed
+                wait = due - time.monotonic()
+
+                if wait > 0:
+                    time.sleep(wait)
+                elif -wait > stats["max_lag_sec"]:
+                    stats["max_lag_sec"] = -wait
+
+            if _rejected(validator, on_reject, site, asset, point, payload):
+                stats["frames_rejected"] += 1
+                continue
+
+            callback(
+                site_id=site,
+                asset_id=asset,
+                point=point,
+                raw_payload=payload,
+            )
+            stats["frames"] += 1
+
+    finally:
+        archive.close()
+
+    stats["elapsed_sec"] = time.monotonic() - t_start
+    stats["frames_per_sec"] = (
+        stats["frames"] / stats["elapsed_sec"] if stats["elapsed_sec"] else 0.0
+    )
+
+    return stats
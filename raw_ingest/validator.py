@@ -1,3 +1,8 @@
+import time
+
+import numpy as np
+
+
 def validate_raw_payload(payload: dict) -> bool:
     required = ["asset_id", "point", "timestamp", "acceleration", "temperature", "speed"]
     for key in required:
@@ -8,3 +13,139 @@ def validate_raw_payload(payload: dict) -> bool:
         return False
 
     return True
+
+
+# =========================================================
+# VECTORIZED FRAME VALIDATION (BEFORE RING BUFFER)
+# =========================================================
+class RawFrameValidator:
+    """
+    Fast NumPy checks on one decoded raw frame.
+    check() returns None (accept) or a rejection reason:
+
+    - no_samples     : missing / non-numeric / empty acceleration
+    - sample_count   : outside [min_samples, max_samples] or not
+                       matching the declared n_samples
+    - fs_mismatch    : declared fs differs from expected_fs
+    - non_finite     : NaN / Inf present
+    - stuck_sensor   : peak-to-peak below min_range_g (constant output)
+    - saturated      : share of samples at full scale above max_clip_ratio
+                       (sensor range full_scale_g; skipped when unset)
+
+    Accepted frames leave with payload["acceleration"] as a 1-D float
+    array, so the ring buffer does not convert again: float arrays
+    (decoded binary frames) keep their dtype, JSON lists are parsed
+    once into `dtype` (the ring buffer's dtype).
+    """
+
+    def __init__(
+        self,
+        expected_fs=None,
+        fs_tolerance=0.01,
+        min_samples=1,
+        max_samples=None,
+        min_range_g=1e-6,
+        full_scale_g=None,
+        max_clip_ratio=0.01,
+        dtype="float64",
+    ):
+        self.expected_fs = expected_fs
+        self.fs_tolerance = fs_tolerance
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.min_range_g = min_range_g
+        self.full_scale_g = full_scale_g
+        self.max_clip_ratio = max_clip_ratio
+        self.dtype = np.dtype(dtype)
+
+    def check(self, payload):
+        if not isinstance(payload, dict) or "acceleration" not in payload:
+            return "no_samples"
+
+        acc = payload["acceleration"]
+
+        if not (isinstance(acc, np.ndarray) and acc.dtype.kind == "f"):
+            try:
+                acc = np.asarray(acc, dtype=self.dtype)
+            except (TypeError, ValueError):
+                return "no_samples"
+
+        acc = acc.ravel()
+        payload["acceleration"] = acc
+
+        n = acc.size
+        if n == 0:
+            return "no_samples"
+
+        # -----------------------------
+        # SAMPLE COUNT / SAMPLING RATE
+        # -----------------------------
+        if n < self.min_samples:
+            return "sample_count"
+
+        if self.max_samples and n > self.max_samples:
+            return "sample_count"
+
+        declared = payload.get("n_samples")
+        if declared is not None and int(declared) != n:
+            return "sample_count"
+
+        fs = payload.get("fs")
+        if self.expected_fs and fs is not None:
+            if abs(fs - self.expected_fs) > self.fs_tolerance * self.expected_fs:
+                return "fs_mismatch"
+
+        # -----------------------------
+        # SIGNAL INTEGRITY
+        # -----------------------------
+        if not np.isfinite(acc).all():
+            return "non_finite"
+
+        if acc.max() - acc.min() < self.min_range_g:
+            return "stuck_sensor"
+
+        if self.full_scale_g:
+            # Small margin: int16 counts are scaled in float32
+            clipped = np.count_nonzero(np.abs(acc) >= 0.9999 * self.full_scale_g)
+            if clipped > max(2, self.max_clip_ratio * n):
+                return "saturated"
+
+        return None
+
+
+# =========================================================
+# QUARANTINE BOOKKEEPING
+# =========================================================
+class QuarantineCounter:
+    """
+    Per-point rejected-frame counters.
+    record() returns True when a diagnostics report is due
+    (first rejection, then at most every report_interval_sec).
+    """
+
+    def __init__(self, report_interval_sec=60):
+        self.report_interval_sec = report_interval_sec
+        self.counts = {}        # (site, asset, point) → {reason: count}
+        self._last_report = {}
+
+    def record(self, site, asset, point, reason) -> bool:
+        key = (site, asset, point)
+
+        reasons = self.counts.setdefault(key, {})
+        reasons[reason] = reasons.get(reason, 0) + 1
+
+        now = time.time()
+        last = self._last_report.get(key)
+
+        if last is None or now - last >= self.report_interval_sec:
+            self._last_report[key] = now
+            return True
+
+        return False
+
+    def snapshot(self, site, asset, point) -> dict:
+        reasons = dict(self.counts.get((site, asset, point), {}))
+        return {
+            "rejected_total": sum(reasons.values()),
+            "rejected_by_reason": reasons,
+        }
@@ -1,13 +1,22 @@
+import argparse
+import logging
 import time
+import threading
+
+import numpy as np
 
 from config.config_loader import load_config
-from core.ring_buffer import RingBufferManager
-from core.l1_feature_pipeline import L1FeaturePipeline
+from core.ring_buffer import SEQ_DUPLICATE, RingBufferManager
+from core.l1_feature_pipeline import L1FeaturePipeline, resolve_feature_profile
+from core.compute_pool import ShardedComputePool
+from core.dispatcher import MicroBatchDispatcher
+from core.cluster import owned_assets, partition_topics, resolve_cluster
 
 from early_fault.scoring import EarlyFaultFSM
-from health.point_health_index import compute_phi
+from health.point_health_index import compute_phi, compute_phi_batch
 from health.state_mapping import phi_to_state
-from health.asset_health_index import compute_asset_health
+from health.asset_health_tracker import AssetHealthTracker
+from health.fleet_rollup import FleetRollup
 
 from analytics.recommendation.recommendation_engine import RecommendationEngine
 from analytics.recommendation.asset_recommendation_engine import asset_recommendation
@@ -16,7 +25,14 @@ from diagnostic_l2.l2_queue import L2JobQueue
 from diagnostic_l2.worker import l2_worker
 
 from publish.mqtt_publisher import MQTTPublisher
+from publish.change_filter import ChangeFilter
+from publish.outbox import PublishOutbox
+from publish.spool import PublishSpool
+from publish.l1_aggregator import L1Aggregator
 from raw_ingest.mqtt_listener import start_mqtt_listener
+from raw_ingest.async_ingest import AsyncIngestScheduler, start_async_mqtt_listener
+from raw_ingest.validator import QuarantineCounter, RawFrameValidator
+from raw_ingest.recorder import RawRecorder, replay_archive
 
 from early_fault.baseline import AdaptiveBaseline
 from early_fault.trend_detector import TrendDetector
@@ -26,7 +42,61 @@ from early_fault.persistence import PersistenceChecker
 # =========================================================
 # MAIN
 # =========================================================
-def main():
+def check_micro_batch_config(l1_cfg, topology_cfg):
+    """
+    compute_batch() is single rate, full feature set, shared spectrum.
+    Multirate would silently change velocity values → error; per-point
+    profiles / shared_spectrum: false only cost compute → warning.
+    """
+    if l1_cfg.get("multirate", {}).get("enable", False):
+        raise ValueError(
+            "compute.micro_batch does not support l1_feature.multirate "
+            "(disable one of them)"
+        )
+
+    if not l1_cfg.get("shared_spectrum", True):
+        print("⚠️ [MICRO-BATCH] shared_spectrum: false ignored (batch uses one rFFT)")
+
+    profiles = topology_cfg.get("feature_profiles", {})
+    default = topology_cfg.get("default_feature_profile")
+    restricted = sorted({
+        point_cfg.get("feature_profile", default)
+        for site in topology_cfg.get("sites", {}).values()
+        for asset in site.get("assets", {}).values()
+        for point_cfg in asset.get("points", {}).values()
+        if resolve_feature_profile(
+            profiles, point_cfg.get("feature_profile", default)
+        ) is not None
+    })
+    if restricted:
+        print(
+            f"⚠️ [MICRO-BATCH] feature profiles {restricted} ignored "
+            f"(batch computes the full feature set)"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Vibralyzer v4 engine")
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="feed a recorded raw archive instead of the MQTT listener",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="replay speed: 1 = real time, N = N× faster, 0 = max",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None, stop_event=None):
+    # stop_event (threading.Event): set → listener returns, queued
+    # windows finish, publisher flushes (embedding / tests); None → run
+    # until interrupted
+
+    args = parse_args(argv)
 
     # -----------------------------------------------------
     # LOAD CONFIG
@@ -34,24 +104,143 @@ def main():
     system_cfg = load_config("config/system.yaml")
     topology_cfg = load_config("config/config.yaml")
 
+    # Component reports (outbox, spool, micro-batch, compute pool) use logging
+    logging.basicConfig(
+        level=system_cfg.get("system", {}).get("log_level", "INFO"),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
     mqtt_cfg = system_cfg["mqtt"]
     raw_cfg = system_cfg["raw"]
     l1_cfg = system_cfg["l1_feature"]
     early_cfg = system_cfg["early_fault"]
     l2_cfg = system_cfg["l2"]
+    compute_cfg = system_cfg.get("compute", {})
+    ingest_cfg = system_cfg.get("ingest", {})
+    validation_cfg = system_cfg.get("validation", {})
+    record_cfg = system_cfg.get("record", {})
+    publish_cfg = system_cfg.get("publish", {})
+
+    # 🔥 Clustered mode: this instance owns a deterministic asset subset
+    instance_count, instance_index = resolve_cluster(system_cfg.get("cluster"))
+
+    if instance_count > 1:
+        raw_topics = partition_topics(
+            mqtt_cfg["raw_topic"],
+            owned_assets(topology_cfg, instance_count, instance_index),
+        )
+        client_id = f"vibralyzer_v4_{instance_index}"
+        print(
+            f"[CLUSTER] Instance {instance_index}/{instance_count} "
+            f"owns {len(raw_topics)} assets"
+        )
+    else:
+        raw_topics = mqtt_cfg["raw_topic"]
+        client_id = "vibralyzer_v4"
+
+    compute_dtype = l1_cfg.get("dtype", "float64")
+    multirate_cfg = l1_cfg.get("multirate", {})
 
     # -----------------------------------------------------
     # CORE INIT
     # -----------------------------------------------------
     ring_buffer = RingBufferManager(
-        window_size=raw_cfg["window_size"]
+        window_size=raw_cfg["window_size"],
+        dtype=compute_dtype,
+        hop_size=RingBufferManager.resolve_hop(
+            raw_cfg["window_size"],
+            hop_size=raw_cfg.get("hop_size"),
+            overlap=raw_cfg.get("overlap"),
+        ),
+        fs=l1_cfg["sampling_rate"],
+        gap_policy=raw_cfg.get("gap_policy", "reset"),
+        timestamp_gaps=raw_cfg.get("timestamp_gaps", False),
+        timestamp_tolerance=raw_cfg.get("timestamp_tolerance_sec", 0.005),
+        restart_jump=raw_cfg.get("restart_jump", 8),
     )
 
+    # 🔥 Change-only publishing for retained topics
+    change_cfg = publish_cfg.get("change_only", {})
+    change_filter = None
+    if change_cfg.get("enable", False):
+        change_filter = ChangeFilter(
+            deadbands=change_cfg.get("deadbands"),
+            max_silence_sec=change_cfg.get("max_silence_sec", 300),
+        )
+
+    # 🔥 Publish outbox (sender thread, QoS per topic class, bounded)
+    outbox_cfg = publish_cfg.get("outbox", {})
+    outbox = None
+    if outbox_cfg.get("enable", False):
+        outbox = PublishOutbox(
+            maxsize=outbox_cfg.get("maxsize", 10000),
+            qos_policy=outbox_cfg.get("qos"),
+            bulk_classes=outbox_cfg.get("bulk_classes", ["l1", "bundle"]),
+            drop_policy=outbox_cfg.get("drop_policy", "drop_oldest"),
+            ack_timeout_sec=outbox_cfg.get("ack_timeout_sec", 60),
+        )
+
+    # 🔥 Store-and-forward spool (broker outages)
+    spool_cfg = publish_cfg.get("spool", {})
+    spool = None
+    if spool_cfg.get("enable", False):
+        spool = PublishSpool(
+            spool_cfg.get("path", "spool/publish"),
+            max_bytes=spool_cfg.get("max_mb", 512) * 2**20,
+            segment_bytes=spool_cfg.get("segment_mb", 4) * 2**20,
+            catchup_rate=spool_cfg.get("catchup_rate", 200),
+            eviction_order=spool_cfg.get(
+                "eviction_order",
+                ["l1", "bundle", "recommendation", "asset"],
+            ),
+        )
+
+    # 🔥 L1 temporal aggregation (full rate only outside NORMAL)
+    agg_cfg = publish_cfg.get("l1_aggregate", {})
+    status_cfg = publish_cfg.get("status", {})
+    l1_aggregator = None
+    if agg_cfg.get("enable", False):
+        l1_aggregator = L1Aggregator(interval_sec=agg_cfg.get("interval_sec", 60))
+
     publisher = MQTTPublisher(
         broker=mqtt_cfg["broker"],
-        port=mqtt_cfg["port"]
+        port=mqtt_cfg["port"],
+        client_id=client_id,
+        output_mode=publish_cfg.get("output_mode", "legacy"),
+        asset_interval_sec=publish_cfg.get("asset_interval_sec", 5.0),
+        change_filter=change_filter,
+        outbox=outbox,
+        spool=spool,
+        encodings=publish_cfg.get("encoding"),
+        l1_aggregator=l1_aggregator,
+        full_rate_states=agg_cfg.get("full_rate_states", ["WATCH", "WARNING", "ALARM"]),
+        fleet_partition=instance_index if instance_count > 1 else None,
+        status_interval_sec=(
+            status_cfg.get("interval_sec", 30)
+            if status_cfg.get("enable", True) else None
+        ),
     )
 
+    publisher.add_status_source("ring_buffer", ring_buffer.get_status)
+
+    # 🔥 Raw frame validation (before ring buffer, no compute on rejects)
+    validator = None
+    quarantine = None
+    if validation_cfg.get("enable", True):
+        validator = RawFrameValidator(
+            expected_fs=l1_cfg["sampling_rate"],
+            fs_tolerance=validation_cfg.get("fs_tolerance", 0.01),
+            min_samples=validation_cfg.get("min_samples", 1),
+            max_samples=validation_cfg.get("max_samples"),
+            min_range_g=validation_cfg.get("min_range_g", 1e-6),
+            full_scale_g=validation_cfg.get("full_scale_g"),
+            max_clip_ratio=validation_cfg.get("max_clip_ratio", 0.01),
+            dtype=compute_dtype,
+        )
+        quarantine = QuarantineCounter(
+            report_interval_sec=validation_cfg.get("report_interval_sec", 60),
+        )
+
     recommendation_engine = RecommendationEngine()
     l2_queue = L2JobQueue()
 
@@ -60,8 +249,54 @@ def main():
 
     engines = {}
 
-    # 🔥 NEW: Point Health Cache (for asset aggregation)
-    point_health_cache = {}
+    # 🔥 Micro-batched L1 (vectorized over ready windows of all points)
+    batch_cfg = compute_cfg.get("micro_batch", {})
+    dispatcher = None
+    batch_l1 = None
+    if batch_cfg.get("enable", False):
+        check_micro_batch_config(l1_cfg, topology_cfg)
+        batch_l1 = L1FeaturePipeline(
+            fs=l1_cfg["sampling_rate"],
+            rpm=l1_cfg["rpm_default"],
+            dtype=compute_dtype,
+        )
+        dispatcher = MicroBatchDispatcher(
+            lambda items: process_l1_batch(items),
+            time_slice_ms=batch_cfg.get("time_slice_ms", 20),
+            max_batch=batch_cfg.get("max_batch", 64),
+        )
+
+    # 🔥 Sharded L1 compute tier (0 workers → inline in MQTT thread)
+    compute_pool = None
+    if dispatcher is None and compute_cfg.get("workers", 0) > 0:
+        compute_pool = ShardedComputePool(
+            worker_count=compute_cfg["workers"],
+            window_size=raw_cfg["window_size"],
+            slots_per_worker=compute_cfg.get("slots_per_worker", 4),
+            dtype=compute_dtype,
+        )
+
+    # 🔥 Incremental asset health (worst point per asset, O(log n))
+    asset_health_tracker = AssetHealthTracker()
+
+    # 🔥 Site / fleet rollups → one retained snapshot topic
+    fleet_cfg = publish_cfg.get("fleet_snapshot", {})
+    fleet_rollup = None
+    if fleet_cfg.get("enable", False):
+        fleet_rollup = FleetRollup(
+            bin_width=fleet_cfg.get("phi_bin_width", 10),
+            snapshot_interval_sec=fleet_cfg.get("snapshot_interval_sec", 10),
+            include_assets=fleet_cfg.get("include_assets", True),
+            partition=(
+                (instance_index, instance_count) if instance_count > 1 else None
+            ),
+        )
+
+    # Post-L1 stage may run on several ingest worker threads
+    post_lock = threading.Lock()
+
+    # Replay never drops windows on backpressure (deterministic runs)
+    replaying = bool(args.replay)
 
     # -----------------------------------------------------
     # PER POINT ENGINE
@@ -74,16 +309,38 @@ def main():
             return engines[key]
 
         try:
-            rpm = (
+            point_cfg = (
                 topology_cfg["sites"][site]
                 ["assets"][asset]
-                ["points"][point]["rpm"]
+                ["points"][point]
             )
+            rpm = point_cfg["rpm"]
         except KeyError as e:
             raise KeyError(
                 f"Topology mismatch for {site}/{asset}/{point} → {e}"
             )
 
+        l1_params = {
+            "fs": l1_cfg["sampling_rate"],
+            "rpm": rpm,
+            "shared_spectrum": l1_cfg.get("shared_spectrum", True),
+            "features": resolve_feature_profile(
+                topology_cfg.get("feature_profiles", {}),
+                point_cfg.get(
+                    "feature_profile",
+                    topology_cfg.get("default_feature_profile"),
+                ),
+            ),
+            "gear_teeth": point_cfg.get("gear_teeth"),
+            "rpm_tolerance": l1_cfg.get("rpm_tolerance", 0.005),
+            "dtype": compute_dtype,
+            "multirate_factor": (
+                multirate_cfg.get("factor", 8)
+                if multirate_cfg.get("enable", False) else None
+            ),
+            "multirate_window": multirate_cfg.get("window_size", 4096),
+        }
+
         engine = {
             "baseline": AdaptiveBaseline(),
             "trend": TrendDetector(),
@@ -94,9 +351,10 @@ def main():
                 early_cfg["hysteresis_clear"],
             ),
             "fsm": EarlyFaultFSM(),
-            "l1": L1FeaturePipeline(
-                fs=l1_cfg["sampling_rate"],
-                rpm=rpm
+            "l1_params": l1_params,
+            "l1": (
+                None if compute_pool or dispatcher
+                else L1FeaturePipeline(**l1_params)
             ),
         }
 
@@ -106,31 +364,133 @@ def main():
     # -----------------------------------------------------
     # RAW CALLBACK
     # -----------------------------------------------------
-    def on_raw_message(site_id, asset_id, point, raw_payload):
+    def on_raw_message(site_id, asset_id, point, raw_payload, evaluate=True):
 
-        # 1️⃣ Ring Buffer
-        ring_buffer.add(asset_id, point, raw_payload)
+        # 1️⃣ Ring Buffer (duplicate / late chunks dropped)
+        if ring_buffer.add(asset_id, point, raw_payload) == SEQ_DUPLICATE:
+            return
+
+        # Async ingest behind on this point → only its newest frame evaluates
+        if not evaluate:
+            return
 
         if not ring_buffer.is_window_ready(asset_id, point):
             return
 
+        new_samples = ring_buffer.pending_samples(asset_id, point)
+        restart = ring_buffer.window_restarted(asset_id, point)
         window = ring_buffer.get_window(asset_id, point)
 
-        # 2️⃣ L1
+        # Event time of the window end + gap flag (sensor time, not compute time)
+        stream = {
+            "event_ts": ring_buffer.event_time(asset_id, point),
+            "window_gap": ring_buffer.window_has_gap(asset_id, point),
+        }
+
+        # 2️⃣ L1 (inline, micro-batch or sharded worker process)
         engine = get_point_engine(site_id, asset_id, point)
-        features = engine["l1"].compute(window)
 
-        event_ts = features["timestamp"]
+        # Measured running speed (if the sensor reports it)
+        rpm = raw_payload.get("rpm")
+
+        if dispatcher:
+            # Copy: the ring view is overwritten by the next append
+            dispatcher.submit(
+                (site_id, asset_id, point, np.array(window), rpm, stream),
+                block=replaying,
+            )
+            return
+
+        if compute_pool:
+            submitted = compute_pool.submit(
+                site_id, asset_id, point, window, engine["l1_params"],
+                meta={
+                    "rpm": rpm,
+                    "new_samples": new_samples,
+                    "restart": restart,
+                    "stream": stream,
+                },
+                block=replaying,
+            )
+            # Dropped (shard saturated) → next window carries these samples
+            if not submitted:
+                ring_buffer.requeue(asset_id, point, new_samples, restart)
+            return
+
+        features = engine["l1"].compute(
+            window, rpm=rpm, new_samples=new_samples, restart=restart
+        )
+        on_features(site_id, asset_id, point, features, stream=stream)
+
+    # -----------------------------------------------------
+    # QUARANTINE (REJECTED RAW FRAMES)
+    # -----------------------------------------------------
+    def on_raw_reject(site_id, asset_id, point, reason):
+
+        if not quarantine.record(site_id, asset_id, point, reason):
+            return
+
+        payload = quarantine.snapshot(site_id, asset_id, point)
+        payload["last_reason"] = reason
 
-        publisher.publish_l1(
+        publisher.publish_quarantine(
             site=site_id,
             asset=asset_id,
             point=point,
-            payload=features,
+            payload=payload,
+        )
+
+    # -----------------------------------------------------
+    # MICRO-BATCH L1 + PHI (ONE VECTORIZED PASS → FAN-OUT)
+    # -----------------------------------------------------
+    def process_l1_batch(items):
+
+        params = [
+            get_point_engine(site, asset, point)["l1_params"]
+            for site, asset, point, *_ in items
+        ]
+
+        columns = batch_l1.compute_batch(
+            np.stack([item[3] for item in items]),
+            fs=[prm["fs"] for prm in params],
+            rpm=[
+                item[4] or prm["rpm"]
+                for item, prm in zip(items, params)
+            ],
+            gear_teeth=[prm["gear_teeth"] or 0 for prm in params],
         )
+        phis = compute_phi_batch(columns)
+
+        for i, (site, asset, point, _, _, stream) in enumerate(items):
+            features = {name: float(col[i]) for name, col in columns.items()}
+            on_features(
+                site, asset, point, features,
+                phi=float(phis[i]), stream=stream,
+            )
+
+    # -----------------------------------------------------
+    # POST-L1 (PHI → ASSET → L2 → RECOMMENDATION)
+    # -----------------------------------------------------
+    def on_features(site_id, asset_id, point, features, phi=None, stream=None):
+        with post_lock:
+            _on_features(site_id, asset_id, point, features, phi, stream)
+
+    def _on_features(site_id, asset_id, point, features, phi=None, stream=None):
+
+        # Sensor event time when the stream carries timestamps
+        if stream and stream["event_ts"] is not None:
+            features["timestamp"] = stream["event_ts"]
+
+        # Window spans a stream gap (gap_policy: flag) → no L2 on artifacts
+        window_gap = bool(stream and stream["window_gap"])
+        if window_gap:
+            features["window_gap"] = True
+
+        event_ts = features["timestamp"]
 
         # 3️⃣ PHI (Severity Authority)
-        phi = compute_phi(features)
+        if phi is None:
+            phi = compute_phi(features)
         state = phi_to_state(phi)
 
         health_payload = {
@@ -139,30 +499,14 @@ def main():
             "timestamp": event_ts,
         }
 
-        # 4️⃣ Publish Point Health
-        publisher.publish_health(
-            site=site_id,
-            asset=asset_id,
-            point=point,
-            payload=health_payload,
-        )
-
-        # 🔥 STORE for Asset Aggregation
-        point_health_cache[(site_id, asset_id, point)] = {
+        # -------------------------------------------------
+        # 🔥 ASSET AGGREGATION (incremental, per asset)
+        # -------------------------------------------------
+        asset_health = asset_health_tracker.update(site_id, asset_id, point, {
             "phi": phi,
             "state": state,
             "point_id": point,
-        }
-
-        # -------------------------------------------------
-        # 🔥 ASSET AGGREGATION (NEW)
-        # -------------------------------------------------
-        asset_points = [
-            v for (s, a, p), v in point_health_cache.items()
-            if s == site_id and a == asset_id
-        ]
-
-        asset_health = compute_asset_health(asset_points)
+        })
 
         asset_health_payload = {
             "phi": asset_health["phi"],
@@ -171,12 +515,6 @@ def main():
             "timestamp": event_ts,
         }
 
-        publisher.publish_asset_health(
-            site=site_id,
-            asset=asset_id,
-            payload=asset_health_payload,
-        )
-
         # Asset Recommendation
         asset_rec = asset_recommendation(asset_health["state"])
         asset_rec.update({
@@ -184,16 +522,14 @@ def main():
             "timestamp": event_ts,
         })
 
-        publisher.publish_asset_recommendation(
-            site=site_id,
-            asset=asset_id,
-            payload=asset_rec,
-        )
-
         # -------------------------------------------------
         # 5️⃣ L2 Diagnostic (Async)
         # -------------------------------------------------
-        if state in ("WARNING", "ALARM") and l2_cfg.get("enable", True):
+        if (
+            state in ("WARNING", "ALARM")
+            and l2_cfg.get("enable", True)
+            and not window_gap
+        ):
 
             l2_queue.enqueue({
                 "site": site_id,
@@ -220,27 +556,137 @@ def main():
             "timestamp": event_ts,
         })
 
-        publisher.publish_recommendation(
+        # -------------------------------------------------
+        # 7️⃣ Publish (legacy topics and/or bundles)
+        # -------------------------------------------------
+        publisher.publish_point_window(
             site=site_id,
             asset=asset_id,
             point=point,
-            payload=recommendation,
+            l1=features,
+            health=health_payload,
+            recommendation=recommendation,
+        )
+
+        publisher.publish_asset_window(
+            site=site_id,
+            asset=asset_id,
+            health=asset_health_payload,
+            recommendation=asset_rec,
         )
 
+        # -------------------------------------------------
+        # 8️⃣ Fleet Snapshot (throttled)
+        # -------------------------------------------------
+        if fleet_rollup is not None:
+            fleet_rollup.update(site_id, asset_id, asset_health)
+            if fleet_rollup.snapshot_due():
+                publisher.publish_fleet_snapshot(fleet_rollup.snapshot(event_ts))
+
+    if dispatcher:
+        dispatcher.start()
+        publisher.add_status_source("micro_batch", dispatcher.get_status)
+
+    if compute_pool:
+        compute_pool.start(
+            lambda meta, features: on_features(
+                meta["site"], meta["asset"], meta["point"], features,
+                stream=meta.get("stream"),
+            )
+        )
+        publisher.add_status_source("compute_pool", compute_pool.get_status)
+
     # -----------------------------------------------------
-    # START LISTENER
+    # REPLAY (RECORDED ARCHIVE → PIPELINE, THEN EXIT)
     # -----------------------------------------------------
-    start_mqtt_listener(
-        callback=on_raw_message,
-        broker=mqtt_cfg["broker"],
-        port=mqtt_cfg["port"],
-        topic=mqtt_cfg["raw_topic"],
-    )
+    if args.replay:
+        stats = replay_archive(
+            args.replay,
+            on_raw_message,
+            speed=args.speed,
+            validator=validator,
+            on_reject=on_raw_reject,
+        )
+
+        # Let queued / in-flight windows finish before reporting / exiting
+        if dispatcher:
+            dispatcher.drain()
+            dispatcher.stop()
+        if compute_pool:
+            compute_pool.drain()
+            compute_pool.stop()
+        publisher.close()
+
+        print(
+            f"⏯️ Replay done: {stats['frames']} frames "
+            f"({stats['frames_rejected']} rejected) in {stats['elapsed_sec']:.2f} s "
+            f"→ {stats['frames_per_sec']:.0f} frames/s, "
+            f"max lag {stats['max_lag_sec'] * 1000:.1f} ms"
+        )
+        return
+
+    # -----------------------------------------------------
+    # RECORDER (EVERY RAW FRAME, BEFORE VALIDATION → ARCHIVE)
+    # -----------------------------------------------------
+    recorder = None
+
+    if record_cfg.get("enable", False):
+        recorder = RawRecorder(
+            time.strftime(record_cfg.get("path", "archive/raw_%Y%m%d_%H%M%S")),
+            chunk_size=record_cfg.get("chunk_mb", 64) * 2**20,
+            default_fs=l1_cfg["sampling_rate"],
+        )
 
+    # -----------------------------------------------------
+    # START LISTENER
+    # -----------------------------------------------------
     print("🚀 Vibralyzer v4 Industrial Engine Started")
 
-    while True:
-        time.sleep(1)
+    try:
+        if ingest_cfg.get("mode", "sync") == "async":
+            scheduler = AsyncIngestScheduler(
+                on_raw_message,
+                worker_count=ingest_cfg.get("workers", 2),
+                queue_size=ingest_cfg.get("queue_size", 256),
+                # Frames dropped on overflow → restart the point's window
+                on_gap=lambda site, asset, point: ring_buffer.clear(asset, point),
+            )
+            publisher.add_status_source("ingest", scheduler.get_status)
+
+            start_async_mqtt_listener(
+                scheduler,
+                broker=mqtt_cfg["broker"],
+                port=mqtt_cfg["port"],
+                topic=raw_topics,
+                validator=validator,
+                on_reject=on_raw_reject,
+                on_frame=recorder.record if recorder else None,
+                stop_event=stop_event,
+            )
+        else:
+            start_mqtt_listener(
+                callback=on_raw_message,
+                broker=mqtt_cfg["broker"],
+                port=mqtt_cfg["port"],
+                topic=raw_topics,
+                validator=validator,
+                on_reject=on_raw_reject,
+                on_frame=recorder.record if recorder else None,
+                stop_event=stop_event,
+            )
+
+    finally:
+        # Listener gone → finish queued windows, then flush outputs
+        if dispatcher:
+            dispatcher.drain()
+            dispatcher.stop()
+        if compute_pool:
+            compute_pool.drain(timeout=10)
+            compute_pool.stop()
+        publisher.close()
+        l2_queue.stop()
+        if recorder:
+            recorder.close()
 
 
 # =========================================================
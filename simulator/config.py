@@ -48,5 +48,9 @@ SIM_CONFIG = {
     # ======================
     "broker": "localhost",
     "topic": "vibration/raw/PUMP_01/DE",
+
+    # "json" | "binary" (raw_ingest.frame_codec, needs repo root on PYTHONPATH)
+    "payload_format": "json",
+    "frame_dtype": "float32",   # binary only: "float32" | "int16"
 }
 
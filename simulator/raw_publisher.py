@@ -1,17 +1,26 @@
 # simulator/raw_publisher.py
 
+import itertools
 import json
 import time
 import paho.mqtt.publish as publish
 
+# Frame counter → gap / duplicate / restart detection in the ring buffer
+_seq = itertools.count()
+
 def publish_raw(cfg, acc):
+    if cfg.get("payload_format") == "binary":
+        publish_raw_binary(cfg, acc)
+        return
+
     payload = {
         "asset": cfg["asset"],
         "point": cfg["point"],
         "acceleration": acc,
         "temperature": cfg["temp_base"],
         "speed": cfg["speed_rpm"],
-        "timestamp": time.time()
+        "timestamp": time.time(),
+        "seq": next(_seq),
     }
 
     publish.single(
@@ -19,3 +28,20 @@ def publish_raw(cfg, acc):
         json.dumps(payload),
         hostname=cfg["broker"]
     )
+
+
+def publish_raw_binary(cfg, acc):
+    from raw_ingest.frame_codec import encode_frame
+
+    frame = encode_frame(
+        acc,
+        cfg["fs"],
+        dtype=cfg.get("frame_dtype", "float32"),
+        seq=next(_seq),
+    )
+
+    publish.single(
+        f"{cfg['topic']}/bin",
+        frame,
+        hostname=cfg["broker"]
+    )
@@ -0,0 +1,165 @@
+import itertools
+import queue
+import threading
+from types import SimpleNamespace
+
+import paho.mqtt.client as mqtt
+
+
+# =========================================================
+# IN-PROCESS BROKER STAND-IN
+# =========================================================
+#
+# FakeBroker.install(monkeypatch) replaces paho's Client with
+# FakeClient: every client created afterwards (listeners, publishers)
+# talks to this broker instead of a TCP connection. Messages are
+# routed by subscription with paho's own topic matcher and delivered
+# on the receiving client's network thread (loop_start / loop_forever),
+# retained messages are kept per topic. ack_delay postpones on_publish
+# to mimic a broker that acknowledges slowly.
+
+
+class FakeBroker:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clients = []
+        self.retained = {}
+        self.published = []     # (client_id, topic, payload, retain)
+        self.ack_delay = 0.0    # > 0 → on_publish fires later (slow PUBACK)
+
+    def install(self, monkeypatch):
+        broker = self
+
+        def client_factory(*args, **kwargs):
+            return FakeClient(broker, kwargs.get("client_id", ""))
+
+        monkeypatch.setattr(mqtt, "Client", client_factory)
+        return self
+
+    # -----------------------------------------------------
+    # ROUTING
+    # -----------------------------------------------------
+    def route(self, sender, topic, payload, qos, retain):
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        msg = SimpleNamespace(topic=topic, payload=payload, qos=qos, retain=retain)
+
+        with self._lock:
+            self.published.append((sender.client_id, topic, payload, retain))
+            if retain:
+                self.retained[topic] = payload
+            receivers = [
+                c for c in self.clients
+                if any(mqtt.topic_matches_sub(f, topic) for f in c.subscriptions)
+            ]
+
+        for client in receivers:
+            client.inbox.put(msg)
+
+    def subscribed(self, filters):
+        """
+        True once some client has subscribed to all these filters.
+        """
+        with self._lock:
+            return any(set(filters) <= set(c.subscriptions) for c in self.clients)
+
+    def topics(self, prefix=""):
+        with self._lock:
+            return [t for _, t, _, _ in self.published if t.startswith(prefix)]
+
+
+class FakeClient:
+    """
+    The subset of paho.mqtt.client.Client the engine uses.
+    """
+
+    _mids = itertools.count(1)
+
+    def __init__(self, broker, client_id=""):
+        self.broker = broker
+        self.client_id = client_id
+        self.subscriptions = []
+        self.inbox = queue.Queue()
+        self.connected = False
+
+        self.on_connect = None
+        self.on_message = None
+        self.on_publish = None
+
+        self._thread = None
+
+    # -----------------------------------------------------
+    # CONNECTION
+    # -----------------------------------------------------
+    def connect(self, host, port=1883, keepalive=60):
+        with self.broker._lock:
+            self.broker.clients.append(self)
+        self.connected = True
+        self.inbox.put("connect")
+        return mqtt.MQTT_ERR_SUCCESS
+
+    connect_async = connect
+
+    def is_connected(self):
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
+        with self.broker._lock:
+            if self in self.broker.clients:
+                self.broker.clients.remove(self)
+
+    # -----------------------------------------------------
+    # NETWORK LOOP
+    # -----------------------------------------------------
+    def loop_start(self):
+        self._thread = threading.Thread(target=self.loop_forever, daemon=True)
+        self._thread.start()
+
+    def loop_stop(self):
+        self.inbox.put(None)
+
+    def loop_forever(self):
+        while True:
+            item = self.inbox.get()
+            if item is None:
+                return
+            if item == "connect":
+                if self.on_connect:
+                    self.on_connect(self, None, {}, 0)
+            elif self.on_message:
+                self.on_message(self, None, item)
+
+    # -----------------------------------------------------
+    # PUB / SUB
+    # -----------------------------------------------------
+    def subscribe(self, topic, qos=0):
+        topics = [topic] if isinstance(topic, str) else [t for t, _ in topic]
+        with self.broker._lock:
+            self.subscriptions.extend(topics)
+        return mqtt.MQTT_ERR_SUCCESS, next(self._mids)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        mid = next(self._mids)
+        self.broker.route(self, topic, payload, qos, retain)
+
+        acked = threading.Event()
+
+        def ack():
+            if self.on_publish:
+                self.on_publish(self, None, mid)
+            acked.set()
+
+        if self.broker.ack_delay:
+            threading.Timer(self.broker.ack_delay, ack).start()
+        else:
+            ack()
+
+        return SimpleNamespace(
+            rc=mqtt.MQTT_ERR_SUCCESS,
+            mid=mid,
+            is_published=acked.is_set,
+            wait_for_publish=lambda timeout=None: acked.wait(timeout),
+        )
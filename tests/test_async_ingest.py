@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+from raw_ingest.async_ingest import AsyncIngestScheduler
+
+
+def test_overflow_drops_oldest_frames_and_reports_gap():
+    release = threading.Event()
+    seen, gaps = [], []
+
+    def callback(site, asset, point, payload, evaluate=True):
+        if payload == 0:
+            release.wait(2)
+        seen.append((payload, evaluate))
+
+    scheduler = AsyncIngestScheduler(
+        callback,
+        worker_count=1,
+        queue_size=3,
+        on_gap=lambda site, asset, point: gaps.append(len(seen)),
+    )
+
+    async def scenario():
+        await scheduler.start()
+
+        scheduler.submit("S", "A", "P", 0)
+        await asyncio.sleep(0.05)           # frame 0 in flight, worker blocked
+
+        for frame in range(1, 7):           # queue holds 3 → 1..3 dropped
+            scheduler.submit("S", "A", "P", frame)
+        release.set()
+
+        deadline = time.monotonic() + 2
+        while scheduler.metrics["frames_processed"] < 4 and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+    assert seen == [(0, True), (4, False), (5, False), (6, True)]
+    assert gaps == [1]                      # before frame 4, after frame 0
+
+    status = scheduler.get_status()
+    assert status["metrics"]["frames_dropped"] == 3
+    assert status["dropped_per_point"] == {"S/A/P": 3}
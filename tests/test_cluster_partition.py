@@ -0,0 +1,157 @@
+import copy
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import runner
+from config.config_loader import load_config
+from core.cluster import ENV_INSTANCE_COUNT, ENV_INSTANCE_INDEX, owned_assets, partition_topics
+from core.ring_buffer import RingBufferManager
+from core.sharding import shard_for
+from tests.fake_broker import FakeBroker, FakeClient
+
+FRAMES_PER_POINT = 3
+WINDOW = 1024
+TIMEOUT = 30
+
+
+def _wait_for(condition, timeout=TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def cluster(monkeypatch):
+    """
+    start(n) → n runner.main() instances (one thread each) on one
+    in-process broker; returns (broker, processed) where processed
+    lists (instance, asset, point, seq) per ring buffer append.
+    Teardown stops every instance through its stop_event and joins it.
+    """
+    monkeypatch.delenv(ENV_INSTANCE_COUNT, raising=False)
+    monkeypatch.delenv(ENV_INSTANCE_INDEX, raising=False)
+
+    broker = FakeBroker().install(monkeypatch)
+    topology = load_config("config/config.yaml")
+    base = copy.deepcopy(load_config("config/system.yaml"))
+
+    base["raw"].update(window_size=WINDOW, hop_size=None, overlap=None)
+    base["l2"]["enable"] = False
+    base["ingest"]["mode"] = "sync"
+    base["compute"]["workers"] = 0
+    base["compute"]["micro_batch"]["enable"] = False
+    base["publish"]["change_only"]["enable"] = False
+
+    configs = {}
+    processed = []
+    lock = threading.Lock()
+    instances = []      # (thread, stop_event)
+
+    def thread_config(path):
+        if path.endswith("system.yaml"):
+            return configs[threading.current_thread().name]
+        return topology
+
+    class RecordingRing(RingBufferManager):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.instance = configs[threading.current_thread().name]["cluster"]["instance_index"]
+
+        def append(self, asset, point, raw):
+            with lock:
+                processed.append((self.instance, asset, point, raw.get("seq")))
+            return super().append(asset, point, raw)
+
+    monkeypatch.setattr(runner, "load_config", thread_config)
+    monkeypatch.setattr(runner, "RingBufferManager", RecordingRing)
+
+    def start(n):
+        for index in range(n):
+            name = f"instance-{index}"
+            cfg = copy.deepcopy(base)
+            cfg["cluster"] = {"instance_count": n, "instance_index": index}
+            configs[name] = cfg
+
+            stop = threading.Event()
+            thread = threading.Thread(
+                target=runner.main, args=([], stop), name=name, daemon=True
+            )
+            thread.start()
+            instances.append((thread, stop))
+
+        # Every instance that owns assets has subscribed to exactly those
+        for index in range(n):
+            filters = partition_topics(
+                base["mqtt"]["raw_topic"], owned_assets(topology, n, index)
+            )
+            if filters:
+                assert _wait_for(lambda: broker.subscribed(filters))
+
+        return broker, processed
+
+    yield start
+
+    for _, stop in instances:
+        stop.set()
+    for thread, _ in instances:
+        thread.join(timeout=TIMEOUT)
+
+    assert not any(thread.is_alive() for thread, _ in instances)
+    # Every instance left the broker (listener + publisher disconnected)
+    assert broker.clients == []
+
+
+def _raw_frames(topology):
+    rng = np.random.default_rng(0)
+    for site, site_cfg in topology["sites"].items():
+        for asset, asset_cfg in site_cfg["assets"].items():
+            for point in asset_cfg["points"]:
+                for seq in range(FRAMES_PER_POINT):
+                    payload = {
+                        "acceleration": (0.1 * rng.standard_normal(WINDOW)).tolist(),
+                        "fs": 25600,
+                        "seq": seq,
+                    }
+                    yield site, asset, point, seq, json.dumps(payload)
+
+
+@pytest.mark.parametrize("n", (2, 3))
+def test_each_raw_frame_is_processed_by_its_owning_instance_only(cluster, n):
+    broker, processed = cluster(n)
+    topology = load_config("config/config.yaml")
+    sensor = FakeClient(broker, "sensor")
+
+    expected = {}
+    for site, asset, point, seq, payload in _raw_frames(topology):
+        sensor.publish(f"vibration/raw/{site}/{asset}/{point}", payload)
+        expected[(asset, point, seq)] = shard_for(site, asset, n)
+
+    assert _wait_for(lambda: len(processed) >= len(expected))
+    time.sleep(0.2)   # nothing may arrive twice
+
+    seen = {}
+    for instance, asset, point, seq in processed:
+        key = (asset, point, seq)
+        assert key not in seen, f"{key} processed by {seen[key]} and {instance}"
+        seen[key] = instance
+
+    assert seen == expected
+
+    # Asset health only ever published by the owning instance
+    for site, site_cfg in topology["sites"].items():
+        for asset in site_cfg["assets"]:
+            topic = f"vibration/asset/health/{site}/{asset}"
+            owner = f"vibralyzer_v4_{shard_for(site, asset, n)}"
+
+            assert _wait_for(lambda: topic in broker.topics(topic))
+            publishers = {
+                client_id for client_id, t, _, _ in broker.published if t == topic
+            }
+            assert publishers == {owner}
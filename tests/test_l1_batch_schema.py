@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from core.l1_feature_pipeline import L1FeaturePipeline
+
+FS = 25600
+
+
+@pytest.mark.parametrize("shape", ((0, 4096), (3, 0)))
+def test_empty_batch_has_same_columns_as_full_batch(shape):
+    pipeline = L1FeaturePipeline(FS, 2980)
+
+    full = pipeline.compute_batch(np.ones((2, 1024)))
+    empty = pipeline.compute_batch(np.zeros(shape))
+
+    assert set(empty) == set(full)
+    assert all(len(col) == shape[0] for col in empty.values())
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from scipy.signal import hilbert
+
+from core.l1_feature_pipeline import HF_BAND, HIGH_BAND, LOW_BAND, L1FeaturePipeline
+from core.signal_utils import (
+    bandpass_energy,
+    band_energy_from_spectrum,
+    envelope_from_spectrum,
+    rfft_spectrum,
+)
+
+FS = 25600
+RTOL = 1e-9
+
+# Even and odd window lengths (odd → no Nyquist bin)
+SIZES = (4096, 4095, 1000, 7)
+
+
+def _window(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / FS
+    return (
+        0.3 * np.sin(2 * np.pi * 49.7 * t)
+        + 0.1 * np.sin(2 * np.pi * 4200 * t)
+        + 0.05 * rng.standard_normal(n)
+    )
+
+
+@pytest.mark.parametrize("n", SIZES)
+@pytest.mark.parametrize("band", (HF_BAND, LOW_BAND, HIGH_BAND, (0, FS / 2)))
+def test_band_energy_matches_bandpass_energy(n, band):
+    acc = _window(n)
+    spectrum, _ = rfft_spectrum(acc, FS)
+
+    shared = band_energy_from_spectrum(spectrum, n, FS, *band)
+    legacy = bandpass_energy(acc, FS, *band)
+
+    assert shared == pytest.approx(legacy, rel=RTOL, abs=1e-12)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_envelope_matches_scipy_hilbert(n):
+    acc = _window(n)
+    spectrum, _ = rfft_spectrum(acc, FS)
+
+    np.testing.assert_allclose(
+        envelope_from_spectrum(acc, spectrum),
+        np.abs(hilbert(acc)),
+        rtol=RTOL,
+        atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_pipeline_shared_spectrum_matches_legacy_path(n):
+    acc = _window(n, seed=n)
+
+    shared = L1FeaturePipeline(FS, 2980, shared_spectrum=True).compute(acc)
+    legacy = L1FeaturePipeline(FS, 2980, shared_spectrum=False).compute(acc)
+
+    for name in ("acc_hf_rms_g", "envelope_rms", "energy_low", "energy_high"):
+        assert shared[name] == pytest.approx(legacy[name], rel=RTOL, abs=1e-12), name
@@ -0,0 +1,74 @@
+import itertools
+import json
+import time
+from types import SimpleNamespace
+
+import paho.mqtt.client as mqtt
+
+from publish import outbox as outbox_module
+from publish.mqtt_publisher import MQTTPublisher
+from publish.outbox import PublishOutbox
+from tests.fake_broker import FakeBroker
+
+
+class SilentClient:
+    """
+    Accepts every publish, never acknowledges one.
+    """
+
+    def __init__(self):
+        self.on_publish = None
+        self._mids = itertools.count(1)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        return SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS, mid=next(self._mids))
+
+
+def _send_all(outbox, n):
+    for i in range(n):
+        outbox.put(f"vibration/health/S/A/P{i}", {"i": i})
+    outbox.stop()
+
+
+def test_unacked_messages_expire_after_timeout():
+    outbox = PublishOutbox(ack_timeout_sec=0)
+    outbox.start(SilentClient())
+
+    _send_all(outbox, 20)
+
+    status = outbox.get_status()
+    assert status["inflight"] == 1
+    assert status["metrics"]["ack_expired"] == 19
+    assert not outbox.wait_acked(timeout=0.01)
+
+
+def test_unacked_messages_are_capped(monkeypatch):
+    monkeypatch.setattr(outbox_module, "MAX_TRACKED_ACKS", 5)
+    outbox = PublishOutbox(ack_timeout_sec=60)
+    outbox.start(SilentClient())
+
+    _send_all(outbox, 20)
+
+    assert outbox.get_status()["inflight"] == 5
+    assert outbox.metrics["ack_expired"] == 15
+
+
+def test_engine_status_topic_reports_outbox(monkeypatch):
+    broker = FakeBroker().install(monkeypatch)
+    publisher = MQTTPublisher(
+        "fake", 1883,
+        outbox=PublishOutbox(),
+        status_interval_sec=0.02,
+    )
+    publisher.publish_health("S", "A", "P", {"state": "NORMAL", "phi": 1.0})
+
+    deadline = time.monotonic() + 2
+    while not broker.topics("vibration/engine/status") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    publisher.close()
+
+    payload = next(
+        p for _, t, p, _ in broker.published if t == "vibration/engine/status"
+    )
+    status = json.loads(payload)
+    assert set(status["outbox"]) >= {"metrics", "dropped_per_class", "ack_latency_hist"}
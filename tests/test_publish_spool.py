@@ -0,0 +1,164 @@
+import itertools
+import time
+from types import SimpleNamespace
+
+import paho.mqtt.client as mqtt
+import pytest
+
+from publish.spool import _RECORD, PublishSpool, _ClassJournal
+
+SEGMENT = 1024
+
+
+def _record(i, topic="vibration/l1/S/A/P", retain=False):
+    topic = topic.encode()
+    message = f"m{i:04d}".encode() * 8
+    length = _RECORD.size + len(topic) + len(message)
+    return _RECORD.pack(length, len(topic), 1, int(retain), time.time()) + topic + message
+
+
+def _write(journal, records):
+    for record in records:
+        if not journal.append(record):
+            journal.roll()
+            assert journal.append(record)
+
+
+def _drain(journal, limit=None):
+    out = []
+    for _ in itertools.islice(itertools.count(), limit):
+        entry = journal.peek()
+        if entry is None:
+            break
+        out.append(entry[1])
+        journal.advance(entry[-1])
+    return out
+
+
+def _message(i):
+    return f"m{i:04d}".encode() * 8
+
+
+# =========================================================
+# JOURNAL
+# =========================================================
+def test_journal_replays_appended_records_across_segments(tmp_path):
+    journal = _ClassJournal(tmp_path / "l1", SEGMENT)
+    _write(journal, [_record(i) for i in range(40)])
+
+    assert len(journal.segments) > 1
+    assert _drain(journal) == [_message(i) for i in range(40)]
+    assert not journal.has_backlog()
+    assert len(journal.segments) == 1      # replayed segments deleted
+
+
+def test_journal_resumes_from_cursor_after_restart(tmp_path):
+    journal = _ClassJournal(tmp_path / "l1", SEGMENT)
+    _write(journal, [_record(i) for i in range(40)])
+
+    assert _drain(journal, limit=25) == [_message(i) for i in range(25)]
+    journal.close()
+
+    reopened = _ClassJournal(tmp_path / "l1", SEGMENT)
+    _write(reopened, [_record(i) for i in range(40, 45)])
+
+    assert _drain(reopened) == [_message(i) for i in range(25, 45)]
+
+
+def test_journal_eviction_moves_cursor_past_oldest_segment(tmp_path):
+    journal = _ClassJournal(tmp_path / "l1", SEGMENT)
+    _write(journal, [_record(i) for i in range(40)])
+
+    first = journal.segments[0]
+    journal.evict_oldest()
+
+    replayed = _drain(journal)
+    assert first not in journal.segments
+    assert 0 < len(replayed) < 40
+    assert replayed == [_message(i) for i in range(40 - len(replayed), 40)]
+
+
+def test_full_eviction_then_reuse_does_not_skip_new_records(tmp_path):
+    journal = _ClassJournal(tmp_path / "l1", SEGMENT)
+    _write(journal, [_record(i) for i in range(40)])
+    _drain(journal, limit=3)
+    journal.save_cursor()                   # cursor inside segment 0
+
+    while journal.segments:
+        journal.evict_oldest()
+    assert not journal.has_backlog()
+    assert not (tmp_path / "l1" / "cursor.json").exists()
+
+    _write(journal, [_record(i) for i in range(100, 110)])
+    journal.close()
+
+    # Restart: new segment numbers / no stale cursor → nothing skipped
+    reopened = _ClassJournal(tmp_path / "l1", SEGMENT)
+    assert _drain(reopened) == [_message(i) for i in range(100, 110)]
+
+
+# =========================================================
+# SPOOL
+# =========================================================
+class SpoolClient:
+    def __init__(self, connected=True):
+        self.connected = connected
+        self.sent = []          # (topic, payload, retain)
+        self._mids = itertools.count(1)
+
+    def is_connected(self):
+        return self.connected
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.sent.append((topic, payload, retain))
+        return SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS, mid=next(self._mids))
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def spool(tmp_path):
+    spool = PublishSpool(
+        tmp_path / "spool", max_bytes=4 * SEGMENT, segment_bytes=SEGMENT, catchup_rate=0
+    )
+    yield spool
+    spool.stop()
+
+
+def test_eviction_never_touches_health(spool):
+    for i in range(200):
+        spool.append(f"vibration/l1/S/A/P{i % 4}", _message(i))
+        if i % 20 == 0:
+            spool.append("vibration/health/S/A/P", _message(i), retain=True)
+
+    status = spool.get_status()
+    assert status["evicted_per_class"].get("l1", 0) > 0
+    assert "health" not in status["evicted_per_class"]
+    assert spool.metrics["refused"] == 0
+
+
+def test_live_messages_bypass_backlog_and_win_retained_state(spool):
+    client = SpoolClient(connected=False)
+    spool.publish(client, "vibration/health/S/A/P1", b"old-1", retain=True)
+    spool.publish(client, "vibration/health/S/A/P2", b"old-2", retain=True)
+    spool.publish(client, "vibration/l1/S/A/P1", b"l1-old")
+    assert client.sent == []
+
+    # Reconnected: live alarm goes out at once despite the backlog
+    client.connected = True
+    assert spool.publish(client, "vibration/health/S/A/P1", b"live-1", retain=True)
+    assert client.sent == [("vibration/health/S/A/P1", b"live-1", True)]
+
+    spool.start(client)
+    _wait_for(lambda: len(client.sent) == 4)
+
+    replayed = client.sent[1:]
+    assert ("vibration/health/S/A/P1", b"old-1", False) in replayed   # history only
+    assert ("vibration/health/S/A/P2", b"old-2", True) in replayed    # still newest
+    assert ("vibration/l1/S/A/P1", b"l1-old", False) in replayed
+    assert spool.metrics["replayed_unretained"] == 1
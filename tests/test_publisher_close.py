@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from publish.l1_aggregator import L1Aggregator
+from publish.mqtt_publisher import MQTTPublisher
+from publish.outbox import PublishOutbox
+from tests.fake_broker import FakeBroker
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = FakeBroker().install(monkeypatch)
+    broker.ack_delay = 0.05
+    return broker
+
+
+def _health(i):
+    return {"state": "NORMAL", "phi": float(i), "timestamp": 1200.0 + i}
+
+
+@pytest.mark.parametrize("with_outbox", (False, True))
+def test_close_delivers_everything_then_disconnects(broker, with_outbox):
+    outbox = PublishOutbox() if with_outbox else None
+    publisher = MQTTPublisher(
+        "fake", 1883,
+        outbox=outbox,
+        l1_aggregator=L1Aggregator(interval_sec=60),
+    )
+
+    for i in range(50):
+        publisher.publish_point_window(
+            "S", "A", "P",
+            {"acc_rms_g": float(i), "timestamp": 1200.0 + i},
+            _health(i),
+            {"action": "none"},
+        )
+
+    publisher.close()
+
+    assert len(broker.topics("vibration/health/")) == 50
+    # Open aggregate interval published on close
+    assert broker.topics("vibration/l1agg/") == ["vibration/l1agg/S/A/P"]
+    if outbox is not None:
+        assert outbox.metrics["acked"] == outbox.metrics["sent"]
+    assert not publisher.client.is_connected()
+    assert "L1AggregateFlush" not in {t.name for t in threading.enumerate()}
+
+    publisher.close()   # idempotent
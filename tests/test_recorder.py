@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+
+from raw_ingest.frame_codec import decode_frame, encode_frame
+from raw_ingest.recorder import RawArchive, RawRecorder, replay_archive
+from raw_ingest.validator import RawFrameValidator
+
+FS = 25600
+
+
+def _json_frame(acc, seq):
+    return json.loads(json.dumps({
+        "acceleration": acc.tolist(), "fs": FS, "timestamp": 100.0 + seq, "seq": seq,
+    }))
+
+
+def test_replay_returns_received_samples_and_rejects(tmp_path):
+    rng = np.random.default_rng(0)
+    acc64 = rng.standard_normal(1024) * 0.1
+    acc32 = acc64.astype(np.float32)
+
+    recorder = RawRecorder(tmp_path / "arch", default_fs=FS)
+    frames = [
+        ("P1", _json_frame(acc64, 0)),
+        ("P2", decode_frame(encode_frame(acc32, FS, timestamp=100.0))),
+        ("P1", _json_frame(np.full(1024, np.nan), 1)),      # non_finite
+        ("P1", {"acceleration": ["x"]}),                    # nothing to store
+    ]
+    recorded = [recorder.record("S", "A", point, payload) for point, payload in frames]
+    recorder.close()
+
+    assert recorded == [True, True, True, False]
+    assert recorder.metrics["frames_unrecordable"] == 1
+
+    archive = RawArchive(tmp_path / "arch")
+    _, _, _, json_payload = archive.read(archive.index[0])
+    _, _, _, bin_payload = archive.read(archive.index[1])
+    archive.close()
+
+    # JSON floats and float32 frames both replay bit-exact
+    assert json_payload["acceleration"].dtype == np.float64
+    np.testing.assert_array_equal(json_payload["acceleration"], acc64)
+    assert bin_payload["acceleration"].dtype == np.float32
+    np.testing.assert_array_equal(bin_payload["acceleration"], acc32)
+    assert json_payload["seq"] == 0
+
+    accepted, rejected = [], []
+    stats = replay_archive(
+        tmp_path / "arch",
+        lambda site_id, asset_id, point, raw_payload: accepted.append(point),
+        speed=0,
+        validator=RawFrameValidator(expected_fs=FS),
+        on_reject=lambda site, asset, point, reason: rejected.append(reason),
+    )
+
+    assert accepted == ["P1", "P2"]
+    assert rejected == ["non_finite"]
+    assert stats["frames_rejected"] == 1
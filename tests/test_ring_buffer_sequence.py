@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from core.ring_buffer import (
+    SEQ_DUPLICATE,
+    SEQ_GAP,
+    SEQ_OK,
+    SEQ_RESTART,
+    RingBufferManager,
+)
+from raw_ingest.frame_codec import decode_frame, encode_frame
+
+FS = 1024
+CHUNK = 256
+
+
+def _chunk(seq, t0=1000.0):
+    return {
+        "acceleration": np.ones(CHUNK),
+        "seq": seq,
+        "timestamp": t0 + seq * CHUNK / FS,
+        "fs": FS,
+    }
+
+
+def _ring():
+    return RingBufferManager(window_size=1024, hop_size=512, fs=FS)
+
+
+def test_redelivered_chunk_is_a_duplicate():
+    ring = _ring()
+    statuses = [ring.add("A", "P", _chunk(seq)) for seq in range(6)]
+    statuses.append(ring.add("A", "P", _chunk(3)))      # QoS 1 redelivery
+
+    assert statuses == [SEQ_OK] * 6 + [SEQ_DUPLICATE]
+
+
+@pytest.mark.parametrize("uptime", (3, 100))
+def test_sensor_reboot_restarts_the_stream(uptime):
+    ring = _ring()
+    for seq in range(uptime):
+        ring.add("A", "P", _chunk(seq))
+    ring.get_window("A", "P")
+
+    # Rebooted sensor: counter back to 0, time continues
+    t_reboot = 1000.0 + (uptime + 2) * CHUNK / FS
+    statuses = [
+        ring.add("A", "P", _chunk(seq, t0=t_reboot)) for seq in range(4)
+    ]
+
+    assert statuses == [SEQ_RESTART, SEQ_OK, SEQ_OK, SEQ_OK]
+    assert ring.window_restarted("A", "P")
+    assert ring.is_window_ready("A", "P")       # refilled from the new stream only
+    assert ring.metrics["chunks_restart"] == 1
+
+
+def test_reboot_without_timestamps_uses_restart_jump():
+    ring = RingBufferManager(window_size=1024, hop_size=512, restart_jump=8)
+    add = lambda seq: ring.add("A", "P", {"acceleration": np.ones(CHUNK), "seq": seq})
+
+    assert [add(s) for s in range(20)][-1] == SEQ_OK
+    assert add(15) == SEQ_DUPLICATE     # within restart_jump
+    assert add(0) == SEQ_RESTART
+    assert add(2) == SEQ_GAP
+
+
+def test_binary_frames_carry_seq():
+    ring = _ring()
+    frames = [
+        decode_frame(encode_frame(np.ones(CHUNK), FS, timestamp=1000.0 + s, seq=s))
+        for s in (0, 1, 3)
+    ]
+
+    assert frames[0]["seq"] == 0
+    assert [ring.add("A", "P", f) for f in frames] == [SEQ_OK, SEQ_OK, SEQ_GAP]
+
+
+def test_v1_binary_frames_still_decode():
+    v2 = encode_frame(np.arange(4.0), FS, timestamp=5.0)
+    v1 = v2[:4] + b"\x01" + v2[5:28] + v2[36:]
+
+    frame = decode_frame(v1)
+
+    np.testing.assert_array_equal(frame["acceleration"], np.arange(4.0))
+    assert frame["timestamp"] == 5.0
+    assert "seq" not in frame
@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+
+from health.asset_health_index import compute_asset_health
+from health.asset_health_tracker import AssetHealthTracker
+from health.state_mapping import phi_to_state
+
+# ==========================================================
+# BENCH CONFIG
+# ==========================================================
+# Run from repo root: python -m tools.bench_asset_health
+POINTS_PER_ASSET = 4
+FLEET_SIZES = (16, 256, 4096, 16384)   # total points
+UPDATES = 20000                        # messages per fleet size
+CHECK_UPDATES = 50000                  # equivalence check (small fleet)
+
+
+# ==========================================================
+# WORKLOAD
+# ==========================================================
+def make_updates(n_points, n_updates, rng):
+    """
+    Random point updates; phi rounded to 0.1 like compute_phi()
+    (plenty of ties between points of one asset).
+    """
+    idx = rng.integers(0, n_points, n_updates)
+    phis = np.round(rng.uniform(0.0, 100.0, n_updates), 1)
+
+    updates = []
+    for i, phi in zip(idx.tolist(), phis.tolist()):
+        asset, point = divmod(i, POINTS_PER_ASSET)
+        updates.append(("SITE_A", f"ASSET_{asset:05d}", f"P{point}", phi))
+    return updates
+
+
+def entry(point, phi):
+    return {"phi": phi, "state": phi_to_state(phi), "point_id": point}
+
+
+# ==========================================================
+# IMPLEMENTATIONS
+# ==========================================================
+def run_cache_scan(updates, cache):
+    # Previous runner path: scan the fleet-wide point cache per message
+    for site, asset, point, phi in updates:
+        cache[(site, asset, point)] = entry(point, phi)
+        compute_asset_health([
+            v for (s, a, p), v in cache.items()
+            if s == site and a == asset
+        ])
+
+
+def run_tracker(updates, tracker):
+    for site, asset, point, phi in updates:
+        tracker.update(site, asset, point, entry(point, phi))
+
+
+def warm(n_points):
+    # Every point seen once (steady state: full fleet in the cache)
+    updates = [
+        ("SITE_A", f"ASSET_{i // POINTS_PER_ASSET:05d}", f"P{i % POINTS_PER_ASSET}", 0.0)
+        for i in range(n_points)
+    ]
+
+    cache = {}
+    tracker = AssetHealthTracker()
+    for site, asset, point, phi in updates:
+        cache[(site, asset, point)] = entry(point, phi)
+        tracker.update(site, asset, point, entry(point, phi))
+    return cache, tracker
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+# ==========================================================
+# EQUIVALENCE
+# ==========================================================
+def check_identical(rng):
+    n_points = 8 * POINTS_PER_ASSET
+    updates = make_updates(n_points, CHECK_UPDATES, rng)
+
+    cache = {}
+    tracker = AssetHealthTracker()
+
+    for site, asset, point, phi in updates:
+        cache[(site, asset, point)] = entry(point, phi)
+        expected = compute_asset_health([
+            v for (s, a, p), v in cache.items()
+            if s == site and a == asset
+        ])
+        got = tracker.update(site, asset, point, entry(point, phi))
+        if got != expected:
+            raise AssertionError(f"Mismatch for {site}/{asset}: {got} != {expected}")
+
+    return len(updates)
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+def main():
+    rng = np.random.default_rng(0)
+
+    checked = check_identical(rng)
+    print(f"Equivalence: {checked} updates identical to compute_asset_health()")
+
+    print(f"\nAsset health per message | {POINTS_PER_ASSET} points/asset, {UPDATES} updates")
+    print(f"{'fleet points':>12} {'cache scan us':>14} {'tracker us':>11}")
+
+    for n_points in FLEET_SIZES:
+        updates = make_updates(n_points, UPDATES, rng)
+        cache, tracker = warm(n_points)
+
+        # Cache scan is O(fleet) → fewer updates on large fleets
+        scan_updates = updates[: max(200, UPDATES * 16 // n_points)]
+        scan_us = timed(run_cache_scan, scan_updates, cache) / len(scan_updates) * 1e6
+        tracker_us = timed(run_tracker, updates, tracker) / len(updates) * 1e6
+
+        print(f"{n_points:>12} {scan_us:>14.2f} {tracker_us:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
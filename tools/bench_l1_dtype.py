@@ -0,0 +1,128 @@
+import time
+import tracemalloc
+
+import numpy as np
+
+from core.ring_buffer import RingBufferManager
+from core.l1_feature_pipeline import L1FeaturePipeline
+
+# ==========================================================
+# BENCH CONFIG
+# ==========================================================
+# Run from repo root: python -m tools.bench_l1_dtype
+FS = 25600
+WINDOW = 4096
+RPM = 2980
+GEAR_TEETH = 20
+
+POINTS = 64          # fleet size for the batch / ring-buffer figures
+REPEAT = 200         # single-window compute() calls per dtype
+
+
+# ==========================================================
+# SIGNAL
+# ==========================================================
+def make_fleet(n_points, rng):
+    t = np.arange(WINDOW) / FS
+    fr = RPM / 60
+
+    sig = 0.02 * np.sin(2 * np.pi * fr * t)
+    sig = sig + 0.06 * np.sin(2 * np.pi * GEAR_TEETH * fr * t)
+
+    return sig + 0.01 * rng.standard_normal((n_points, WINDOW))
+
+
+# ==========================================================
+# MEASUREMENTS
+# ==========================================================
+def bench_single(dtype, windows):
+    pipeline = L1FeaturePipeline(FS, RPM, gear_teeth=GEAR_TEETH, dtype=dtype)
+    windows = windows.astype(dtype)
+
+    pipeline.compute(windows[0])  # warm caches
+
+    t0 = time.perf_counter()
+    for i in range(REPEAT):
+        pipeline.compute(windows[i % len(windows)])
+    elapsed = time.perf_counter() - t0
+
+    return REPEAT / elapsed
+
+
+def bench_batch(dtype, windows):
+    pipeline = L1FeaturePipeline(FS, RPM, gear_teeth=GEAR_TEETH, dtype=dtype)
+    windows = windows.astype(dtype)
+
+    pipeline.compute_batch(windows)
+
+    rounds = max(1, REPEAT // len(windows))
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        pipeline.compute_batch(windows)
+    elapsed = time.perf_counter() - t0
+
+    return rounds * len(windows) / elapsed
+
+
+def peak_compute_bytes(dtype, windows):
+    pipeline = L1FeaturePipeline(FS, RPM, gear_teeth=GEAR_TEETH, dtype=dtype)
+    window = windows[0].astype(dtype)
+    pipeline.compute(window)
+
+    tracemalloc.start()
+    pipeline.compute(window)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+
+def ring_bytes_per_point(dtype):
+    rb = RingBufferManager(window_size=WINDOW, dtype=dtype)
+    rb.append("A", "P", {"acceleration": np.zeros(WINDOW)})
+    return rb.buffers["A:P"].data.nbytes
+
+
+def max_rel_error(windows):
+    ref = L1FeaturePipeline(FS, RPM, gear_teeth=GEAR_TEETH).compute_batch(windows)
+    f32 = L1FeaturePipeline(
+        FS, RPM, gear_teeth=GEAR_TEETH, dtype="float32"
+    ).compute_batch(windows.astype(np.float32))
+
+    worst = {}
+    for name, col in ref.items():
+        if name == "timestamp":
+            continue
+        scale = np.maximum(np.abs(col), 1e-12)
+        worst[name] = float(np.max(np.abs(col - f32[name]) / scale))
+
+    return worst
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+def main():
+    rng = np.random.default_rng(0)
+    windows = make_fleet(POINTS, rng)
+
+    print(f"L1 dtype benchmark | fs={FS} window={WINDOW} points={POINTS}")
+    print(f"{'dtype':<8} {'compute/s':>10} {'batch win/s':>12} "
+          f"{'peak KB':>9} {'ring KB/pt':>11}")
+
+    for dtype in ("float64", "float32"):
+        single = bench_single(dtype, windows)
+        batch = bench_batch(dtype, windows)
+        peak = peak_compute_bytes(dtype, windows) / 1024
+        ring = ring_bytes_per_point(dtype) / 1024
+
+        print(f"{dtype:<8} {single:>10.0f} {batch:>12.0f} "
+              f"{peak:>9.1f} {ring:>11.1f}")
+
+    print("\nfloat32 vs float64 max relative error per feature:")
+    for name, err in max_rel_error(windows).items():
+        print(f"  {name:<22} {err:.2e}")
+
+
+if __name__ == "__main__":
+    main()
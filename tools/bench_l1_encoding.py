@@ -0,0 +1,104 @@
+import copy
+import json
+import time
+
+import numpy as np
+
+from core.l1_feature_pipeline import L1FeaturePipeline
+from publish.l1_codec import decode_l1, encode_l1
+
+# ==========================================================
+# BENCH CONFIG
+# ==========================================================
+# Run from repo root: python -m tools.bench_l1_encoding
+FS = 25600
+WINDOW = 4096
+RPM = 2980
+GEAR_TEETH = 20
+
+WINDOWS = 64         # distinct feature dicts
+REPEAT = 20000       # encode / decode calls per codec
+
+
+# ==========================================================
+# FEATURES
+# ==========================================================
+def make_features(rng):
+    pipeline = L1FeaturePipeline(FS, RPM, gear_teeth=GEAR_TEETH)
+    t = np.arange(WINDOW) / FS
+
+    features = []
+    for _ in range(WINDOWS):
+        acc = 0.02 * np.sin(2 * np.pi * RPM / 60 * t)
+        acc = acc + 0.01 * rng.standard_normal(WINDOW)
+        features.append(pipeline.compute(acc))
+
+    return features
+
+
+# ==========================================================
+# CODECS
+# ==========================================================
+def json_legacy(features):
+    # MQTTPublisher._publish path
+    return json.dumps(copy.deepcopy(features)).encode()
+
+
+def json_compact(features):
+    return json.dumps(features, separators=(",", ":")).encode()
+
+
+CODECS = {
+    "json (deepcopy)": (json_legacy, lambda b: json.loads(b)),
+    "json compact": (json_compact, lambda b: json.loads(b)),
+    "binary v1": (encode_l1, decode_l1),
+}
+
+
+def bench(fn, items):
+    fn(items[0])
+
+    t0 = time.perf_counter()
+    for i in range(REPEAT):
+        fn(items[i % len(items)])
+    elapsed = time.perf_counter() - t0
+
+    return elapsed / REPEAT * 1e6
+
+
+def max_rel_error(features):
+    worst = 0.0
+    for f in features:
+        decoded = decode_l1(encode_l1(f))
+        for name, value in decoded.items():
+            if name == "timestamp":
+                continue
+            scale = max(abs(f[name]), 1e-12)
+            worst = max(worst, abs(decoded[name] - f[name]) / scale)
+    return worst
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+def main():
+    rng = np.random.default_rng(0)
+    features = make_features(rng)
+
+    print(f"L1 encoding benchmark | {len(features[0]) - 1} features, repeat={REPEAT}")
+    print(f"{'codec':<16} {'bytes/msg':>10} {'encode us':>10} {'decode us':>10}")
+
+    for name, (encode, decode) in CODECS.items():
+        encoded = [encode(f) for f in features]
+        size = np.mean([len(b) for b in encoded])
+
+        enc_us = bench(encode, features)
+        dec_us = bench(decode, encoded)
+
+        print(f"{name:<16} {size:>10.0f} {enc_us:>10.2f} {dec_us:>10.2f}")
+
+    print(f"\nbinary v1 max relative error (float32): {max_rel_error(features):.2e}")
+
+
+if __name__ == "__main__":
+    main()
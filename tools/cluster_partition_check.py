@@ -0,0 +1,86 @@
+import sys
+
+import paho.mqtt.client as mqtt
+
+from config.config_loader import load_config
+from core.cluster import owned_assets, partition_topics
+
+# ==========================================================
+# CHECK CONFIG
+# ==========================================================
+# Run from repo root: python -m tools.cluster_partition_check [N]
+#
+# Broker stand-in: routes every raw topic of the topology (JSON and
+# "/bin" frame topics) through paho's own topic matcher against the
+# subscriptions of N clustered instances and checks that
+#   - each message reaches exactly one instance
+#   - all points of an asset reach the same instance
+# Static config check only; tests/test_cluster_partition.py runs N
+# runner instances against an in-process broker end to end.
+INSTANCE_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+RAW_TOPIC = "vibration/raw/#"
+
+
+# ==========================================================
+# ROUTING
+# ==========================================================
+def raw_topics(topology):
+    for site, site_cfg in topology["sites"].items():
+        for asset, asset_cfg in site_cfg["assets"].items():
+            for point in asset_cfg["points"]:
+                base = f"vibration/raw/{site}/{asset}/{point}"
+                yield site, asset, base
+                yield site, asset, f"{base}/bin"
+
+
+def route(topic, subscriptions):
+    return [
+        index
+        for index, filters in subscriptions.items()
+        if any(mqtt.topic_matches_sub(f, topic) for f in filters)
+    ]
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+def main():
+    topology = load_config("config/config.yaml")
+
+    subscriptions = {
+        index: partition_topics(
+            RAW_TOPIC, owned_assets(topology, INSTANCE_COUNT, index)
+        )
+        for index in range(INSTANCE_COUNT)
+    }
+
+    owner = {}
+    errors = 0
+
+    for site, asset, topic in raw_topics(topology):
+        receivers = route(topic, subscriptions)
+
+        if len(receivers) != 1:
+            print(f"✗ {topic} → instances {receivers}")
+            errors += 1
+            continue
+
+        if owner.setdefault((site, asset), receivers[0]) != receivers[0]:
+            print(f"✗ {site}/{asset} split across instances")
+            errors += 1
+
+    print(f"Cluster partition check | instances={INSTANCE_COUNT}")
+    for index, filters in subscriptions.items():
+        print(f"  instance {index}: {len(filters)} assets")
+        for f in filters:
+            print(f"    {f}")
+
+    if errors:
+        print(f"FAILED: {errors} routing errors")
+        sys.exit(1)
+
+    print(f"OK: {len(owner)} assets, each on exactly one instance")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,24 @@
 import time
-import json
 import numpy as np
 import paho.mqtt.publish as publish
 
+from raw_ingest.frame_codec import encode_raw_message
+
 # ==========================================================
 # MQTT CONFIG
 # ==========================================================
+# Run from repo root: python -m tools.scenario_test_generator
 BROKER = "localhost"
 PORT = 1883
 
 FS = 25600
 WINDOW = 4096
 
+# "json"   → legacy JSON payload (acceleration list)
+# "binary" → raw_ingest.frame_codec frame on .../{point}/bin
+PAYLOAD_FORMAT = "json"
+FRAME_DTYPE = "float32"   # binary only: "float32" | "int16"
+
 # ==========================================================
 # MULTI SITE TOPOLOGY
 # ==========================================================
@@ -123,11 +130,18 @@ def main():
                             "acceleration": acc.tolist(),
                         }
 
-                        topic = f"vibration/raw/{site}/{asset}/{point}"
+                        topic, message = encode_raw_message(
+                            f"vibration/raw/{site}/{asset}/{point}",
+                            payload,
+                            acc,
+                            FS,
+                            payload_format=PAYLOAD_FORMAT,
+                            dtype=FRAME_DTYPE,
+                        )
 
                         publish.single(
                             topic,
-                            json.dumps(payload),
+                            message,
                             hostname=BROKER,
                             port=PORT,
                         )